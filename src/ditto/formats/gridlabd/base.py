@@ -2,6 +2,10 @@ from __future__ import absolute_import, division, print_function
 from builtins import super, range, zip, round, map
 
 
+#Names of the properties of every class, built on first use (see: __setitem__).
+_property_names = {}
+
+
 class GridLABDBase(object):
 
     _properties = []
@@ -28,7 +32,12 @@ class GridLABDBase(object):
             )
 
     def __setitem__(self, k, v):
-        if k not in [p["name"] for p in self._properties]:
+        names = _property_names.get(self.__class__)
+        if names is None:
+            names = frozenset(p["name"] for p in self._properties)
+            _property_names[self.__class__] = names
+
+        if k not in names:
             raise AttributeError(
                 "Unable to set {} with {} on {}".format(k, v, self.__class__.__name__)
             )
@@ -20,10 +20,48 @@ class DiTToHasTraits(T.HasTraits):
 
     response = T.Any(allow_none=True, help="default trait for managing return values")
 
+    # Models built against a store with light_models set skip the traitlets machinery:
+    # trait values are kept as plain values in _trait_values, without notifications or
+    # validation. Validation is run in one pass afterwards (see: validate_traits), after
+    # which they are regular HasTraits objects.
+    _light = False
+
+    def __new__(cls, model=None, *args, **kwargs):
+        if getattr(model, "light_models", False):
+            obj = object.__new__(cls)
+            # The regular instance setup (notifier and validator tables, handlers declared
+            # on the class), so the rest of the HasTraits API keeps working.
+            obj.setup_instance()
+            obj._light = True
+            # Container traits validate their elements through this, there are no cross validators.
+            obj._cross_validation_lock = True
+            return obj
+
+        return super().__new__(cls, model, *args, **kwargs)
+
     def __init__(self, model, *args, **kwargs):
-        model.model_store.append(self)
+        model.add_model(self)
         self.build(model)
-        super().__init__(*args, **kwargs)
+        if self._light:
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+        else:
+            super().__init__(*args, **kwargs)
+
+    def validate_traits(self):
+        if not self._light:
+            return
+
+        klass = self.__class__
+        for name, value in self._trait_values.items():
+            validate = getattr(getattr(klass, name), "validate", None)
+            if value is not None and validate is not None:
+                # Coerces the value the same way setting the trait would have.
+                self._trait_values[name] = validate(self, value)
+
+        # From here on, setting a trait validates it and notifies its observers.
+        self._light = False
+        self._cross_validation_lock = False
 
     def set_name(self, model):
         try:
@@ -74,6 +112,25 @@ class DiTToTraitType(T.TraitType):
 
     allow_none = True
 
+    def __get__(self, obj, cls=None):
+        if obj is None or not obj._light:
+            return super().__get__(obj, cls)
+
+        try:
+            return obj._trait_values[self.name]
+        except KeyError:
+            value = self.default()
+            if value is not None and hasattr(self, "validate"):
+                value = self.validate(obj, value)
+            obj._trait_values[self.name] = value
+            return value
+
+    def __set__(self, obj, value):
+        if obj._light:
+            obj._trait_values[self.name] = value
+        else:
+            super().__set__(obj, value)
+
     def get(self, obj, cls=None):
         # Call notify_access with event type fetch
         # If and only if one event exists, a return value will be produced
@@ -0,0 +1,128 @@
+import os
+import re
+
+#A comment runs to the end of the line. Words may contain quoted strings, which keep
+#their whitespace and separators (quotes are stripped later, by the reader).
+TOKEN_PATTERN = re.compile(r'//.*|[{};]|(?:"[^"]*"|[^\s{};"/]|/(?!/))+')
+
+#A '{ ... }' block in a .glm file (e.g. an object, a schedule or a module/clock section).
+class GldBlock:
+    def __init__(self, keyword, header, parent) -> None:
+        self.keyword = keyword
+        self.header = header
+        #Enclosing object, for nested objects.
+        self.parent = parent
+        #Name of the block once the reader has resolved it (nested objects refer to it as their parent).
+        self.name = None
+        #Every statement is the list of words before a ';' (or before the closing '}').
+        self.statements = []
+        #Finished nested objects, held until this block is finished so its name is known.
+        self.children = []
+
+#Streams the tokens of a .glm file one line at a time (lists of tokens per line).
+##include files are expanded in place, recursively, and are never read into memory as a whole.
+def tokenize_glm(input_file, open_files=()):
+    real_path = os.path.realpath(input_file)
+    if real_path in open_files:
+        raise Exception(f"Circular #include of {input_file}")
+    open_files = open_files + (real_path,)
+
+    with open(input_file, "r") as f:
+        for line in f:
+            stripped = line.lstrip()
+            if stripped[:1] == "#":
+                #Other preprocessor directives (#set, #define, ...) don't affect the network.
+                if stripped[:8] == "#include":
+                    yield from tokenize_glm(resolve_include(stripped, input_file), open_files)
+                continue
+
+            if '"' in line or "//" in line:
+                tokens = TOKEN_PATTERN.findall(line)
+                if tokens and tokens[-1][:2] == "//":
+                    tokens.pop()
+            else:
+                #Lines without quotes or comments (nearly all of them) only need the separators padded.
+                tokens = line.replace(";", " ; ").replace("{", " { ").replace("}", " } ").split()
+            if tokens:
+                yield tokens
+
+#Yields blocks as they are finished. Objects are yielded wherever they are declared, nested
+#objects right after the object enclosing them. Blocks nested in anything other than an
+#object (e.g. the groups of a schedule) are folded into the statements of the enclosing block.
+def read_glm_blocks(input_file):
+    stack = []
+    words = []
+
+    for tokens in tokenize_glm(input_file):
+        for token in tokens:
+            if token == ";":
+                if words and stack:
+                    stack[-1].statements.append(words)
+                words = []
+            elif token == "{":
+                parent = None
+                if stack and stack[-1].keyword == "object":
+                    parent = stack[-1]
+                keyword = words[0] if words else None
+                stack.append(GldBlock(keyword, words[1:], parent))
+                words = []
+            elif token == "}":
+                if not stack:
+                    words = []
+                    continue
+
+                block = stack.pop()
+                if words:
+                    block.statements.append(words)
+                    words = []
+
+                if block.keyword == "object":
+                    if block.parent is not None:
+                        block.parent.children.append(block)
+                    else:
+                        yield from iter_with_children(block)
+                elif stack:
+                    stack[-1].statements.extend(block.statements)
+                else:
+                    yield block
+            else:
+                words.append(token)
+
+    if stack:
+        raise Exception(f"Unterminated block ({stack[-1].keyword}) in {input_file}")
+
+def iter_with_children(block):
+    yield block
+
+    children = block.children
+    block.children = []
+    for child in children:
+        yield from iter_with_children(child)
+
+#Includes are resolved relative to the file including them, falling back to the working directory.
+def resolve_include(directive, including_file):
+    location = directive[8:].strip().rstrip(";").strip().strip('"<>')
+    if os.path.isabs(location):
+        return location
+
+    candidate = os.path.join(os.path.dirname(including_file), location)
+    if os.path.isfile(candidate):
+        return candidate
+
+    return location
+
+#Every file included by the input file, recursively (in the order they are expanded).
+def find_includes(input_file, open_files=()):
+    real_path = os.path.realpath(input_file)
+    if real_path in open_files:
+        raise Exception(f"Circular #include of {input_file}")
+    open_files = open_files + (real_path,)
+
+    with open(input_file, "r") as f:
+        for line in f:
+            stripped = line.lstrip()
+            if stripped[:8] == "#include":
+                include_file = resolve_include(stripped, input_file)
+                yield include_file
+                if os.path.isfile(include_file):
+                    yield from find_includes(include_file, open_files)
@@ -42,31 +42,83 @@ resistance_of_dirt_underground = 0.09327 #ohms/mile
 conductor_dirt_distance_factor_overhead = 7.93402 #ohms/mile
 conductor_dirt_distance_factor_underground = 7.95153 #ohms/mile
 
+#Feeders reuse a handful of conductor and spacing configurations for thousands of lines, so
+#spacings and impedance/capacitance matrices are memoized on the values they are computed from.
+MEMO_SIZE = 4096
+_memo = {}
+
+def memoize(key, compute):
+    entry = _memo.get(key)
+    if entry is None:
+        if len(_memo) >= MEMO_SIZE:
+            _memo.clear()
+        entry = (compute(),)
+        _memo[key] = entry
+
+    #Callers get their own copy, so memoized matrices are never modified.
+    value = entry[0]
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    return value
+
+def wire_key(wire_list, attributes):
+    return tuple(tuple(getattr(wire, attribute, None) for attribute in attributes) for wire in wire_list)
+
+def distances_key(distances):
+    distances = np.asarray(distances)
+    return (distances.shape, distances.dtype.str, distances.tobytes())
+
+def read_spacing_distances(spacing_config):
+    values = []
+    for i in range(num_dists):
+        for j in range(i + 1, num_dists):
+            name = "distance_%s%s" % (lookup[i], lookup[j])
+            try:
+                spacing_config[name] = remove_nonnum.sub('', spacing_config[name])
+                values.append(float(spacing_config[name]))
+            except AttributeError:
+                values.append(None)
+
+    return tuple(values)
+
 def compute_overhead_spacing(spacing_config, conductors, default_height=30):
+    spacing_values = read_spacing_distances(spacing_config)
+    conductors = list(conductors)
+
+    key = ("overhead_spacing", spacing_values, tuple(w.phase for w in conductors), default_height)
+    distances, positions = memoize(key, lambda: overhead_spacing_positions(spacing_values, conductors, default_height))
+
+    for w, (x, y) in zip(conductors, positions):
+        w.X = x
+        w.Y = y
+
+    return distances.copy()
+
+def overhead_spacing_positions(spacing_values, conductors, default_height):
+    distances = compute_overhead_distances(spacing_values, conductors, default_height)
+    return (distances, [(w.X, w.Y) for w in conductors])
+
+def compute_overhead_distances(spacing_values, conductors, default_height):
     max_dist = -100
     max_from = -1
     max_to = -1
     distances = [[-1 for i in range(num_dists)] for j in range(num_dists)]
 
+    spacing_values = iter(spacing_values)
     for i in range(num_dists):
         for j in range(i + 1, num_dists):
-            name = "distance_%s%s" % (lookup[i], lookup[j])
-            try:
-                spacing_config[name] = remove_nonnum.sub('', spacing_config[name])
-                dist = float(spacing_config[name])
-                #If the distance is 0, we treat it as unspecified.
-                if dist == 0:
-                    continue
-                distances[i][j] = dist
-                distances[j][i] = dist
-                distances[i][i] = 0
-                distances[j][j] = 0
-                if dist > max_dist and i < (num_dists - 1) and j < (num_dists - 1):
-                    max_dist = dist
-                    max_from = i
-                    max_to = j
-            except AttributeError:
-                pass
+            dist = next(spacing_values)
+            #If the distance is 0 (or missing), we treat it as unspecified.
+            if dist is None or dist == 0:
+                continue
+            distances[i][j] = dist
+            distances[j][i] = dist
+            distances[i][i] = 0
+            distances[j][j] = 0
+            if dist > max_dist and i < (num_dists - 1) and j < (num_dists - 1):
+                max_dist = dist
+                max_from = i
+                max_to = j
     
     n_entries = num_dists ** 2
     for i in range(num_dists):
@@ -295,23 +347,38 @@ def compute_overhead_spacing(spacing_config, conductors, default_height=30):
     return np.array(distances)
 
 def compute_underground_spacing(outer_diameters, spacing_config, conductors):
+    spacing_values = read_spacing_distances(spacing_config)
+    conductors = list(conductors)
+
+    key = ("underground_spacing", spacing_values, tuple(outer_diameters), tuple(w.phase for w in conductors))
+    distances, positions = memoize(key, lambda: underground_spacing_positions(outer_diameters, spacing_values, conductors))
+
+    for w, (x, y) in zip(conductors, positions):
+        w.X = x
+        w.Y = y
+
+    return distances.copy()
+
+def underground_spacing_positions(outer_diameters, spacing_values, conductors):
+    distances = compute_underground_distances(outer_diameters, spacing_values, conductors)
+    return (distances, [(w.X, w.Y) for w in conductors])
+
+def compute_underground_distances(outer_diameters, spacing_values, conductors):
     distances = [[-1 for i in range(num_dists)] for j in range(num_dists)]
+    spacing_values = iter(spacing_values)
     for i in range(num_dists):
         for j in range(i + 1, num_dists):
-            name = "distance_%s%s" % (lookup[i], lookup[j])
-            try:
-                spacing_config[name] = remove_nonnum.sub('', spacing_config[name])
-                dist = float(spacing_config[name])
-                if dist == 0:
-                    # A distance of zero was given, which is not accepted. Silently switching to default
-                    # TODO proper error handling in this case
-                    dist = (outer_diameters[i % len(outer_diameters)] + outer_diameters[j % len(outer_diameters)]) / 2
-                distances[i][j] = dist
-                distances[j][i] = dist
-                distances[i][i] = 0
-                distances[j][j] = 0
-            except AttributeError:
-                pass
+            dist = next(spacing_values)
+            if dist is None:
+                continue
+            if dist == 0:
+                # A distance of zero was given, which is not accepted. Silently switching to default
+                # TODO proper error handling in this case
+                dist = (outer_diameters[i % len(outer_diameters)] + outer_diameters[j % len(outer_diameters)]) / 2
+            distances[i][j] = dist
+            distances[j][i] = dist
+            distances[i][i] = 0
+            distances[j][j] = 0
 
     n_entries = num_dists ** 2
     i_index = 0
@@ -480,6 +547,10 @@ def compute_underground_spacing(outer_diameters, spacing_config, conductors):
     return np.array(distances)
 
 def compute_overhead_capacitance(wire_list, distances, freq = 60):
+    key = ("overhead_capacitance", wire_key(wire_list, ["phase", "diameter"]), distances_key(distances), freq)
+    return memoize(key, lambda: calc_overhead_capacitance(wire_list, distances, freq))
+
+def calc_overhead_capacitance(wire_list, distances, freq):
     neutral_index = rev_lookup["N"]
     earth_index = rev_lookup["E"]
 
@@ -555,7 +626,13 @@ def compute_overhead_capacitance(wire_list, distances, freq = 60):
 
     return Y
 
+UNDERGROUND_CAPACITANCE_ATTRIBUTES = ["phase", "outer_diameter", "concentric_neutral_diameter", "conductor_diameter", "_shield_gmr", "shield_gmr", "concentric_neutral_nstrand"]
+
 def compute_underground_capacitance(wire_list):
+    key = ("underground_capacitance", wire_key(wire_list, UNDERGROUND_CAPACITANCE_ATTRIBUTES))
+    return memoize(key, lambda: calc_underground_capacitance(wire_list))
+
+def calc_underground_capacitance(wire_list):
     capacitance_matrix = np.zeros((3,3)).astype(complex)
 
     for index in range(len(wire_list)):
@@ -595,33 +672,18 @@ def compute_underground_capacitance(wire_list):
     return capacitance_matrix
 
 def compute_overhead_impedance(wire_list, distances, phases, has_neutral, freq=60, resistivity=100, kron_reduce=True):
+    key = ("overhead_impedance", wire_key(wire_list, ["phase", "resistance", "gmr"]), distances_key(distances), tuple(phases), has_neutral, freq, resistivity)
+    return memoize(key, lambda: calc_overhead_impedance(wire_list, distances, phases, has_neutral))
+
+def calc_overhead_impedance(wire_list, distances, phases, has_neutral):
     matrix = np.zeros((4,4)).astype(complex)
 
-    for i in range(len(wire_list)):
-        index_i = rev_lookup[wire_list[i].phase]
-        for j in range(len(wire_list)):
-            if i == j:
-                z = 0  
-                if (
-                    wire_list[i].resistance is not None
-                    and wire_list[i].gmr is not None
-                ):
-                    z = calc_Zii(wire_list[i].resistance, wire_list[i].gmr, False)
-                    
-                else:
-                    logger.debug("Warning: resistance or GMR is missing from wire")
+    n_wires = len(wire_list)
+    indexes = [rev_lookup[wire.phase] for wire in wire_list]
+    resistances, gmrs = wire_resistances_and_gmrs(wire_list)
 
-                matrix[index_i, index_i] = z
-            else:
-                z = 0
-                if distances[i][j] is not None:
-                    distance = distances[i][j]
-                    z = calc_Zij(distance, False)
-                else:
-                    logger.debug("Warning X or Y values missing from wire")
-                    
-                index_j = rev_lookup[wire_list[j].phase]
-                matrix[index_i, index_j] = z
+    wire_distances = np.array(distances, dtype=float)[:n_wires, :n_wires]
+    matrix[np.ix_(indexes, indexes)] = primitive_impedance(wire_distances, resistances, gmrs, False)
 
     #We uses the phases list from the line itself, rather than the line configuration. 
     if has_neutral:
@@ -641,7 +703,13 @@ def compute_overhead_impedance(wire_list, distances, phases, has_neutral, freq=6
 
     return reduced_matrix
 
+UNDERGROUND_IMPEDANCE_ATTRIBUTES = ["phase", "resistance", "gmr", "outer_diameter", "concentric_neutral_diameter", "concentric_neutral_nstrand", "concentric_neutral_resistance", "concentric_neutral_gmr", "_shield_gmr", "shield_gmr", "shield_resistance", "shield_diameter", "shield_thickness"]
+
 def compute_underground_impedance(wire_list, distances, freq=60, resistivity=100):
+    key = ("underground_impedance", wire_key(wire_list, UNDERGROUND_IMPEDANCE_ATTRIBUTES), distances_key(distances), freq, resistivity)
+    return memoize(key, lambda: calc_underground_impedance(wire_list, distances))
+
+def calc_underground_impedance(wire_list, distances):
     conductor_own_neutral_distances = []
     conductor_resistances = []
     neutral_resistances = []
@@ -681,10 +749,8 @@ def compute_underground_impedance(wire_list, distances, freq=60, resistivity=100
                 temp.append((distances[i][j]**k - conductor_own_neutral_distances[j]**k)**(1/k))
         conductor_neutral_distances.append(temp)
 
-    _R = np.concatenate((conductor_resistances, neutral_resistances))
-    _Z = np.zeros((len(_R), len(_R)), dtype=complex)
-
-    _GMR = np.concatenate((conductor_gmrs, neutral_gmrs))
+    _R = np.concatenate((conductor_resistances, neutral_resistances)).astype(float)
+    _GMR = np.concatenate((conductor_gmrs, neutral_gmrs)).astype(float)
 
     all_distances = np.zeros((len(_R), len(_R)))
     for i, wire1 in enumerate(wire_list):
@@ -697,13 +763,7 @@ def compute_underground_impedance(wire_list, distances, freq=60, resistivity=100
                 all_distances[num_non_neutral+i][j] = conductor_neutral_distances[j][i]
             all_distances[num_non_neutral+i][num_non_neutral+j] = distances[i][j]
 
-    for i in range(len(_R)):
-        for j in range(len(_R)):
-            if i == j:
-                _Z[i, j] = calc_Zii(_R[i], _GMR[i], True)
-            else:
-                _D_ij = all_distances[i][j]
-                _Z[i, j] = calc_Zij(_D_ij, True)
+    _Z = primitive_impedance(all_distances, _R, _GMR, True)
                 
     # Evaluate Zij, Zin, Znj, Znn
     _Zij = _Z[:len(_R)//2, :len(_R)//2]
@@ -713,6 +773,10 @@ def compute_underground_impedance(wire_list, distances, freq=60, resistivity=100
     return kron_reduction(_Zij, _Zin, _Znj, _Znn)
 
 def compute_triplex_impedance(wire_list, freq=60, resistivity=100, kron_reduce=True):
+    key = ("triplex_impedance", wire_key(wire_list, ["phase", "resistance", "gmr", "diameter", "insulation_thickness"]), freq, resistivity, kron_reduce)
+    return memoize(key, lambda: calc_triplex_impedance(wire_list, kron_reduce))
+
+def calc_triplex_impedance(wire_list, kron_reduce):
     matrix = np.zeros((3,3)).astype(complex)
 
     wire_map = {'1':0,'2':1,'N':2}
@@ -726,35 +790,18 @@ def compute_triplex_impedance(wire_list, freq=60, resistivity=100, kron_reduce=T
             distances_mapped = True
             break
 
-    for i in range(len(wire_list)):
-        index_i = wire_map[wire_list[i].phase]
-
-        for j in range(len(wire_list)):
-            if i == j:
-                z = 0
-                if (
-                    wire_list[i].resistance is not None
-                    and wire_list[i].gmr is not None
-                ):
-                    z = calc_Zii(wire_list[i].resistance, wire_list[i].gmr, False)
-                else:
-                    logger.debug("Warning: resistance or GMR is missing from wire")
-
-                matrix[index_i, index_i] = z
-            else:
-                z = 0
-                index_j = wire_map[wire_list[j].phase]
+    indexes = [wire_map[wire.phase] for wire in wire_list]
+    resistances, gmrs = wire_resistances_and_gmrs(wire_list)
 
-                if (distances_mapped):
-                    if wire_list[i].phase == "N" or wire_list[j].phase == "N":
-                        z = calc_Zij(d1n, False)
-                    else:
-                        z = calc_Zij(d12, False)
-                    
-                    matrix[index_i, index_j] = z
+    if distances_mapped:
+        is_neutral = np.array([wire.phase == "N" for wire in wire_list])
+        wire_distances = np.where(is_neutral[:, np.newaxis] | is_neutral[np.newaxis, :], d1n, d12)
+        primitive = primitive_impedance(wire_distances, resistances, gmrs, False)
+    else:
+        logger.debug("Waring: Insulation_thickness/diameter not set")
+        primitive = np.diag(self_impedances(resistances, gmrs, False))
 
-                else:
-                    logger.debug("Waring: Insulation_thickness/diameter not set")
+    matrix[np.ix_(indexes, indexes)] = primitive
     
     if kron_reduce:
         # Evaluate Zij, Zin, Znj, Znn
@@ -766,6 +813,32 @@ def compute_triplex_impedance(wire_list, freq=60, resistivity=100, kron_reduce=T
 
     return matrix
 
+def wire_resistances_and_gmrs(wire_list):
+    #Wires without a resistance or GMR get no self impedance (see: self_impedances).
+    resistances = np.array([np.nan if wire.resistance is None or wire.gmr is None else wire.resistance for wire in wire_list], dtype=float)
+    gmrs = np.array([np.nan if wire.resistance is None or wire.gmr is None else wire.gmr for wire in wire_list], dtype=float)
+    if np.any(np.isnan(resistances)):
+        logger.debug("Warning: resistance or GMR is missing from wire")
+    return resistances, gmrs
+
+#Eqns 4.41 and 4.42 for every pair of conductors at once: distances between the conductors
+#off the diagonal, their own resistance and GMR on it.
+def primitive_impedance(distances, resistances, gmrs, is_underground):
+    n_conductors = len(resistances)
+    off_diagonal = ~np.eye(n_conductors, dtype=bool)
+
+    primitive = np.zeros((n_conductors, n_conductors), dtype=complex)
+    primitive[off_diagonal] = calc_Zij(distances[off_diagonal], is_underground)
+    np.fill_diagonal(primitive, self_impedances(resistances, gmrs, is_underground))
+
+    return primitive
+
+def self_impedances(resistances, gmrs, is_underground):
+    has_self_impedance = ~np.isnan(resistances)
+    impedances = np.zeros(len(resistances), dtype=complex)
+    impedances[has_self_impedance] = calc_Zii(resistances[has_self_impedance], gmrs[has_self_impedance], is_underground)
+    return impedances
+
 def try_load_direct_line_impedance(line_config):
     #It is possible to specify the line impedance directly in Z matrix form:
     #http://gridlab-d.shoutwiki.com/wiki/Power_Flow_User_Guide#Line_configuration_properties
@@ -23,6 +23,7 @@ from ditto.readers.gridlabd.line_impedance import compute_overhead_capacitance,
 from ditto.readers.gridlabd.load_parser import LoadParser
 from ditto.readers.abstract_reader import AbstractReader
 from ditto.readers.gridlabd.helpers import parse_phases, triplex_phases
+from ditto.readers.gridlabd.glm_tokenizer import read_glm_blocks
 
 logger = logging.getLogger(__name__)
 
@@ -67,134 +68,82 @@ shared_config_objects = [
 
 def read_gld_objects_and_schedules(input_file, origin_datetime="2017 Jun 1 2:00PM"):
     all_gld_objects = {}
+    all_schedules = {}
 
     origin_datetime = datetime.strptime(origin_datetime, "%Y %b %d %I:%M%p")
     delta_datetime = timedelta(minutes=1)
     sub_datetime = origin_datetime - delta_datetime
 
-    curr_object = None
-    curr_schedule = None
-    ignore_elements = False
-    found_schedule = False
-    all_includes = []
-    all_schedules = {}
+    #Blocks are streamed from the file (see: glm_tokenizer), so only the objects themselves are kept.
+    for block in read_glm_blocks(input_file):
+        if block.keyword == "object":
+            curr_object = read_gld_object(block)
+            if curr_object is not None:
+                all_gld_objects[curr_object["name"]] = curr_object
+        elif block.keyword == "schedule" and len(block.header) > 0:
+            value = read_gld_schedule_value(block, origin_datetime, sub_datetime)
+            if value is not None:
+                all_schedules[block.header[0]] = value
 
-    inputfile = open(input_file, "r")
-    all_rows = inputfile.readlines()
+    return (all_gld_objects, all_schedules)
 
-    for row in all_rows:
-        if row[:8] == "#include":
-            entries = row.split()
-            location = entries[1].strip('";')
-            include_file = open(location, "r")
-            include_rows = include_file.readlines()
-            all_includes = all_includes + include_rows
-    all_rows = all_rows + all_includes
+def read_gld_object(block):
+    if len(block.header) == 0:
+        return None
 
-    for row in all_rows:
-        row = row.strip()
-        units = None
+    obj = block.header[0].split(":")
+    obj_class = obj[0]
+    if obj_class in skipped_objects:
+        return None
 
-        # Deal with comments
-        if row[:2] == "//":
-            continue
-        if row.find("//") != -1:
-            row = row[:row.find("//")]
-
-        entries = row.split()
-        if len(entries) > 0 and entries[0] == "object":
-            if curr_object is None:
-                obj = entries[1].split(":")
-                obj_class = obj[0]
-                if obj_class in skipped_objects:
-                    continue
-                curr_object = getattr(gridlabd, obj_class)()
-                if len(obj) > 1:
-                    curr_object["name"] = obj_class + ":" + obj[1]
-            else:
-                ignore_elements = True
+    curr_object = getattr(gridlabd, obj_class)()
+    if len(obj) > 1:
+        curr_object["name"] = obj_class + ":" + obj[1]
 
-        elif len(entries) > 0 and entries[0] == "schedule":
-            if curr_schedule is None:
-                schedule = entries[1]
-                schedule_bracket_cnt = 1
-            curr_schedule = schedule
+    for entries in block.statements:
+        if len(entries) < 2:
+            continue
 
+        element = entries[0]
+        value = entries[1].replace('"', "")
+
+        if len(entries) > 2:
+            units = entries[2]
+            # TODO: Deal with units correctly
+            if obj_class == "line_spacing" and units == "in":
+                value = str(float(value) / 12)
+            if obj_class == "capacitor" and units == "MVAr":
+                value = str(float(value) * 1e6)
+
+        curr_object[element] = value
+
+    #Nested objects are children of the object they are declared in.
+    if block.parent is not None and block.parent.name is not None and not hasattr(curr_object, "_parent"):
+        try:
+            curr_object["parent"] = block.parent.name
+        except AttributeError:
+            pass
+
+    if not hasattr(curr_object, "_name"):
+        if getattr(curr_object, "_from", None) != None and getattr(curr_object, "_to", None) != None:
+            curr_object["name"] = curr_object["from"] + "-" + curr_object["to"]
         else:
-            if curr_object == None and curr_schedule == None:
-                continue
-            if curr_object != None:
-                if len(row) > 0 and row.find(";") != -1:	
-                    row = row[:row.find(";")]
-                entries = row.split()
-                if len(entries) > 1:
-                    element = entries[0]
-                    value = entries[1].replace('"', "")
-
-                    if len(entries) > 2:
-                        units = entries[2]
-                        # TODO: Deal with units correctly
-                        if obj_class == "line_spacing" and units == "in":
-                            value = str(float(value) / 12)
-                        if obj_class == "capacitor" and units == "MVAr":
-                            value = str(float(value) * 1e6)
-                        # print element,value,units
-                        # if units[0] =='k':
-                        #    value = value/1000.0
-
-                    # Assuming no nested objects for now.
-                    curr_object[element] = value
-
-                if len(row) >= 1:
-                    if row[-1] == "}" or row[-2:] == "};":
-                        if ignore_elements:  # Assumes only one layer of nesting
-                            ignore_elements = False
-                        else:
-                            try:
-                                all_gld_objects[
-                                    curr_object["name"]
-                                ] = curr_object
-                                curr_object = None
-                            except:
+            logger.debug("Warning object missing a name")
+            return None
 
-                                if (
-                                    curr_object["from"] != None
-                                    and curr_object["to"] != None
-                                ):
-                                    curr_object["name"] = (
-                                        curr_object["from"]
-                                        + "-"
-                                        + curr_object["to"]
-                                    )
-                                    all_gld_objects[
-                                        curr_object["name"]
-                                    ] = curr_object
+    block.name = curr_object["name"]
+    return curr_object
 
-                                else:
-                                    logger.debug("Warning object missing a name")
-                                curr_object = None
-
-            if curr_schedule != None:
-                row = row.strip(";")
-                entries = row.split()
-                if len(entries) > 5 and not found_schedule:
-                    cron = " ".join(entries[:-1])
-                    value = entries[-1]
-                    iter = croniter(cron, sub_datetime)
-                    if iter.get_next(datetime) == origin_datetime:
-                        found_schedule = True
-                        all_schedules[curr_schedule] = value
-
-                if len(row) >= 1:
-                    if row[-1] == "}":
-                        schedule_bracket_cnt = schedule_bracket_cnt - 1
-                    if row[0] == "{":
-                        schedule_bracket_cnt = schedule_bracket_cnt + 1
-                    if schedule_bracket_cnt == 0:
-                        curr_schedule = None
-                        found_schedule = False
+def read_gld_schedule_value(block, origin_datetime, sub_datetime):
+    for entries in block.statements:
+        if len(entries) > 5:
+            cron = " ".join(entries[:-1])
+            iter = croniter(cron, sub_datetime)
+            if iter.get_next(datetime) == origin_datetime:
+                return entries[-1]
+
+    return None
 
-    return (all_gld_objects, all_schedules)
 
 def parse_line_length(line, name):
     #we always return meters
@@ -292,10 +241,9 @@ class Reader(AbstractReader):
 
                     #Meter nominal voltages are sometimes incorrect, so we use
                     #the child's nominal voltage if it exists.
-                    for element in model.model_store:
-                        if type(element) == Node and element.name == api_node.parent:
-                            element.nominal_voltage = api_node.nominal_voltage
-                            break
+                    element = model.find_model(api_node.parent, Node)
+                    if element is not None:
+                        element.nominal_voltage = api_node.nominal_voltage
                 except AttributeError:
                     pass
 
@@ -371,300 +319,300 @@ class Reader(AbstractReader):
                 try:
                     # Even though the transformer may be ABCN, (ie there's a neutral on the wire) we assume a delta primary doesn't connect the the neutral wire.
                     config_name1 = obj["configuration"]
-                    for config_name, config in self.all_gld_objects.items():
-                        if config_name == config_name1:
-                            try:
-                                conn = str(config["connect_type"])
-                                # Assume a grounded Wye - Wye connection has a neutral on both sides
-                                if conn == '1' or conn == "WYE_WYE":
-                                    winding1.connection_type = "Y"
-                                    winding2.connection_type = "Y"
-
-                                # Assume that the secondary on a delta-delta has a grounding neutral, but the high side doesn't
-                                if conn == '2' or conn == "DELTA_DELTA":
-                                    winding1.connection_type = "D"
-                                    winding2.connection_type = "D"
-
-                                # Assume that the secondary on a delta-wye has a grounding neutral, but the high side doesn't
-                                if conn == '3' or conn == "DELTA_GWYE":
-                                    winding1.connection_type = "D"
-                                    winding2.connection_type = "Y"
-
-                                # For a single phase transformer, no connection type is specified. It steps from a single phase and neutral to a single phase and neutral
-                                if conn == '4' or conn == "SINGLE_PHASE":
-                                    pass  # The phase is already covered by the "phases" attribute
-
-                                # For a single phase center tapped transformer no connection type is specified. Its steps from a single phase and neutral to a neutral and two low voltage lines
-                                if conn == '5' or conn == "SINGLE_PHASE_CENTER_TAPPED":
-                                    api_transformer.is_center_tap = True
-                                    num_windings = 3
-                                    winding2.phase_windings[
-                                        0
-                                    ].phase = (
-                                        "1"
-                                    )  # TODO understand the reason this was A
-
-                                    pw3 = PhaseWinding(model)
-                                    pw3.phase = (
-                                        "2"
-                                    )  # TODO understand the reason this was B
-                                    winding3.phase_windings.append(pw3)
-                            except AttributeError:
-                                pass
+                    config = self.all_gld_objects.get(config_name1)
+                    if config is not None:
+                        try:
+                            conn = str(config["connect_type"])
+                            # Assume a grounded Wye - Wye connection has a neutral on both sides
+                            if conn == '1' or conn == "WYE_WYE":
+                                winding1.connection_type = "Y"
+                                winding2.connection_type = "Y"
 
-                            try:
-                                install_type = config["install_type"]
-                                api_transformer.install_type = install_type
-                            except AttributeError:
-                                pass
+                            # Assume that the secondary on a delta-delta has a grounding neutral, but the high side doesn't
+                            if conn == '2' or conn == "DELTA_DELTA":
+                                winding1.connection_type = "D"
+                                winding2.connection_type = "D"
 
-                            try:
-                                noloadloss = config["no_load_loss"]
-                                api_transformer.noload_loss = float(noloadloss)
-                            except AttributeError:
-                                pass
+                            # Assume that the secondary on a delta-wye has a grounding neutral, but the high side doesn't
+                            if conn == '3' or conn == "DELTA_GWYE":
+                                winding1.connection_type = "D"
+                                winding2.connection_type = "Y"
 
-                            try:
-                                shunt_impedance = complex(
-                                    config["shunt_impedance"])
-                                api_transformer.shunt_impedance = shunt_impedance
-                            except AttributeError:
-                                pass
+                            # For a single phase transformer, no connection type is specified. It steps from a single phase and neutral to a single phase and neutral
+                            if conn == '4' or conn == "SINGLE_PHASE":
+                                pass  # The phase is already covered by the "phases" attribute
 
-                            try:
-                                high_voltage = config["primary_voltage"]
-                                if high_voltage.find('kV') != -1:
-                                    high_voltage = remove_nonnum.sub(
-                                        '', high_voltage)
-                                    winding1.nominal_voltage = float(
-                                        high_voltage) * 1e3
-                                else:
-                                    high_voltage = remove_nonnum.sub(
-                                        '', high_voltage)
-                                    winding1.nominal_voltage = float(
-                                        high_voltage)
-                            except AttributeError:
-                                pass
+                            # For a single phase center tapped transformer no connection type is specified. Its steps from a single phase and neutral to a neutral and two low voltage lines
+                            if conn == '5' or conn == "SINGLE_PHASE_CENTER_TAPPED":
+                                api_transformer.is_center_tap = True
+                                num_windings = 3
+                                winding2.phase_windings[
+                                    0
+                                ].phase = (
+                                    "1"
+                                )  # TODO understand the reason this was A
+
+                                pw3 = PhaseWinding(model)
+                                pw3.phase = (
+                                    "2"
+                                )  # TODO understand the reason this was B
+                                winding3.phase_windings.append(pw3)
+                        except AttributeError:
+                            pass
 
-                            try:
-                                low_voltage = config["secondary_voltage"]
-                                if low_voltage.find('kV') != -1:
-                                    low_voltage = remove_nonnum.sub(
-                                        '', low_voltage)
-                                    winding2.nominal_voltage = float(
-                                        low_voltage) * 1e3
-                                else:
-                                    low_voltage = remove_nonnum.sub(
-                                        '', low_voltage)
-                                    winding2.nominal_voltage = float(
-                                        low_voltage)
-                                if num_windings == 3:
-                                    winding3.nominal_voltage = -float(low_voltage) # To indicate the 180 degree phase shift
-                            except AttributeError:
-                                pass
+                        try:
+                            install_type = config["install_type"]
+                            api_transformer.install_type = install_type
+                        except AttributeError:
+                            pass
+
+                        try:
+                            noloadloss = config["no_load_loss"]
+                            api_transformer.noload_loss = float(noloadloss)
+                        except AttributeError:
+                            pass
+
+                        try:
+                            shunt_impedance = complex(
+                                config["shunt_impedance"])
+                            api_transformer.shunt_impedance = shunt_impedance
+                        except AttributeError:
+                            pass
+
+                        try:
+                            high_voltage = config["primary_voltage"]
+                            if high_voltage.find('kV') != -1:
+                                high_voltage = remove_nonnum.sub(
+                                    '', high_voltage)
+                                winding1.nominal_voltage = float(
+                                    high_voltage) * 1e3
+                            else:
+                                high_voltage = remove_nonnum.sub(
+                                    '', high_voltage)
+                                winding1.nominal_voltage = float(
+                                    high_voltage)
+                        except AttributeError:
+                            pass
 
+                        try:
+                            low_voltage = config["secondary_voltage"]
+                            if low_voltage.find('kV') != -1:
+                                low_voltage = remove_nonnum.sub(
+                                    '', low_voltage)
+                                winding2.nominal_voltage = float(
+                                    low_voltage) * 1e3
+                            else:
+                                low_voltage = remove_nonnum.sub(
+                                    '', low_voltage)
+                                winding2.nominal_voltage = float(
+                                    low_voltage)
+                            if num_windings == 3:
+                                winding3.nominal_voltage = -float(low_voltage) # To indicate the 180 degree phase shift
+                        except AttributeError:
+                            pass
+
+                        try:
+                            resistance = float(config["resistance"])
+                            if num_windings == 2:
+                                winding1.resistance = resistance / 2.0
+                                winding2.resistance = resistance / 2.0
+                            if num_windings == 3:
+                                winding1.resistance = resistance / 2.0
+                                winding2.resistance = (
+                                    resistance
+                                )  # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188
+                                winding3.resistance = resistance
+
+                        except AttributeError:
+                            pass
+
+                        failed_reactance = True
+
+                        reactances = []
+                        try:
+                            reactance = float(config["reactance"])
+                            failed_reactance = False
+                            reactance1 = reactance
+                            reactances.append(
+                                reactance1
+                            )  # TODO: Change documentation to reflect that we aren't indicating the from-to relation in reactances.
+                            # reactances.append((0,1,reactance1))
+                            if (
+                                num_windings == 3
+                            ):  # TODO: Change documentation to reflect that we aren't indicating the from-to relation in reactances.
+                                reactance2 = complex(config["impedance1"])
+                                reactances.append(reactance2.imag)
+                                reactance3 = complex(config["impedance2"])
+                                reactances.append(reactance3.imag)
+
+                        except AttributeError:
+                            if (
+                                not failed_reactance
+                            ):  # Should only fail if there are three windings in the system
+                                reactance = float(config["reactance"])
+                                reactances[0] = 0.8 * reactance
+                                reactances.append(
+                                    0.4 * reactance
+                                )  # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188 of transformer with no center tap
+                                reactances.append(0.4 * reactance)
+
+                        if failed_reactance:
                             try:
-                                resistance = float(config["resistance"])
+                                impedance = complex(config["impedance"])
+                                resistance = impedance.real
+                                reactance = impedance.imag
                                 if num_windings == 2:
+                                    winding1.resistance
                                     winding1.resistance = resistance / 2.0
                                     winding2.resistance = resistance / 2.0
+                                    reactances.append(reactance)
+
                                 if num_windings == 3:
                                     winding1.resistance = resistance / 2.0
                                     winding2.resistance = (
                                         resistance
                                     )  # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188
                                     winding3.resistance = resistance
-
+                                    reactances.append(0.8 * reactance)
+                                    reactances.append(
+                                        0.4 * reactance
+                                    )  # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188 of transformer with no center tap
+                                    reactances.append(0.4 * reactance)
                             except AttributeError:
                                 pass
 
-                            failed_reactance = True
+                        if len(reactances) > 0:
+                            for x in reactances:
+                                api_transformer.reactances.append(x)
 
-                            reactances = []
-                            try:
-                                reactance = float(config["reactance"])
-                                failed_reactance = False
-                                reactance1 = reactance
-                                reactances.append(
-                                    reactance1
-                                )  # TODO: Change documentation to reflect that we aren't indicating the from-to relation in reactances.
-                                # reactances.append((0,1,reactance1))
-                                if (
-                                    num_windings == 3
-                                ):  # TODO: Change documentation to reflect that we aren't indicating the from-to relation in reactances.
-                                    reactance2 = complex(config["impedance1"])
-                                    reactances.append(reactance2.imag)
-                                    reactance3 = complex(config["impedance2"])
-                                    reactances.append(reactance3.imag)
+                        power_rating = 0
 
+                        if num_windings == 3:
+                            power_ratings = []
+                            try:
+                                if config["powerA_rating"].find(
+                                        'kVA') != -1:
+                                    config[
+                                        "powerA_rating"] = remove_nonnum.sub(
+                                            '', config["powerA_rating"])
+                                    power_ratings.append(
+                                        float(config["powerA_rating"]) *
+                                        1000)
+                                else:
+                                    power_ratings.append(
+                                        float(config["powerA_rating"]) *
+                                        1000)
                             except AttributeError:
-                                if (
-                                    not failed_reactance
-                                ):  # Should only fail if there are three windings in the system
-                                    reactance = float(config["reactance"])
-                                    reactances[0] = 0.8 * reactance
-                                    reactances.append(
-                                        0.4 * reactance
-                                    )  # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188 of transformer with no center tap
-                                    reactances.append(0.4 * reactance)
-
-                            if failed_reactance:
-                                try:
-                                    impedance = complex(config["impedance"])
-                                    resistance = impedance.real
-                                    reactance = impedance.imag
-                                    if num_windings == 2:
-                                        winding1.resistance
-                                        winding1.resistance = resistance / 2.0
-                                        winding2.resistance = resistance / 2.0
-                                        reactances.append(reactance)
-
-                                    if num_windings == 3:
-                                        winding1.resistance = resistance / 2.0
-                                        winding2.resistance = (
-                                            resistance
-                                        )  # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188
-                                        winding3.resistance = resistance
-                                        reactances.append(0.8 * reactance)
-                                        reactances.append(
-                                            0.4 * reactance
-                                        )  # Using power flow approximation from "Electric Power Distribution Handbook" by Short page 188 of transformer with no center tap
-                                        reactances.append(0.4 * reactance)
-                                except AttributeError:
-                                    pass
-
-                            if len(reactances) > 0:
-                                for x in reactances:
-                                    api_transformer.reactances.append(x)
-
-                            power_rating = 0
+                                pass
+                            try:
+                                if config["powerB_rating"].find(
+                                        'kVA') != -1:
+                                    config[
+                                        "powerB_rating"] = remove_nonnum.sub(
+                                            '', config["powerB_rating"])
+                                    power_ratings.append(
+                                        float(config["powerB_rating"]) *
+                                        1000)
+                                else:
+                                    power_ratings.append(
+                                        float(config["powerB_rating"]) *
+                                        1000)
+                            except AttributeError:
+                                pass
+                            try:
+                                if config["powerC_rating"].find(
+                                        'kVA') != -1:
+                                    config[
+                                        "powerC_rating"] = remove_nonnum.sub(
+                                            '', config["powerC_rating"])
+                                    power_ratings.append(
+                                        float(config["powerC_rating"]) *
+                                        1000)
+                                else:
+                                    power_ratings.append(
+                                        float(config["powerC_rating"]) *
+                                        1000)
+                            except AttributeError:
+                                pass
+                            api_transformer.power_ratings = power_ratings
 
+                        power_rating_found = False
+                        try:
+                            if config["power_rating"].find('kVA') != -1:
+                                config["power_rating"] = remove_nonnum.sub(
+                                    '', config["power_rating"])
+                                power_rating = float(
+                                    config["power_rating"]) * 1e3
+                            else:
+                                config["power_rating"] = remove_nonnum.sub(
+                                    '', config["power_rating"])
+                                power_rating = float(
+                                    config["power_rating"]) * 1e3
+                            winding1.rated_power = power_rating
                             if num_windings == 3:
-                                power_ratings = []
-                                try:
-                                    if config["powerA_rating"].find(
-                                            'kVA') != -1:
-                                        config[
-                                            "powerA_rating"] = remove_nonnum.sub(
-                                                '', config["powerA_rating"])
-                                        power_ratings.append(
-                                            float(config["powerA_rating"]) *
-                                            1000)
-                                    else:
-                                        power_ratings.append(
-                                            float(config["powerA_rating"]) *
-                                            1000)
-                                except AttributeError:
-                                    pass
-                                try:
-                                    if config["powerB_rating"].find(
-                                            'kVA') != -1:
-                                        config[
-                                            "powerB_rating"] = remove_nonnum.sub(
-                                                '', config["powerB_rating"])
-                                        power_ratings.append(
-                                            float(config["powerB_rating"]) *
-                                            1000)
-                                    else:
-                                        power_ratings.append(
-                                            float(config["powerB_rating"]) *
-                                            1000)
-                                except AttributeError:
-                                    pass
-                                try:
-                                    if config["powerC_rating"].find(
-                                            'kVA') != -1:
-                                        config[
-                                            "powerC_rating"] = remove_nonnum.sub(
-                                                '', config["powerC_rating"])
-                                        power_ratings.append(
-                                            float(config["powerC_rating"]) *
-                                            1000)
-                                    else:
-                                        power_ratings.append(
-                                            float(config["powerC_rating"]) *
-                                            1000)
-                                except AttributeError:
-                                    pass
-                                api_transformer.power_ratings = power_ratings
-
-                            power_rating_found = False
+                                winding2.rated_power = power_rating / 2.0
+                                winding3.rated_power = power_rating / 2.0
+                            else:
+                                winding2.rated_power = power_rating
+                                
+                            power_rating_found = True
+                        except AttributeError:
+                            pass
+
+                        if not power_rating_found:
+                            #Todo: why do we add up all the powers for A, B, and C?
                             try:
-                                if config["power_rating"].find('kVA') != -1:
-                                    config["power_rating"] = remove_nonnum.sub(
-                                        '', config["power_rating"])
+                                if config["powerA_rating"].find('kVA') != -1:
+                                    config["powerA_rating"] = remove_nonnum.sub(
+                                        '', config["powerA_rating"])
                                     power_rating = float(
-                                        config["power_rating"]) * 1e3
+                                        config["powerA_rating"]) * 1000
                                 else:
-                                    config["power_rating"] = remove_nonnum.sub(
-                                        '', config["power_rating"])
                                     power_rating = float(
-                                        config["power_rating"]) * 1e3
+                                        config["powerA_rating"]) * 1000
                                 winding1.rated_power = power_rating
                                 if num_windings == 3:
                                     winding2.rated_power = power_rating / 2.0
                                     winding3.rated_power = power_rating / 2.0
                                 else:
                                     winding2.rated_power = power_rating
-                                
-                                power_rating_found = True
                             except AttributeError:
                                 pass
 
-                            if not power_rating_found:
-                                #Todo: why do we add up all the powers for A, B, and C?
-                                try:
-                                    if config["powerA_rating"].find('kVA') != -1:
-                                        config["powerA_rating"] = remove_nonnum.sub(
-                                            '', config["powerA_rating"])
-                                        power_rating = float(
-                                            config["powerA_rating"]) * 1000
-                                    else:
-                                        power_rating = float(
-                                            config["powerA_rating"]) * 1000
-                                    winding1.rated_power = power_rating
-                                    if num_windings == 3:
-                                        winding2.rated_power = power_rating / 2.0
-                                        winding3.rated_power = power_rating / 2.0
-                                    else:
-                                        winding2.rated_power = power_rating
-                                except AttributeError:
-                                    pass
-
-                                try:
-                                    if config["powerB_rating"].find('kVA') != -1:
-                                        config["powerB_rating"] = remove_nonnum.sub(
-                                            '', config["powerB_rating"])
-                                        power_rating += float(
-                                            config["powerB_rating"]) * 1000
-                                    else:
-                                        power_rating += float(
-                                            config["powerB_rating"]) * 1000
-                                    winding1.rated_power = power_rating
-                                    if num_windings == 3:
-                                        winding2.rated_power = power_rating / 2.0
-                                        winding3.rated_power = power_rating / 2.0
-                                    else:
-                                        winding2.rated_power = power_rating
-                                except AttributeError:
-                                    pass
-                                try:
-                                    if config["powerC_rating"].find('kVA') != -1:
-                                        config["powerC_rating"] = remove_nonnum.sub(
-                                            '', config["powerC_rating"])
-                                        power_rating += float(
-                                            config["powerC_rating"]) * 1000
-                                    else:
-                                        power_rating += float(
-                                            config["powerC_rating"]) * 1000
-                                    winding1.rated_power = power_rating
-                                    if num_windings == 3:
-                                        winding2.rated_power = power_rating / 2.0
-                                        winding3.rated_power = power_rating / 2.0
-                                    else:
-                                        winding2.rated_power = power_rating
-                                except AttributeError:
-                                    pass
+                            try:
+                                if config["powerB_rating"].find('kVA') != -1:
+                                    config["powerB_rating"] = remove_nonnum.sub(
+                                        '', config["powerB_rating"])
+                                    power_rating += float(
+                                        config["powerB_rating"]) * 1000
+                                else:
+                                    power_rating += float(
+                                        config["powerB_rating"]) * 1000
+                                winding1.rated_power = power_rating
+                                if num_windings == 3:
+                                    winding2.rated_power = power_rating / 2.0
+                                    winding3.rated_power = power_rating / 2.0
+                                else:
+                                    winding2.rated_power = power_rating
+                            except AttributeError:
+                                pass
+                            try:
+                                if config["powerC_rating"].find('kVA') != -1:
+                                    config["powerC_rating"] = remove_nonnum.sub(
+                                        '', config["powerC_rating"])
+                                    power_rating += float(
+                                        config["powerC_rating"]) * 1000
+                                else:
+                                    power_rating += float(
+                                        config["powerC_rating"]) * 1000
+                                winding1.rated_power = power_rating
+                                if num_windings == 3:
+                                    winding2.rated_power = power_rating / 2.0
+                                    winding3.rated_power = power_rating / 2.0
+                                else:
+                                    winding2.rated_power = power_rating
+                            except AttributeError:
+                                pass
 
                 except AttributeError:
                     pass
@@ -1396,188 +1344,188 @@ class Reader(AbstractReader):
 
                 try:
                     config_name1 = obj["configuration"]
-                    for config_name, config in self.all_gld_objects.items():
-                        if config_name == config_name1:# or config._configuration == config_name1:
-
-                            for tap_phase in ["A", "B", "C"]:
-                                try:
-                                    tap = config["tap_pos_%s" % tap_phase]
-                                    if (
-                                        winding2.phase_windings is None
-                                    ):  # i.e. no phases were listed even though they are there. Should only need to check winding2 (not both windings) since the phases are populated at the same time.
-                                        winding1.phase_windings = []
-                                        winding2.phase_windings = []
-
-                                    index = None
-                                    for i in range(len(winding2.phase_windings)):
-                                        if (
-                                            winding2.phase_windings[i].phase
-                                            == tap_phase
-                                        ):
-                                            index = i
-                                            break
-                                    if index is None:
-                                        pw1 = PhaseWinding(model)
-                                        pw1.phase = tap_phase
-                                        winding1.phase_windings.append(pw1)
-                                        pw2 = PhaseWinding(model)
-                                        pw2.phase = tap_phase
-                                        winding2.phase_windings.append(pw2)
-                                        index = len(winding2.phase_windings) - 1
-
-                                    winding2.phase_windings[index].tap_position = int(
-                                        tap
-                                    )
-
-                                except AttributeError:
-                                    pass
-
-                            for r_comp_phase in ["A", "B", "C"]:
-                                try:
-                                    r_comp = config[
-                                        "compensator_r_setting_%s" % r_comp_phase
-                                    ]
-                                    if (
-                                        winding2.phase_windings is None
-                                    ):  # i.e. no phases were listed even though they are there. Should only need to check winding2 (not both windings) since the phases are populated at the same time.
-                                        winding1.phase_windings = []
-                                        winding2.phase_windings = []
-
-                                    index = None
-                                    for i in range(len(winding2.phase_windings)):
-                                        if (
-                                            winding2.phase_windings[i].phase
-                                            == r_comp_phase
-                                        ):
-                                            index = i
-                                            break
-                                    if index is None:
-                                        pw1 = PhaseWinding(model)
-                                        pw1.phase = r_comp_phase
-                                        winding1.phase_windings.append(pw1)
-                                        pw2 = PhaseWinding(model)
-                                        pw2.phase = r_comp_phase
-                                        winding2.phase_windings.append(
-                                            pw2
-                                        )  # Add the phase in for winding 1 as well
-                                        index = len(winding2.phase_windings) - 1
-
-                                    winding2.phase_windings[
-                                        index
-                                    ].compensator_r = float(r_comp)
-
-                                except AttributeError:
-                                    pass
-
-                            for x_comp_phase in ["A", "B", "C"]:
-                                try:
-                                    x_comp = config[
-                                        "compensator_x_setting_%s" % x_comp_phase
-                                    ]
-                                    if (
-                                        winding2.phase_windings is None
-                                    ):  # i.e. no phases were listed even though they are there. Should only need to check winding2 (not both windings) since the phases are populated at the same time.
-                                        winding1.phase_windings = []
-                                        winding2.phase_windings = []
-
-                                    index = None
-                                    for i in range(len(winding2.phase_windings)):
-                                        if (
-                                            winding2.phase_windings[i].phase
-                                            == x_comp_phase
-                                        ):
-                                            index = i
-                                            break
-                                    if index is None:
-                                        pw1 = PhaseWinding(model)
-                                        pw1.phase = x_comp_phase
-                                        winding1.phase_windings.append(pw1)
-                                        pw2 = PhaseWinding(model)
-                                        pw2.phase = x_comp_phase
-                                        winding2.phase_windings.append(
-                                            pw2
-                                        )  # Add the phase in for winding 1 as well
-                                        index = len(winding2.phase_windings) - 1
-
-                                    winding2.phase_windings[
-                                        index
-                                    ].compensator_x = float(x_comp)
-
-                                except AttributeError:
-                                    pass
+                    config = self.all_gld_objects.get(config_name1)
+                    if config is not None:
 
+                        for tap_phase in ["A", "B", "C"]:
                             try:
-                                conn = str(config["connect_type"])
+                                tap = config["tap_pos_%s" % tap_phase]
+                                if (
+                                    winding2.phase_windings is None
+                                ):  # i.e. no phases were listed even though they are there. Should only need to check winding2 (not both windings) since the phases are populated at the same time.
+                                    winding1.phase_windings = []
+                                    winding2.phase_windings = []
 
-                                if not (conn == "1" or conn == "WYE_WYE"):
-                                    raise Exception
-                                
-                                # Version of GLD this is based on only has Wye-Wye regulators
-                                # So we always set this to be Y
-                                winding1.connection_type = "Y"
-                                winding2.connection_type = "Y"
+                                index = None
+                                for i in range(len(winding2.phase_windings)):
+                                    if (
+                                        winding2.phase_windings[i].phase
+                                        == tap_phase
+                                    ):
+                                        index = i
+                                        break
+                                if index is None:
+                                    pw1 = PhaseWinding(model)
+                                    pw1.phase = tap_phase
+                                    winding1.phase_windings.append(pw1)
+                                    pw2 = PhaseWinding(model)
+                                    pw2.phase = tap_phase
+                                    winding2.phase_windings.append(pw2)
+                                    index = len(winding2.phase_windings) - 1
+
+                                winding2.phase_windings[index].tap_position = int(
+                                    tap
+                                )
 
                             except AttributeError:
                                 pass
 
+                        for r_comp_phase in ["A", "B", "C"]:
                             try:
-                                api_regulator.type = config["Type"]
-                            except AttributeError:
-                                pass
+                                r_comp = config[
+                                    "compensator_r_setting_%s" % r_comp_phase
+                                ]
+                                if (
+                                    winding2.phase_windings is None
+                                ):  # i.e. no phases were listed even though they are there. Should only need to check winding2 (not both windings) since the phases are populated at the same time.
+                                    winding1.phase_windings = []
+                                    winding2.phase_windings = []
 
-                            try:
-                                api_regulator.delay = float(config["time_delay"])
-                            except AttributeError:
-                                pass
+                                index = None
+                                for i in range(len(winding2.phase_windings)):
+                                    if (
+                                        winding2.phase_windings[i].phase
+                                        == r_comp_phase
+                                    ):
+                                        index = i
+                                        break
+                                if index is None:
+                                    pw1 = PhaseWinding(model)
+                                    pw1.phase = r_comp_phase
+                                    winding1.phase_windings.append(pw1)
+                                    pw2 = PhaseWinding(model)
+                                    pw2.phase = r_comp_phase
+                                    winding2.phase_windings.append(
+                                        pw2
+                                    )  # Add the phase in for winding 1 as well
+                                    index = len(winding2.phase_windings) - 1
+
+                                winding2.phase_windings[
+                                    index
+                                ].compensator_r = float(r_comp)
 
-                            try:
-                                api_regulator.bandwidth = float(config["band_width"])
                             except AttributeError:
                                 pass
 
+                        for x_comp_phase in ["A", "B", "C"]:
                             try:
-                                api_regulator.bandcenter = float(config["band_center"])
-                            except AttributeError:
-                                pass
+                                x_comp = config[
+                                    "compensator_x_setting_%s" % x_comp_phase
+                                ]
+                                if (
+                                    winding2.phase_windings is None
+                                ):  # i.e. no phases were listed even though they are there. Should only need to check winding2 (not both windings) since the phases are populated at the same time.
+                                    winding1.phase_windings = []
+                                    winding2.phase_windings = []
 
-                            try:
-                                api_regulator.highstep = int(config["raise_taps"])
-                            except AttributeError:
-                                pass
+                                index = None
+                                for i in range(len(winding2.phase_windings)):
+                                    if (
+                                        winding2.phase_windings[i].phase
+                                        == x_comp_phase
+                                    ):
+                                        index = i
+                                        break
+                                if index is None:
+                                    pw1 = PhaseWinding(model)
+                                    pw1.phase = x_comp_phase
+                                    winding1.phase_windings.append(pw1)
+                                    pw2 = PhaseWinding(model)
+                                    pw2.phase = x_comp_phase
+                                    winding2.phase_windings.append(
+                                        pw2
+                                    )  # Add the phase in for winding 1 as well
+                                    index = len(winding2.phase_windings) - 1
+
+                                winding2.phase_windings[
+                                    index
+                                ].compensator_x = float(x_comp)
 
-                            try:
-                                api_regulator.lowstep = int(config["lower_taps"])
                             except AttributeError:
                                 pass
 
-                            try:
-                                api_regulator.pt_ratio = float(
-                                    config["power_transducer_ratio"]
-                                )
-                            except AttributeError:
-                                pass
+                        try:
+                            conn = str(config["connect_type"])
 
-                            try:
-                                api_regulator.ct_ratio = float(
-                                    config["current_transducer_ratio"]
-                                )
-                            except AttributeError:
-                                pass
+                            if not (conn == "1" or conn == "WYE_WYE"):
+                                raise Exception
+                                
+                            # Version of GLD this is based on only has Wye-Wye regulators
+                            # So we always set this to be Y
+                            winding1.connection_type = "Y"
+                            winding2.connection_type = "Y"
 
-                            try:
-                                # wire_map = {'A':1,'B':2,'C':3} #Only take one phase (GLD seems to have 3 sometimes)
-                                api_regulator.pt_phase = config["PT_phase"].strip('"')[
-                                    0
-                                ]  # wire_map[config['PT_phase'].strip('"')[0]]
-                            except AttributeError:
-                                pass
+                        except AttributeError:
+                            pass
 
-                            try:
-                                api_regulator.regulation = float(
-                                    config["regulation"]
-                                )
-                            except AttributeError:
-                                pass
+                        try:
+                            api_regulator.type = config["Type"]
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.delay = float(config["time_delay"])
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.bandwidth = float(config["band_width"])
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.bandcenter = float(config["band_center"])
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.highstep = int(config["raise_taps"])
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.lowstep = int(config["lower_taps"])
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.pt_ratio = float(
+                                config["power_transducer_ratio"]
+                            )
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.ct_ratio = float(
+                                config["current_transducer_ratio"]
+                            )
+                        except AttributeError:
+                            pass
+
+                        try:
+                            # wire_map = {'A':1,'B':2,'C':3} #Only take one phase (GLD seems to have 3 sometimes)
+                            api_regulator.pt_phase = config["PT_phase"].strip('"')[
+                                0
+                            ]  # wire_map[config['PT_phase'].strip('"')[0]]
+                        except AttributeError:
+                            pass
+
+                        try:
+                            api_regulator.regulation = float(
+                                config["regulation"]
+                            )
+                        except AttributeError:
+                            pass
 
                 except AttributeError:
                     pass
@@ -21,9 +21,11 @@ from __future__ import absolute_import, division, print_function
 from builtins import super, range, zip, round, map
 
 import uuid
+import heapq
 import logging
 import types
 from functools import partial
+from itertools import count
 from .network.network import Network
 
 from .core import DiTToBase, DiTToTypeError
@@ -46,17 +48,36 @@ class Store(object):
     >>> M
     <ditto.Store(elements=0, models=0)>
 
+    With light_models, models added to the store skip traitlets notifications and
+    validation while they are built (for bulk loading large feeders). Call
+    validate_models once they are complete.
+
+    Models are indexed by their type as they are added (see: add_model), so typed
+    lookups (iter_models, find_model) don't scan the whole store.
+
     """
 
     __store_factory = dict
 
-    def __init__(self):
+    def __init__(self, light_models=False):
 
+        self.light_models = light_models
         self._cim_store = self.__store_factory()
         self._model_store = list()
         self._model_names = {}
         self._network = Network()
 
+        # Models of every (exact) type, in the order they were added.
+        self._models_by_type = {}
+        # Position of every model in the order they were added, to merge the typed lists.
+        self._model_order = {}
+        self._model_counter = count()
+        # Snapshot returned by models, rebuilt only after the store changes.
+        self._models_snapshot = None
+        # Names of every type, indexed up to the number of models of that type (see: find_model).
+        self._model_name_index = {}
+        self._model_name_indexed = {}
+
     def __repr__(self):
         return "<%s.%s(elements=%s, models=%s) object at %s>" % (
             self.__class__.__module__,
@@ -80,30 +101,79 @@ class Store(object):
         if not issubclass(type, DiTToBase):
             raise AttributeError("Unable to find {} in ditto.environment".format(type))
 
-        for e in self.elements:
+        for e in list(self.cim_store.values()):
             if isinstance(e, type):
                 yield e
 
     def iter_models(self, type=None):
 
-        if type == None:
-            type = object
-
-        for m in self.models:
-            if isinstance(m, type):
-                yield m
+        if type == None or type == object:
+            yield from self.models
+            return
+
+        # type may also be a tuple of types, like isinstance.
+        typed_models = [
+            tuple(models)
+            for klass, models in self._models_by_type.items()
+            if issubclass(klass, type)
+        ]
+
+        if len(typed_models) == 1:
+            yield from typed_models[0]
+        elif len(typed_models) > 1:
+            order = self._model_order
+            yield from heapq.merge(*typed_models, key=lambda m: order[id(m)])
+
+    def find_model(self, name, type):
+        """Returns the first model of exactly this type with the given name (or None).
+        Names are indexed lazily, on the first lookup after a model has been added.
+        Names that aren't found are looked up with a scan of that type."""
+        models = self._models_by_type.get(type, [])
+        index = self._model_name_index.setdefault(type, {})
+
+        indexed = self._model_name_indexed.get(type, 0)
+        for m in models[indexed:]:
+            index.setdefault(m.name, m)
+        self._model_name_indexed[type] = len(models)
+
+        m = index.get(name)
+        if m is None or m.name != name:
+            # Not indexed under this name (or renamed since), fall back to scanning this type.
+            index.pop(name, None)
+            m = next((x for x in models if x.name == name), None)
+            if m is not None:
+                index[name] = m
+
+        return m
 
     @property
     def elements(self):
-        return list(self.cim_store[k] for k in self.cim_store)
+        return list(self.cim_store.values())
 
     @property
     def models(self):
-        return tuple(m for m in self.model_store)
+        if self._models_snapshot is None:
+            self._models_snapshot = tuple(self._model_store)
+        return self._models_snapshot
+
+    def add_model(self, model):
+        self._model_store.append(model)
+        self._models_by_type.setdefault(model.__class__, []).append(model)
+        self._model_order[id(model)] = next(self._model_counter)
+        self._models_snapshot = None
 
     def remove_element(self, element):
         self._model_store.remove(element)
 
+        klass = element.__class__
+        self._models_by_type[klass].remove(element)
+        del self._model_order[id(element)]
+        self._models_snapshot = None
+
+        # Removing shifts the typed list, so that type gets indexed again.
+        self._model_name_index.pop(klass, None)
+        self._model_name_indexed.pop(klass, None)
+
     def add_element(self, element):
         if not isinstance(element, DiTToBase):
             raise DiTToTypeError(
@@ -113,6 +183,10 @@ class Store(object):
             element.link_model = self
             self.cim_store[element.UUID] = element
 
+    def validate_models(self):
+        for m in self.model_store:
+            m.validate_traits()
+
     def set_names(self):
         """ All objects with a name field included in a dictionary which maps the name to the object. Set in set_name() on the object itself if the object has a name. The dictionary is reset to empty first"""
         self._model_names = {}
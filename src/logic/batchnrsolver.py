@@ -0,0 +1,67 @@
+import numpy as np
+from logic.sparselusolver import SparseLUSolver
+from logic.stamping.matrixbuilder import MatrixBuilder
+from logic.network.networkmodel import NetworkModel
+from logic.powerflowsettings import PowerFlowSettings
+from logic.stamping.matrixstamper import MatrixStamper
+from colorama import init
+from termcolor import colored
+# use Colorama to make Termcolor work on Windows too
+init()
+
+#Newton-Raphson over a batch of independent scenarios of the same network (e.g. load factor sweeps
+#or Monte Carlo load studies). v is stacked as a (scenarios x size_Y) array and every kernel evaluates
+#all scenarios at once. Each scenario still has its own Y values, but they all share the sparsity
+#pattern, so the column ordering is only computed once.
+class BatchNRSolver:
+    def __init__(self, settings: PowerFlowSettings, network: NetworkModel):
+        self.settings = settings
+        self.network = network
+
+        self.lu_solver = SparseLUSolver(settings.matrix_ordering)
+
+    #Returns (per scenario success, v_final, iteration_num). All scenarios iterate until every one of them has converged.
+    def run_powerflow(self, matrix_stamper: MatrixStamper, v_init, tx_factor, max_iters = None):
+        if max_iters == None:
+            max_iters = self.settings.max_iters
+
+        batch_size = matrix_stamper.batch_size
+        if batch_size == None or np.shape(v_init) != (batch_size, self.network.size_Y):
+            raise Exception("Batched solves need a batched matrix stamper and one v_init row per scenario")
+
+        v_previous = np.copy(v_init)
+
+        Y = MatrixBuilder(self.settings, batch_size)
+        J_linear = np.zeros(np.shape(v_init))
+
+        matrix_stamper.reset_iterations()
+        matrix_stamper.stamp_linear(Y, J_linear, tx_factor)
+
+        linear_index = Y.get_usage()
+
+        for iteration_num in range(max_iters):
+            J = J_linear.copy()
+
+            matrix_stamper.stamp_nonlinear(Y, J, v_previous, iteration_num)
+
+            Y.assert_valid(check_zeros=True)
+
+            v_next = np.empty_like(v_previous)
+            for scenario_idx, Y_matrix in enumerate(Y.to_matrices()):
+                v_next[scenario_idx] = self.lu_solver.solve(Y_matrix, J[scenario_idx], self.network.matrix_version)
+
+            if np.isnan(v_next).any():
+                raise Exception("Error solving linear system")
+
+            residuals = matrix_stamper.calc_residuals(tx_factor, v_next, iteration_num)
+            max_residuals = np.array([x.max_residual for x in residuals])
+
+            print(colored(f"The maximum residual for iteration {iteration_num} is {max_residuals.max()} (scenario {int(max_residuals.argmax())})", 'green'))
+
+            if np.all(max_residuals < self.settings.tolerance):
+                return (max_residuals < self.settings.tolerance, v_next, iteration_num)
+
+            v_previous = v_next
+            Y.clear(retain_idx=linear_index)
+
+        return (max_residuals < self.settings.tolerance, v_next, iteration_num)
@@ -0,0 +1,68 @@
+import time
+from typing import List
+import numpy as np
+from logic.batchnrsolver import BatchNRSolver
+from logic.network.networkmodel import NetworkModel
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from logic.powerflowresults import PowerFlowResults
+from logic.stamping.matrixstamper import build_matrix_stamper
+
+#Solves many load scenarios of the same network in one batched Newton-Raphson pass (see: BatchNRSolver).
+#Scenarios only differ in load P/Q, there is no device control or homotopy for batched solves.
+class BatchPowerFlow(PowerFlow):
+    def __init__(self, network: NetworkModel, settings: PowerFlowSettings = PowerFlowSettings()) -> None:
+        super().__init__(network, settings)
+
+    #load_P and load_Q are (scenarios x loads) arrays, with loads ordered as in network.loads.
+    def execute(self, load_P, load_Q) -> List[PowerFlowResults]:
+        start_time = time.perf_counter_ns()
+
+        loads = self.network.loads
+        load_P = np.atleast_2d(load_P)
+        load_Q = np.atleast_2d(load_Q)
+        if load_P.shape != load_Q.shape or load_P.shape[1] != len(loads):
+            raise Exception("Expected one P and Q value per load for every scenario")
+
+        batch_size = load_P.shape[0]
+
+        self.validate_network()
+
+        self.network.assign_matrix()
+        v_init = self.network.generate_v_init(self.settings)
+
+        matrix_stamper = build_matrix_stamper(self.network, batch_size)
+
+        base_values = [(load.P, load.Q) for load in loads]
+        try:
+            for scenario_idx in range(batch_size):
+                for load_idx, load in enumerate(loads):
+                    load.P = load_P[scenario_idx, load_idx]
+                    load.Q = load_Q[scenario_idx, load_idx]
+                    if load.has_stale_stampers():
+                        raise Exception("Loads that are zero in the network can't be made non-zero by a scenario")
+                    matrix_stamper.set_element_scenario(load, scenario_idx)
+        finally:
+            self.__set_load_values(base_values)
+
+        print(f"Running batched powerflow ({batch_size} scenarios)...")
+        solver = BatchNRSolver(self.settings, self.network)
+        is_success, v_final, iteration_num = solver.run_powerflow(matrix_stamper, np.tile(v_init, (batch_size, 1)), 0)
+
+        residuals = matrix_stamper.calc_residuals(0, v_final, iteration_num)
+
+        results = []
+        try:
+            for scenario_idx in range(batch_size):
+                #Load results are read from the network, so each scenario's values are put in place first.
+                self.__set_load_values(zip(load_P[scenario_idx], load_Q[scenario_idx]))
+                results.append(self.build_results(start_time, bool(is_success[scenario_idx]), v_final[scenario_idx], iteration_num, 0, residuals[scenario_idx]))
+        finally:
+            self.__set_load_values(base_values)
+
+        return results
+
+    def __set_load_values(self, values):
+        for load, (P, Q) in zip(self.network.loads, values):
+            load.P = P
+            load.Q = Q
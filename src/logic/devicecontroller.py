@@ -16,34 +16,44 @@ class DeviceController:
 
         self.network = self.homotopy.nrsolver.network
 
-    def run_powerflow(self):
-        #In the future, we may regenerate this based on device changes.
-        self.network.assign_matrix()
+    #A v_init can be supplied to warm start from a previous solution of the same (already assigned) network.
+    def run_powerflow(self, v_init = None):
+        if v_init is None:
+            #In the future, we may regenerate this based on device changes.
+            self.network.assign_matrix()
 
-        v_init = self.network.generate_v_init(self.settings)
+            v_init = self.network.generate_v_init(self.settings)
 
         #Preliminary adjustments based on initial conditions
         if self.settings.device_control:
-            self.try_adjust_devices(v_init)
+            adjusted_devices = self.try_adjust_devices(v_init)
+            if len(adjusted_devices) > 0:
+                self.homotopy.update_devices(adjusted_devices)
 
         for _ in range(MAX_DEVICE_ITERATIONS):
             results = is_success, v_final, _, _, _ = self.homotopy.run_powerflow(v_init)
             if not is_success:
                 return results
-            if not self.settings.device_control or not self.try_adjust_devices(v_final):
+            if not self.settings.device_control:
                 return results
+
+            adjusted_devices = self.try_adjust_devices(v_final)
+            if len(adjusted_devices) == 0:
+                return results
+
+            self.homotopy.update_devices(adjusted_devices)
         
         raise Exception("Could not find solution where no device adjustments were required.")
 
     def try_adjust_devices(self, v):
-        adjustment_made = False
+        adjusted_devices = []
         if self.network.is_three_phase:
             for device in self.network.get_all_elements():
                 if isinstance(device, (Fuse, Capacitor, Regulator)):
                     if device.try_adjust_device(v):
-                        adjustment_made = True
+                        adjusted_devices.append(device)
         else:
             #No device control for transmission networks for now.
             pass
 
-        return adjustment_made
+        return adjusted_devices
@@ -4,41 +4,95 @@ from logic.nrsolver import NRSolver
 from logic.powerflowsettings import PowerFlowSettings
 from logic.stamping.matrixstamper import build_matrix_stamper
 
-TX_ITERATIONS = 100
-TX_SCALE = 1.0 / TX_ITERATIONS
+TX_INITIAL_STEP = 0.1
+TX_MIN_STEP = 1e-3
+TX_MAX_STEP = 0.5
 
-#Simplistic homotopy process, where we just linearly modify the homotopy factor
-#(referred to as the 'tx_factor') until we hit the original solution.
+#Steps that converge within this many iterations grow the next step, steps that take
+#at least the slow count shrink it.
+FAST_STEP_ITERATIONS = 4
+SLOW_STEP_ITERATIONS = 10
+
+#Intermediate steps only need to be solved well enough to continue from, a step that
+#takes longer than this is treated as a failure and retried with a smaller step.
+STEP_MAX_ITERATIONS = 20
+
+#Adaptive homotopy process: the homotopy factor (referred to as the 'tx_factor') is walked
+#from 1 down to 0, growing the step while Newton converges quickly and halving it (from the
+#last converged point) when it doesn't. Each step starts from a secant prediction through the
+#two previous solutions.
 class HomotopyController:
     def __init__(self, settings: PowerFlowSettings, network: NetworkModel, solver: NRSolver) -> None:
         self.network = network
         self.settings = settings
         self.nrsolver = solver
 
+        #Kept between calls, device adjustments only restamp the affected devices (see: update_devices).
+        self.matrix_stamper = None
+
     def run_powerflow(self, v_init):
-        matrix_stamper = build_matrix_stamper(self.network)
+        if self.matrix_stamper == None:
+            self.matrix_stamper = build_matrix_stamper(self.network)
+
+        matrix_stamper = self.matrix_stamper
 
         #optimistically try to solve without homotopy first.
         is_success, v_final, iteration_num = self.nrsolver.run_powerflow(matrix_stamper, v_init, 0)
         if is_success or not self.settings.tx_stepping:
             return (is_success, v_final, iteration_num, 0, matrix_stamper.calc_residuals(0, v_final, iteration_num))
 
-        tx_factor = TX_ITERATIONS
-        iterations = 0
-        v_next = v_init
-        is_success = False
+        return self.run_continuation(matrix_stamper, v_init)
+
+    def update_devices(self, devices):
+        if self.matrix_stamper == None:
+            return
+
+        for device in devices:
+            if not self.matrix_stamper.try_update_element(device):
+                #Structural change (e.g. a different set of stamps), so start over.
+                self.matrix_stamper = None
+                return
+
+    def run_continuation(self, matrix_stamper, v_init):
+        tx_factor = 1.0
+        is_success, v_current, iteration_num = self.nrsolver.run_powerflow(matrix_stamper, v_init, tx_factor)
+        iterations = iteration_num + 1
 
-        while tx_factor >= 0:
-            if tx_factor % 10 == 0:
-                print(f'Tx factor: {tx_factor}')
+        if not is_success:
+            return (False, v_current, iterations, tx_factor, matrix_stamper.calc_residuals(0, v_current, iteration_num))
 
-            is_success, v_final, iteration_num = self.nrsolver.run_powerflow(matrix_stamper, v_next, tx_factor * TX_SCALE)
-            iterations = iteration_num + 1
-            v_next = v_final
+        v_previous = None
+        tx_previous = None
+        step = TX_INITIAL_STEP
+
+        while tx_factor > 0:
+            tx_next = max(tx_factor - step, 0)
+
+            #The last step is the actual problem, so it gets the full iteration budget.
+            #Worked out on every pass, as a failed last step is retried as an intermediate one.
+            max_iters = self.settings.max_iters if tx_next == 0 else min(self.settings.max_iters, STEP_MAX_ITERATIONS)
+
+            v_predicted = v_current
+            if v_previous is not None:
+                v_predicted = v_current + (v_current - v_previous) * ((tx_next - tx_factor) / (tx_factor - tx_previous))
+
+            is_success, v_final, iteration_num = self.nrsolver.run_powerflow(matrix_stamper, v_predicted, tx_next, max_iters)
+            iterations += iteration_num + 1
 
             if not is_success:
-                break
+                step /= 2
+                if step < TX_MIN_STEP:
+                    return (False, v_final, iterations, tx_next, matrix_stamper.calc_residuals(0, v_final, iteration_num))
+                continue
+
+            print(f'Tx factor: {tx_next:.4g} (step: {step:.4g}, iterations: {iteration_num + 1})')
+
+            v_previous, tx_previous = v_current, tx_factor
+            v_current, tx_factor = v_final, tx_next
 
-            tx_factor -= 1
+            if iteration_num + 1 <= FAST_STEP_ITERATIONS:
+                step = min(step * 2, TX_MAX_STEP)
+            elif iteration_num + 1 >= SLOW_STEP_ITERATIONS:
+                step = max(step / 2, TX_MIN_STEP)
 
-        return (is_success, v_next, iterations, tx_factor * TX_SCALE, matrix_stamper.calc_residuals(0, v_final, iteration_num))
+        return (True, v_current, iterations, 0, matrix_stamper.calc_residuals(0, v_current, iteration_num))
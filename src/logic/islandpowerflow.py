@@ -0,0 +1,201 @@
+import copy
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+import numpy as np
+from logic.graphanalyzer import GraphAnalyzer
+from logic.network.networkmodel import NetworkModel
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from logic.powerflowresults import PowerFlowResults
+from logic.residualdetails import ResidualDetails
+from models.components.bus import Bus
+from models.components.capacitor import Capacitor
+from models.components.fuse import Fuse
+from models.components.regulator import Regulator
+
+#Element attributes holding the bus an element hangs off, for elements without any connections (e.g. open switches).
+BUS_ATTRIBUTES = ["bus", "from_bus", "from_node", "to_bus", "to_node"]
+
+#Solves a network made up of several islands (e.g. after outages, or microgrids running on their own slack).
+#Every island is split off into a network of its own, which is assigned and solved independently, in a process
+#pool when island_workers is set. Islands without a slack are de-energized and left at zero volts.
+#The island solutions are then mapped back onto the full network, so there is still one set of results.
+class IslandPowerFlow(PowerFlow):
+    def __init__(self, network: NetworkModel, settings: PowerFlowSettings = PowerFlowSettings(), graph_analyzer: GraphAnalyzer = None) -> None:
+        super().__init__(network, settings)
+
+        self.graph_analyzer = graph_analyzer
+
+    def execute(self) -> PowerFlowResults:
+        start_time = time.perf_counter_ns()
+
+        if self.network.optimization != None:
+            raise Exception("Islands can't be solved separately with optimization enabled")
+
+        islands = [island for island in split_islands(self.network, self.graph_analyzer) if len(island.slack) > 0]
+
+        workers = self.settings.island_workers
+        print(f"Running powerflow for {len(islands)} energized islands...")
+        if workers is not None and workers > 1 and len(islands) > 1:
+            island_results = self.__solve_parallel(islands, workers)
+        else:
+            island_results = [solve_island(island, self.settings) for island in islands]
+
+        #Solving the islands renumbered their elements, so the full network is assigned again.
+        self.network.assign_matrix()
+        element_positions = {id(element): position for position, element in enumerate(self.network.get_all_elements())}
+
+        v_final = np.zeros(self.network.size_Y)
+        residuals = np.zeros(self.network.size_Y)
+        is_success = True
+        iterations = 0
+        tx_percent = 0
+        for island, (island_success, island_iterations, island_tx_percent, island_v, island_residuals, index_blocks, device_states) in zip(islands, island_results):
+            global_blocks = [self.network.index_blocks[element_positions[id(element)]] for element in island.get_all_elements()]
+            global_indexes = get_block_indexes(global_blocks)
+            local_indexes = get_block_indexes(index_blocks)
+            if len(global_indexes) != len(local_indexes):
+                raise Exception("Island variables don't line up with the network")
+
+            v_final[global_indexes] = island_v[local_indexes]
+            residuals[global_indexes] = island_residuals[local_indexes]
+            set_device_states(island, device_states)
+
+            is_success = is_success and island_success
+            iterations = max(iterations, island_iterations)
+            tx_percent = max(tx_percent, island_tx_percent)
+
+        return self.build_results(start_time, is_success, v_final, iterations, tx_percent, ResidualDetails(residuals))
+
+    # Every worker unpickles the islands once, then solves the islands it's handed by index.
+    def __solve_parallel(self, islands: List[NetworkModel], workers):
+        island_bytes = pickle.dumps(islands)
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(islands)), initializer=_load_islands, initargs=(island_bytes,)) as executor:
+            futures = [executor.submit(_solve_loaded_island, island_idx, self.settings) for island_idx in range(len(islands))]
+            return [future.result() for future in futures]
+
+#Networks holding the elements of each island of the network, in their original order. The islands share their
+#element objects with the network, only the element lists (and maps) are separate.
+def split_islands(network: NetworkModel, graph_analyzer: GraphAnalyzer = None) -> List[NetworkModel]:
+    if graph_analyzer == None:
+        graph_analyzer = GraphAnalyzer(network)
+
+    node_islands = {}
+    island_count = 0
+    for island_idx, island_nodes in enumerate(graph_analyzer.get_islands()):
+        for node_name in island_nodes:
+            node_islands[node_name] = island_idx
+        island_count += 1
+
+    element_islands = get_element_islands(network, node_islands)
+
+    islands = []
+    for island_idx in range(island_count):
+        island = copy.copy(network)
+        for attribute, value in vars(network).items():
+            if isinstance(value, list):
+                setattr(island, attribute, [element for element in value if element_islands.get(id(element)) == island_idx])
+            elif isinstance(value, dict):
+                setattr(island, attribute, {key: element for key, element in value.items() if element_islands.get(id(element)) == island_idx})
+        islands.append(island)
+
+    return islands
+
+#Maps (the id of) every bus and element of the network to the index of its island.
+def get_element_islands(network: NetworkModel, node_islands):
+    element_islands = {}
+    for bus in network.buses:
+        if bus.NodeName in node_islands:
+            element_islands[id(bus)] = node_islands[bus.NodeName]
+
+    for element in network.get_all_elements():
+        if isinstance(element, Bus):
+            continue
+
+        island_idx = get_element_island(element, node_islands)
+        element_islands[id(element)] = island_idx
+
+        #Buses only the element knows about (e.g. the interior node of a fuse) go with it.
+        for bus in get_referenced_buses(element):
+            if id(bus) not in element_islands:
+                element_islands[id(bus)] = island_idx
+
+    for bus in network.buses:
+        if id(bus) not in element_islands:
+            raise Exception(f"Unable to place bus {bus.NodeName}:{bus.NodePhase} in an island")
+
+    return element_islands
+
+def get_element_island(element, node_islands):
+    candidates = [bus for connection in element.get_connections() for bus in connection]
+    candidates += [getattr(element, attribute) for attribute in BUS_ATTRIBUTES if isinstance(getattr(element, attribute, None), Bus)]
+
+    for bus in candidates:
+        if bus.NodeName in node_islands:
+            return node_islands[bus.NodeName]
+
+    raise Exception(f"Unable to place {type(element).__name__} in an island")
+
+#Buses an element refers to, directly or through its parts (e.g. the coils of a center tap transformer).
+def get_referenced_buses(element):
+    for value in vars(element).values():
+        if isinstance(value, Bus):
+            yield value
+        elif isinstance(value, list):
+            for part in value:
+                if hasattr(part, "__dict__"):
+                    yield from (part_value for part_value in vars(part).values() if isinstance(part_value, Bus))
+
+def get_block_indexes(index_blocks):
+    if len(index_blocks) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    return np.concatenate([np.arange(block_start, block_end, dtype=np.int64) for block_start, block_end in index_blocks])
+
+#Solves one island on its own. Only plain values are returned, so islands can be solved in other processes.
+def solve_island(network: NetworkModel, settings: PowerFlowSettings):
+    powerflow = PowerFlow(network, settings)
+    powerflow.validate_network()
+
+    is_success, v_final, iteration_num, tx_percent, residuals = powerflow.build_device_controller().run_powerflow()
+
+    return (is_success, iteration_num, tx_percent, v_final, residuals.residuals, network.index_blocks, get_device_states(network))
+
+#Devices may have been adjusted while solving (in another process), their final states are carried over.
+def get_device_states(network: NetworkModel):
+    device_states = []
+    for device in get_devices(network):
+        if isinstance(device, Capacitor):
+            device_states.append(device.switch)
+        elif isinstance(device, Regulator):
+            device_states.append(device.tap_position)
+        else:
+            device_states.append(device.status)
+
+    return device_states
+
+def set_device_states(network: NetworkModel, device_states):
+    for device, state in zip(get_devices(network), device_states):
+        if isinstance(device, Capacitor):
+            device.switch = state
+        elif isinstance(device, Regulator):
+            if device.tap_position != state:
+                device.try_increment_tap_position(state - device.tap_position)
+        else:
+            device.status = state
+
+def get_devices(network: NetworkModel):
+    return [device for device in network.get_all_elements() if isinstance(device, (Capacitor, Regulator, Fuse))]
+
+_worker_islands = None
+
+# Process pool initializer for IslandPowerFlow.__solve_parallel.
+def _load_islands(island_bytes):
+    global _worker_islands
+    _worker_islands = pickle.loads(island_bytes)
+
+def _solve_loaded_island(island_idx, settings: PowerFlowSettings):
+    return solve_island(_worker_islands[island_idx], settings)
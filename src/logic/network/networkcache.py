@@ -0,0 +1,101 @@
+import tempfile
+import os
+import hashlib
+import pickle
+from ditto.readers.gridlabd.glm_tokenizer import find_includes
+
+#Increment if changes have been made to bust the network cache.
+VERSION = 1
+
+MODELS_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+NETWORK_DIR = os.path.realpath(os.path.dirname(__file__))
+DITTO_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "ditto"))
+#All of ditto is hashed, the reader depends on its store, models and helpers throughout.
+SOURCE_DIRS = [
+    MODELS_DIR,
+    NETWORK_DIR,
+    DITTO_DIR
+]
+
+#Every setting the parsers read (see: ThreePhaseParser), a snapshot is only reused with the same values.
+PARSE_SETTINGS = [
+    "enable_line_capacitance",
+    "verify_line_admittances"
+]
+
+#Persists parsed networks as pickled snapshots, so later loads of an unchanged network file skip parsing
+#(and ditto) entirely. Snapshots are taken straight after parsing, before any node indexes are assigned.
+#The key covers the file contents (including any #include'd files), the settings used while parsing
+#and the source of the parsers and models, so any change there produces a fresh parse.
+class NetworkCache:
+    def __init__(self, cache_dir = None) -> None:
+        if cache_dir is None:
+            cache_dir = os.path.join(tempfile.gettempdir(), "combined-txds-networks")
+        self.cache_dir = cache_dir
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._source_hash = None
+
+    def get_cache_key(self, network_file, settings):
+        sha1 = hashlib.sha1()
+        parse_settings = ",".join(f"{name}={getattr(settings, name)}" for name in PARSE_SETTINGS)
+        sha1.update(f"{VERSION},{parse_settings},{self.__get_source_hash()}".encode('utf8'))
+
+        with open(network_file, "rb") as f:
+            contents = f.read()
+        sha1.update(contents)
+
+        #Resolved the same way the gridlabd reader expands them.
+        if network_file.endswith(".glm"):
+            for include_file in find_includes(network_file):
+                sha1.update(include_file.encode('utf8'))
+                if os.path.isfile(include_file):
+                    with open(include_file, "rb") as f:
+                        sha1.update(f.read())
+
+        return sha1.hexdigest()
+
+    def _get_cache_file(self, cache_key):
+        return os.path.join(self.cache_dir, f"network_{cache_key}.pickle")
+
+    def has_network(self, cache_key):
+        return os.path.isfile(self._get_cache_file(cache_key))
+
+    def try_load(self, cache_key):
+        if not self.has_network(cache_key):
+            raise Exception("No network snapshot exists.")
+
+        with open(self._get_cache_file(cache_key), "rb") as f:
+            return pickle.load(f)
+
+    def try_remove(self, cache_key):
+        try:
+            os.remove(self._get_cache_file(cache_key))
+        except OSError:
+            pass
+
+    def try_store(self, cache_key, network):
+        cache_file = self._get_cache_file(cache_key)
+
+        #Written to a temporary file first so concurrent processes never load a partial snapshot.
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as f:
+            pickle.dump(network, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file, cache_file)
+
+    def __get_source_hash(self):
+        if self._source_hash != None:
+            return self._source_hash
+
+        sha1 = hashlib.sha1()
+        for source_dir in SOURCE_DIRS:
+            for root, dirs, files in os.walk(source_dir):
+                dirs.sort()
+                for file in sorted(files):
+                    if file.endswith(".py"):
+                        with open(os.path.join(root, file), "rb") as f:
+                            sha1.update(f.read())
+
+        self._source_hash = sha1.hexdigest()
+        return self._source_hash
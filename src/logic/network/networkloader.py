@@ -1,4 +1,6 @@
 import os
+import pickle
+from logic.network.networkcache import NetworkCache
 from logic.network.networkmodel import NetworkModel, TxNetworkModel
 from logic.network.parsers.raw.parser import parse_raw
 from logic.powerflowsettings import PowerFlowSettings
@@ -35,13 +37,40 @@ def pull_network_file(network_uri: str):
 
 
 class NetworkLoader:
-    def __init__(self, settings: PowerFlowSettings):
+    _network_cache = NetworkCache()
+
+    #A network_cache can be supplied to keep snapshots somewhere other than the shared temp directory.
+    def __init__(self, settings: PowerFlowSettings, network_cache: NetworkCache = None):
         self.settings = settings
+        self.network_cache = network_cache if network_cache is not None else NetworkLoader._network_cache
         
     def from_file(self, network_uri: str) -> NetworkModel:
         print(f"Loading network file: {network_uri}")
         network_file = pull_network_file(network_uri)
 
+        if not self.settings.cache_network:
+            return self.__parse_network(network_file)
+
+        cache_key = self.network_cache.get_cache_key(network_file, self.settings)
+
+        if self.network_cache.has_network(cache_key):
+            try:
+                return self.network_cache.try_load(cache_key)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+                #A corrupt snapshot, or one referring to code that has since changed. It is parsed again below.
+                print(f"Discarding cached network snapshot: {e}")
+                self.network_cache.try_remove(cache_key)
+
+        network = self.__parse_network(network_file)
+
+        try:
+            self.network_cache.try_store(cache_key, network)
+        except OSError:
+            pass
+
+        return network
+
+    def __parse_network(self, network_file: str) -> NetworkModel:
         if ".glm" in network_file:
             network = self.__parse_glm_network(network_file)
         elif ".RAW" in network_file:
@@ -69,12 +69,19 @@ class NetworkModel():
         print(f"Loads: {len(loadset)} ({len(self.loads)} phase loads)")
 
     def assign_matrix(self):
-        node_index = count(0)
-
         optimization_enabled = self.optimization != None
 
+        #Every element draws a contiguous block of indexes. The blocks are kept (in the order of get_all_elements)
+        #so the solution of a sub-network can be mapped back onto this network (see: IslandPowerFlow).
+        self.index_blocks = []
+        next_index = 0
         for ele in self.get_all_elements():
-            ele.assign_nodes(node_index, optimization_enabled)
+            ele_index = count(next_index)
+            ele.assign_nodes(ele_index, optimization_enabled)
+            block_start, next_index = next_index, next(ele_index)
+            self.index_blocks.append((block_start, next_index))
+
+        node_index = count(next_index)
 
         if self.optimization != None:
             self.optimization.assign_nodes(node_index, optimization_enabled)
@@ -15,7 +15,7 @@ from models.components.slack import Slack
 
 from models.components.load import Load
 from models.components.bus import GROUND, Bus
-from models.components.unbalanced_line import UnbalancedLine
+from models.components.unbalanced_line import AdmittanceCache, UnbalancedLine
 from models.components.fuse import Fuse, FuseStatus
 from models.components.fuse import Fuse
 
@@ -37,11 +37,13 @@ class ThreePhaseParser:
     def parse(self):
         self._bus_index = count(0)
         
-        self.ditto_store = Store()
+        #Light models skip traitlets while the reader builds them, they are validated in one pass afterwards.
+        self.ditto_store = Store(light_models=True)
         gld_reader = Reader(input_file = self.input_file_path)
 
         # Parse the file and keep the grid_data_objects in the Store
         gld_reader.parse(self.ditto_store)
+        self.ditto_store.validate_models()
         self.all_gld_objects = gld_reader.all_gld_objects
 
         # Create a SimulationState object to populate and return
@@ -49,6 +51,14 @@ class ThreePhaseParser:
         transformerhandler = TransformerParser(self)
 
         self.create_buses(network_model)
+
+        #Line admittances are shared between lines with the same per-meter impedances, invert them all up front.
+        self.admittance_cache = AdmittanceCache(self.settings.verify_line_admittances)
+        impedance_lines = [model for model in self.ditto_store.iter_models(ditto.models.line.Line) if not model.is_fuse and not model.is_switch]
+        self.admittance_cache.prepare(
+            [model.impedance_matrix for model in impedance_lines], 
+            [self.get_line_phases(model) for model in impedance_lines]
+            )
         
         for model in self.ditto_store.models:
             if isinstance(model, ditto.models.powertransformer.PowerTransformer):
@@ -88,47 +98,45 @@ class ThreePhaseParser:
     # GridlabD buses default to being "PQ" constant power buses (aka loads)
     # They could also be "PV" voltage-controlled magnitude buses (aka generators)
     def create_buses(self, network_model: DxNetworkModel):
-        for model in self.ditto_store.models:
+        for model in self.ditto_store.iter_models((ditto.models.node.Node, ditto.models.power_source.PowerSource)):
+            isSlack = False
+            if isinstance(model, ditto.models.power_source.PowerSource) or (hasattr(model, "bustype") and model._bustype == "SWING"):
+                isSlack = True
+
+            for phase in model.phases:
+                if phase in self._phase_to_angle:
+                    if model.parent != None:
+                        #For now, just map any child nodes back to their parent.
+                        bus = network_model.bus_name_map[model.parent + "_" + phase]
+                        network_model.bus_name_map[model.name + "_" + phase] = bus
+                    elif model.connecting_element != None:
+                        bus = network_model.bus_name_map[model.connecting_element + "_" + phase]
+                    else:
+                        v_mag = model.nominal_voltage
+                        v_ang = self._phase_to_angle[phase]
+
+                        try:
+                            #For L1 and L2 on triplex, we always use the nominal magnitude and phase for v_init.
+                            if not phase in ["1", "2"]:
+                                voltage = getattr(model, "voltage_" + phase)
+                                v_mag = abs(voltage)
+                                v_ang = cmath.phase(voltage)
+                        except:
+                            pass
+
+                        bus = self.create_bus(network_model, v_mag, v_ang, model.name, phase, False)
+
+                        if phase == "1":
+                            bus.Vr_init = -60.0
+                            bus.Vi_init = 103.92
+                        elif phase == "2":
+                            bus.Vr_init = 60.0
+                            bus.Vi_init = -103.92
 
-            if isinstance(model, ditto.models.node.Node) or isinstance(model, ditto.models.power_source.PowerSource):
-                isSlack = False
-                if isinstance(model, ditto.models.power_source.PowerSource) or (hasattr(model, "bustype") and model._bustype == "SWING"):
-                    isSlack = True
-
-                for phase in model.phases:
-                    if phase in self._phase_to_angle:
-                        if model.parent != None:
-                            #For now, just map any child nodes back to their parent.
-                            bus = network_model.bus_name_map[model.parent + "_" + phase]
-                            network_model.bus_name_map[model.name + "_" + phase] = bus
-                        elif model.connecting_element != None:
-                            bus = network_model.bus_name_map[model.connecting_element + "_" + phase]
-                        else:
-                            v_mag = model.nominal_voltage
-                            v_ang = self._phase_to_angle[phase]
-
-                            try:
-                                #For L1 and L2 on triplex, we always use the nominal magnitude and phase for v_init.
-                                if not phase in ["1", "2"]:
-                                    voltage = getattr(model, "voltage_" + phase)
-                                    v_mag = abs(voltage)
-                                    v_ang = cmath.phase(voltage)
-                            except:
-                                pass
-
-                            bus = self.create_bus(network_model, v_mag, v_ang, model.name, phase, False)
-
-                            if phase == "1":
-                                bus.Vr_init = -60.0
-                                bus.Vi_init = 103.92
-                            elif phase == "2":
-                                bus.Vr_init = 60.0
-                                bus.Vi_init = -103.92
-
-                        if isSlack:
-                            # Create this phase of the slack bus
-                            slack = Slack(bus, v_mag, v_ang, 0, 0)
-                            network_model.slack.append(slack)
+                    if isSlack:
+                        # Create this phase of the slack bus
+                        slack = Slack(bus, v_mag, v_ang, 0, 0)
+                        network_model.slack.append(slack)
 
     def create_bus(self, network_model, v_mag, v_ang, node_name, node_phase, is_virtual):
         bus_id = next(self._bus_index)
@@ -318,9 +326,12 @@ class ThreePhaseParser:
             else:
                 shunt_admittances = None
 
-            phases = [wire.phase for wire in model.wires if wire.phase != 'N']
+            phases = self.get_line_phases(model)
             ampacities = [wire.emergency_ampacity for wire in model.wires if hasattr(wire, "emergency_ampacity")] #  or wire.ampacity ; if hasattr(wire, "ampacity")
             
-            transmission_line = UnbalancedLine(network_model, impedances, shunt_admittances, model.from_element, model.to_element, model.length, phases, ampacities)
+            transmission_line = UnbalancedLine(network_model, impedances, shunt_admittances, model.from_element, model.to_element, model.length, phases, ampacities, self.admittance_cache)
             network_model.lines.append(transmission_line)
 
+    def get_line_phases(self, model: ditto.models.line.Line):
+        return [wire.phase for wire in model.wires if wire.phase != 'N']
+
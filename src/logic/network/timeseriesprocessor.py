@@ -1,17 +1,23 @@
+import copy
 import math
 import os
+import pickle
 import typing
-from logic.graphanalyzer import GraphAnalyzer
+from concurrent.futures import ProcessPoolExecutor
+from logic.islandpowerflow import split_islands
 from logic.network.networkmodel import DxNetworkModel
-from pandas import DataFrame, read_csv
-import networkx as nx
+import numpy as np
 
 from logic.network.timeseriessettings import TimeSeriesSettings
+from logic.network.timeserieswriter import TimeSeriesWriter
 from logic.powerflow import PowerFlow
+from logic.snapshotpowerflow import SnapshotPowerFlow
 from logic.powerflowresults import CenterTapTransformerResult, LineResult, PowerFlowResults, QuasiTimeSeriesResults, TransformerResult
+from logic.residualdetails import ResidualDetails
+from models.components.capacitor import Capacitor
 from models.components.center_tap_transformer import CenterTapTransformer
-from models.components.switch import Switch
-from models.components.transformer import Transformer
+from models.components.fuse import Fuse
+from models.components.regulator import Regulator
 
 VOLTAGE_DEVIATION_THRESHOLD = 0.05
 
@@ -21,106 +27,25 @@ class TimeSeriesProcessor:
         self.settings = settings
         self.powerflow = powerflow
         if self.settings.loadfile_name is not None:
+            #Pandas is only needed for time series, so it isn't imported for regular solves.
+            from pandas import read_csv
             self.load_data = read_csv(self.settings.loadfile_name)
         if self.settings.select_island and self.settings.artificialswingbus is not None:
             self.select_island()
+
+        #Set up once the topology is final, all snapshots then share the same solver state.
+        self.snapshot_powerflow = SnapshotPowerFlow(self.powerflow.network, self.powerflow.settings)
     
     def select_island(self):
-        ga = GraphAnalyzer(self.powerflow.network)
-        if ga.get_island_count() == 0:
-            pass
-        desired_island = nx.node_connected_component(ga.G, self.settings.artificialswingbus)
-        for island in ga.get_islands():
-            if island == desired_island:
-                # self.powerflow.network.buses = []
-                # for node in island:
-                #     for bus in ga.G.nodes[node]['bus_list']:
-                #         self.powerflow.network.buses.append(bus)
-                continue
-            for node in island:
-                node_edges = ga.G.edges(node)
-                for edge_from, edge_to in node_edges:
-                    edge = ga.G.edges[edge_from, edge_to]
-                    for element in edge["element_list"]:
-                        if type(element) == CenterTapTransformer or type(element) == Transformer:
-                            try:
-                                self.powerflow.network.transformers.remove(element)
-                            except:
-                                pass
-                            if type(element) == CenterTapTransformer:    
-                                try:
-                                    self.powerflow.network.buses.remove(element.coils[0].primary_node)
-                                except:
-                                    pass
-                                try:
-                                    self.powerflow.network.buses.remove(element.coils[1].sending_node)
-                                except:
-                                    pass
-                                try:
-                                    self.powerflow.network.buses.remove(element.coils[2].sending_node)
-                                except:
-                                    pass
-                        elif type(element) == Switch:
-                            try:
-                                self.powerflow.network.switches.remove(element)
-                            except:
-                                pass
-                        else:
-                            try:
-                                self.powerflow.network.lines.remove(element)
-                            except:
-                                pass
-                for bus in ga.G.nodes[node]['bus_list']:
-                    self.powerflow.network.buses.remove(bus)
-        slack_to_remove = []
-        for idx, slack in enumerate(self.powerflow.network.slack):
-            if slack.bus not in self.powerflow.network.buses:
-                slack_to_remove.insert(0, idx)
-        for idx in slack_to_remove:
-            del self.powerflow.network.slack[idx]
-        
-        generator_to_remove = []
-        for idx, generator in enumerate(self.powerflow.network.generators):
-            if generator.bus not in self.powerflow.network.buses:
-                generator_to_remove.insert(0, idx)
-        for idx in generator_to_remove:
-            del self.powerflow.network.generators[idx]
-
-        load_to_remove = []
-        for idx, load in enumerate(self.powerflow.network.loads):
-            if load.from_bus not in self.powerflow.network.buses or load.to_bus not in self.powerflow.network.buses:
-                load_to_remove.insert(0, idx)
-        for idx in load_to_remove:
-            del self.powerflow.network.loads[idx]
-
-        fuse_to_remove = []
-        for idx, fuse in enumerate(self.powerflow.network.fuses):
-            if fuse.from_node not in self.powerflow.network.buses or fuse.to_node not in self.powerflow.network.buses:
-                try:
-                    self.powerflow.network.buses.remove(fuse.interior_node)
-                except:
-                    pass
-                fuse_to_remove.insert(0, idx)
-        for idx in fuse_to_remove:
-            del self.powerflow.network.fuses[idx]
-
-        regulator_to_remove = []
-        for idx, regulator in enumerate(self.powerflow.network.regulators):
-            if regulator.from_node not in self.powerflow.network.buses or regulator.to_node not in self.powerflow.network.buses:
-                try:
-                    self.powerflow.network.buses.remove(regulator.current_node)
-                except:
-                    pass
-                regulator_to_remove.insert(0, idx)
-        for idx in regulator_to_remove:
-            del self.powerflow.network.regulators[idx]
-
-        capacitor_to_remove = []
-        for idx, capacitor in enumerate(self.powerflow.network.capacitors):
-            if capacitor.from_bus not in self.powerflow.network.buses or capacitor.to_bus not in self.powerflow.network.buses:
-                capacitor_to_remove.insert(0, idx)
-        for idx in capacitor_to_remove:
-            del self.powerflow.network.capacitors[idx]
+        network = self.powerflow.network
+        swing_islands = [island for island in split_islands(network) if any(bus.NodeName == self.settings.artificialswingbus for bus in island.buses)]
+        if len(swing_islands) == 0:
+            raise Exception(f"Artificial swing bus {self.settings.artificialswingbus} is not part of the network")
+
+        #Our network object is kept (the powerflow and the lines refer to it), only its element lists are narrowed down.
+        for attribute, value in vars(swing_islands[0]).items():
+            if isinstance(value, (list, dict)):
+                setattr(network, attribute, value)
 
     def set_load_names(self):
         for phase_load in self.powerflow.network.loads:
@@ -136,12 +61,14 @@ class TimeSeriesProcessor:
             load_name = f"{phase_load.load_num}_{phase_load.phase}"
         return load_name
     
+    #Returns the loads whose values were changed.
     def set_load_values(self, hour: int=0):
         if not (self.powerflow.network.is_three_phase):
             raise Exception("Initializing load files from separate file currently supported for three-phase networks")
         if self.load_data is None:
             raise Exception("NetworkPostProcessor needs a valid load file upon initialization")
 
+        updated_loads = []
         for load_name in self.load_data.columns:
             try:
                 load_obj = self.powerflow.network.load_name_map[load_name]
@@ -154,25 +81,31 @@ class TimeSeriesProcessor:
             angle = math.atan2(load_obj.Q,load_obj.P)
             load_obj.P = magnitude * math.cos(angle)
             load_obj.Q = magnitude * math.sin(angle)
+            updated_loads.append(load_obj)
+
+        return updated_loads
     
     # Automatically determine the level of generation needed at the microgrid
+    # Returns the loads that were adjusted, none once the adjustment is complete
     def adjust_generator_output(self, snapshot_results: PowerFlowResults):
         if self.settings.artificialswingbus is None or self.settings.negativeloads is None:
-            return False
+            return []
         
         swingbusoutputs = [(gen_result.generator.bus.NodePhase, gen_result.P, gen_result.Q) for gen_result in snapshot_results.generator_results if gen_result.generator.bus.NodeName == self.settings.artificialswingbus]
         if sum(abs(complex(p, q)) for phase,p,q in swingbusoutputs) < self.THRESHOLD:
             # The artificial swing bus is emitting and absorbing essentially zero power, so the adjustment is complete
-            return False
+            return []
         
         # Adjust the negative load to lower its output by the appropriate amount (akin to it generating that same amount of power)
         negativeload_nums = [negativeload.split("_")[-1] for negativeload in self.settings.negativeloads]
         negativeload_objs = {(load.phase if load.triplex_phase is None else load.triplex_phase):load for load in self.powerflow.network.loads if load.load_num in negativeload_nums}
+        adjusted_loads = []
         for phase, p, q in swingbusoutputs:
             phase_load = negativeload_objs[phase]
             phase_load.P += p
             phase_load.Q += q
-        return True
+            adjusted_loads.append(phase_load)
+        return adjusted_loads
 
     # Determine whether the current or power flowing through any piece of equipment exceeds its rated capacity
     def violates_equipment_ratings(self, snapshot_results: PowerFlowResults) -> bool:
@@ -198,36 +131,130 @@ class TimeSeriesProcessor:
                 exceeds_rating = True
 
         # Ensure that no nodes have voltages that are outside acceptable bounds
-        for bus_result in snapshot_results.bus_results:
-            if (abs(bus_result.V_mag - bus_result.bus.V_Nominal) / bus_result.bus.V_Nominal >= VOLTAGE_DEVIATION_THRESHOLD):
-                print(f"Bus voltage magnitude {bus_result.V_mag} is outside acceptable range of expected voltage magnitude {bus_result.bus.V_Nominal}")
-                exceeds_rating = True
+        V_nominal = np.array([bus.V_Nominal for bus in snapshot_results.buses], dtype=np.float64)
+        V_deviation = np.abs(snapshot_results.bus_V_mag - V_nominal) / V_nominal
+        for idx in np.flatnonzero(V_deviation >= VOLTAGE_DEVIATION_THRESHOLD):
+            print(f"Bus voltage magnitude {snapshot_results.bus_V_mag[idx]} is outside acceptable range of expected voltage magnitude {snapshot_results.buses[idx].V_Nominal}")
+            exceeds_rating = True
         
         return exceeds_rating
 
+    def get_device_states(self):
+        network = self.powerflow.network
+        return [(capacitor, capacitor.switch) for capacitor in network.capacitors] + \
+            [(regulator, regulator.tap_position) for regulator in network.regulators] + \
+            [(fuse, fuse.status) for fuse in network.fuses]
+
+    # Returns the devices that had to be changed to get back to the given states
+    def restore_device_states(self, device_states):
+        restored_devices = []
+        for device, state in device_states:
+            if isinstance(device, Capacitor) and device.switch != state:
+                device.switch = state
+                restored_devices.append(device)
+            elif isinstance(device, Regulator) and device.tap_position != state:
+                device.try_increment_tap_position(state - device.tap_position)
+                restored_devices.append(device)
+            elif isinstance(device, Fuse) and device.status != state:
+                device.status = state
+                restored_devices.append(device)
+        return restored_devices
+
+    # Solve the given hours one after another, each snapshot warm starting from the previous one
+    # Snapshots are yielded as they are solved, so they don't all have to be held in memory
+    def execute_hours(self, hours) -> typing.Iterator[typing.Tuple[int, PowerFlowResults]]:
+        self.set_load_names()
+        initial_device_states = self.get_device_states()
+
+        for hour in hours:
+            updated_elements = []
+            if not self.settings.carry_device_state:
+                updated_elements += self.restore_device_states(initial_device_states)
+            updated_elements += self.set_load_values(hour)
+            yield (hour, self.execute_powerflow(updated_elements))
+
     # Run for multiple snapshots of load values
     def execute_quasi_time_series(self) -> QuasiTimeSeriesResults:
         if not os.path.isfile(self.settings.loadfile_name):
             raise Exception("Load file does not exist.")
         
-        quasi_time_series_results = QuasiTimeSeriesResults()
-        self.set_load_names()
-        for hour in range(self.settings.loadfile_start, self.settings.loadfile_end):
-            self.set_load_values(hour)
-            snapshot_results = self.execute_powerflow()
-            quasi_time_series_results.add_powerflow_snapshot_results(hour, snapshot_results)
+        hours = range(self.settings.loadfile_start, self.settings.loadfile_end)
+        if self.settings.workers is not None and self.settings.workers > 1 and len(hours) > 1:
+            return self.execute_quasi_time_series_parallel(hours)
+
+        quasi_time_series_results = self.create_quasi_time_series_results()
+        try:
+            for hour, snapshot_results in self.execute_hours(hours):
+                self.add_snapshot_results(quasi_time_series_results, hour, snapshot_results)
+        finally:
+            quasi_time_series_results.close()
+
+        return quasi_time_series_results
+
+    def create_quasi_time_series_results(self) -> QuasiTimeSeriesResults:
+        if self.settings.outputfile is not None and self.settings.outputformat == "npz":
+            return QuasiTimeSeriesResults(TimeSeriesWriter(self.settings.outputfile, self.powerflow.network))
+        
+        return QuasiTimeSeriesResults()
+
+    def add_snapshot_results(self, quasi_time_series_results: QuasiTimeSeriesResults, hour, snapshot_results: PowerFlowResults):
+        quasi_time_series_results.add_powerflow_snapshot_results(hour, snapshot_results)
+
+        if self.settings.outputfile is not None and self.settings.outputformat == "csv":
+            snapshot_results.output(f"{self.settings.outputfile}_{hour}")
+
+    # Split the hours into contiguous chunks which are solved in a process pool. Each worker gets its own
+    # copy of the (unsolved) network, so device states only carry over within a chunk.
+    def execute_quasi_time_series_parallel(self, hours) -> QuasiTimeSeriesResults:
+        chunk_count = min(self.settings.workers, len(hours))
+        chunk_size = math.ceil(len(hours) / chunk_count)
+        chunks = [hours[idx:idx + chunk_size] for idx in range(0, len(hours), chunk_size)]
+
+        #Islands were already selected on our copy of the network.
+        worker_settings = copy.copy(self.settings)
+        worker_settings.select_island = False
+        #Node indexes are assigned deterministically, so the results of the workers line up with our copy.
+        self.powerflow.network.assign_matrix()
+        network_bytes = pickle.dumps(self.powerflow.network)
 
-            if self.settings.outputfile is not None:
-                snapshot_results.output(f"{self.settings.outputfile}_{hour}")
+        with ProcessPoolExecutor(max_workers=chunk_count) as executor:
+            futures = [executor.submit(_execute_time_series_chunk, worker_settings, self.powerflow.settings, network_bytes, chunk) for chunk in chunks]
+            chunk_summaries = [future.result() for future in futures]
+
+        #Results are rebuilt against our own network, in hour order. The load values and device states
+        #of each snapshot are applied to it first, so the results match those of a sequential run.
+        network = self.powerflow.network
+        devices = [device for device, _ in self.get_device_states()]
+        quasi_time_series_results = self.create_quasi_time_series_results()
+        try:
+            for summaries in chunk_summaries:
+                for hour, is_success, iterations, tx_percent, duration_sec, v_final, residuals, load_values, device_states, violates in summaries:
+                    for load, (P, Q) in zip(network.loads, load_values):
+                        load.P = P
+                        load.Q = Q
+
+                    self.restore_device_states(zip(devices, device_states))
+
+                    snapshot_results = PowerFlowResults(is_success, iterations, tx_percent, duration_sec, network, v_final, self.powerflow.settings, ResidualDetails(residuals))
+                    if violates:
+                        snapshot_results.violates_equipment_ratings = True
+
+                    self.add_snapshot_results(quasi_time_series_results, hour, snapshot_results)
+        finally:
+            quasi_time_series_results.close()
 
         return quasi_time_series_results
 
-    # Wrapper for the PowerFlow.execute() method, with additional functionality for generator adjustment
-    def execute_powerflow(self) -> PowerFlowResults:
-        snapshot_results = self.powerflow.execute()
+    # Wrapper for the SnapshotPowerFlow.execute() method, with additional functionality for generator adjustment
+    def execute_powerflow(self, updated_elements = None) -> PowerFlowResults:
+        if updated_elements is None:
+            updated_elements = []
+        snapshot_results = self.snapshot_powerflow.execute(updated_elements)
         # If requested, adjust a specific negative load until the specified swing bus is within a threshold of zero power in/out
-        while self.adjust_generator_output(snapshot_results):
-            snapshot_results = self.powerflow.execute()
+        adjusted_loads = self.adjust_generator_output(snapshot_results)
+        while len(adjusted_loads) > 0:
+            snapshot_results = self.snapshot_powerflow.execute(adjusted_loads)
+            adjusted_loads = self.adjust_generator_output(snapshot_results)
         if snapshot_results.is_success and self.violates_equipment_ratings(snapshot_results):
             snapshot_results.violates_equipment_ratings = True
         return snapshot_results
@@ -244,5 +271,29 @@ class TimeSeriesProcessor:
             return None
 
     def save_load_names(self, load_name_filepath):
+        from pandas import DataFrame
         DataFrame([bus.NodeName for bus in self.powerflow.network.buses]).to_csv(load_name_filepath)
-    
\ No newline at end of file
+
+# Entry point for the process pool in TimeSeriesProcessor.execute_quasi_time_series_parallel.
+# Only plain values are sent back, the results themselves reference the worker's network.
+# Devices are listed in the same order on every copy of the network, so their states are sent back by position.
+def _execute_time_series_chunk(settings: TimeSeriesSettings, powerflow_settings, network_bytes, hours):
+    network = pickle.loads(network_bytes)
+    processor = TimeSeriesProcessor(settings, PowerFlow(network, powerflow_settings))
+
+    summaries = []
+    for hour, snapshot_results in processor.execute_hours(hours):
+        summaries.append((
+            hour,
+            snapshot_results.is_success,
+            snapshot_results.iterations,
+            snapshot_results.tx_percent,
+            snapshot_results.duration_sec,
+            snapshot_results.v_final,
+            snapshot_results.residuals.residuals,
+            list(zip(snapshot_results.load_P.tolist(), snapshot_results.load_Q.tolist())),
+            [state for _, state in processor.get_device_states()],
+            getattr(snapshot_results, "violates_equipment_ratings", False)
+            ))
+
+    return summaries
@@ -8,7 +8,10 @@ class TimeSeriesSettings:
         negativeloads = None,
         loadfactor = None,
         select_island = False,
-        outputfile = None
+        outputfile = None,
+        workers = None,
+        carry_device_state = True,
+        outputformat = "csv"
         ) -> None:
         self.loadfile_name = loadfile_name
         self.loadfile_start = int(loadfile_start or 0)
@@ -17,4 +20,12 @@ class TimeSeriesSettings:
         self.negativeloads = negativeloads
         self.loadfactor = loadfactor
         self.select_island = select_island
-        self.outputfile = outputfile
\ No newline at end of file
+        self.outputfile = outputfile
+        #Number of processes to solve quasi time series snapshots with, None solves them sequentially.
+        self.workers = int(workers) if workers is not None else None
+        #Whether device states (capacitors, regulators, fuses) carry over between consecutive snapshots.
+        self.carry_device_state = carry_device_state
+        #"csv" writes two files per snapshot, "npz" streams all snapshots into a single file (see: TimeSeriesWriter).
+        if outputformat not in ["csv", "npz"]:
+            raise Exception(f"Unknown output format {outputformat}")
+        self.outputformat = outputformat
\ No newline at end of file
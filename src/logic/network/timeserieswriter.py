@@ -0,0 +1,94 @@
+import zipfile
+import numpy as np
+from logic.network.networkmodel import NetworkModel
+from logic.powerflowresults import PowerFlowResults
+from models.components.capacitor import CapSwitchState
+from models.components.fuse import FuseStatus
+
+#Streams quasi time series snapshots into a single .npz archive, so a run produces one file
+#instead of two CSV files per hour and snapshots don't have to be kept in memory.
+#Names of the buses, loads, generators and devices are written once, every snapshot then
+#adds its columns as "<hour>/<column>" entries (see: read_time_series_output).
+class TimeSeriesWriter:
+    def __init__(self, filepath, network: NetworkModel) -> None:
+        if not filepath.endswith(".npz"):
+            filepath = f"{filepath}.npz"
+
+        self.filepath = filepath
+        self.network = network
+        self.hours = []
+
+        #Stored without compression so every entry can be streamed straight into the archive.
+        self.archive = zipfile.ZipFile(self.filepath, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self.names_written = False
+
+    def write_snapshot(self, hour: int, results: PowerFlowResults):
+        if not self.names_written:
+            self.__write_names(results)
+            self.names_written = True
+
+        self.__write_array(f"{hour}/is_success", np.array(results.is_success))
+        self.__write_array(f"{hour}/iterations", np.array(results.iterations))
+        self.__write_array(f"{hour}/max_residual", np.array(results.max_residual))
+        self.__write_array(f"{hour}/bus_V_mag", results.bus_V_mag)
+        self.__write_array(f"{hour}/bus_V_deg", results.bus_V_deg)
+        self.__write_array(f"{hour}/generator_P", results.generator_P)
+        self.__write_array(f"{hour}/generator_Q", results.generator_Q)
+        self.__write_array(f"{hour}/load_P", results.load_P)
+        self.__write_array(f"{hour}/load_Q", results.load_Q)
+
+        capacitor_closed, regulator_taps, fuse_good = self.__get_device_states()
+        self.__write_array(f"{hour}/capacitor_closed", capacitor_closed)
+        self.__write_array(f"{hour}/regulator_tap", regulator_taps)
+        self.__write_array(f"{hour}/fuse_good", fuse_good)
+
+        self.hours.append(hour)
+
+    def close(self):
+        if self.archive is None:
+            return
+
+        self.__write_array("hours", np.array(self.hours, dtype=np.int64))
+        self.archive.close()
+        self.archive = None
+
+    def __write_names(self, results: PowerFlowResults):
+        self.__write_array("bus_names", np.array([f"{bus.NodeName}:{bus.NodePhase}" for bus in results.buses], dtype=str))
+        self.__write_array("generator_names", np.array([f"{source.bus.Bus}:{type_str}" for source, type_str in zip(results.generator_sources, results.generator_types)], dtype=str))
+        self.__write_array("load_names", np.array([load.from_bus.NodeName for load in results.loads], dtype=str))
+        self.__write_array("capacitor_names", np.array([capacitor.from_bus.NodeName for capacitor in self.__get_devices("capacitors")], dtype=str))
+        self.__write_array("regulator_names", np.array([regulator.from_node.NodeName for regulator in self.__get_devices("regulators")], dtype=str))
+        self.__write_array("fuse_names", np.array([fuse.from_node.NodeName for fuse in self.__get_devices("fuses")], dtype=str))
+
+    def __get_device_states(self):
+        capacitor_closed = np.array([capacitor.switch == CapSwitchState.CLOSED for capacitor in self.__get_devices("capacitors")], dtype=bool)
+        regulator_taps = np.array([regulator.tap_position for regulator in self.__get_devices("regulators")], dtype=np.int64)
+        fuse_good = np.array([fuse.status == FuseStatus.GOOD for fuse in self.__get_devices("fuses")], dtype=bool)
+        return capacitor_closed, regulator_taps, fuse_good
+
+    def __get_devices(self, attribute):
+        #Only distribution networks have devices.
+        return getattr(self.network, attribute, [])
+
+    def __write_array(self, name, array):
+        with self.archive.open(f"{name}.npy", "w", force_zip64=True) as f:
+            np.lib.format.write_array(f, np.asanyarray(array), allow_pickle=False)
+
+#Reads a file written by TimeSeriesWriter, stacking each snapshot column into an (hours x items) array.
+def read_time_series_output(filepath):
+    output = {}
+    with np.load(filepath, allow_pickle=False) as archive:
+        hours = archive["hours"]
+        output["hours"] = hours
+
+        snapshot_columns = set()
+        for name in archive.files:
+            if "/" in name:
+                snapshot_columns.add(name.split("/", 1)[1])
+            elif name != "hours":
+                output[name] = archive[name]
+
+        for column in snapshot_columns:
+            output[column] = np.stack([archive[f"{hour}/{column}"] for hour in hours])
+
+    return output
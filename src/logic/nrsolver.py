@@ -1,6 +1,6 @@
 import os
 import numpy as np
-from scipy.sparse.linalg import spsolve
+from logic.sparselusolver import SparseLUSolver
 from logic.stamping.matrixbuilder import MatrixBuilder
 from logic.network.networkmodel import NetworkModel
 from logic.powerflowsettings import PowerFlowSettings
@@ -18,22 +18,33 @@ class NRSolver:
         self.network = network
         self.v_limiting = v_limiting
 
-    def run_powerflow(self, matrix_stamper: MatrixStamper, v_init, tx_factor):
+        #Kept across calls so the column ordering can be reused between homotopy steps and device adjustments.
+        self.lu_solver = SparseLUSolver(settings.matrix_ordering)
+
+        #Likewise, the matrix builder (and its locked pattern) is reused for as long as the stamper is the same.
+        self.matrix_builder = None
+        self.matrix_builder_stamper = None
+
+    def run_powerflow(self, matrix_stamper: MatrixStamper, v_init, tx_factor, max_iters = None):
         if self.settings.dump_matrix:
             dump_matrix_map(self.network.matrix_map)
 
+        if max_iters == None:
+            max_iters = self.settings.max_iters
+
         v_previous = np.copy(v_init)
 
-        Y = MatrixBuilder(self.settings)
+        Y = self.__get_matrix_builder(matrix_stamper)
         J_linear = np.zeros(len(v_init))
 
+        matrix_stamper.reset_iterations()
         matrix_stamper.stamp_linear(Y, J_linear, tx_factor)
 
         linear_index = Y.get_usage()
 
         max_residual_history = []
 
-        for iteration_num in range(self.settings.max_iters):
+        for iteration_num in range(max_iters):
             J = J_linear.copy()
 
             matrix_stamper.stamp_nonlinear(Y, J, v_previous, iteration_num)
@@ -46,7 +57,7 @@ class NRSolver:
                 dump_Y(Y_matrix, iteration_num)
                 dump_J(J, iteration_num)
 
-            v_next = spsolve(Y_matrix, np.asarray(J, dtype=np.float64))
+            v_next = self.lu_solver.solve(Y_matrix, np.asarray(J, dtype=np.float64), self.network.matrix_version)
 
             if np.isnan(v_next).any():
                 raise Exception("Error solving linear system")
@@ -88,6 +99,15 @@ class NRSolver:
 
         return (False, v_next, iteration_num)
 
+    def __get_matrix_builder(self, matrix_stamper: MatrixStamper):
+        if self.matrix_builder == None or self.matrix_builder_stamper is not matrix_stamper:
+            self.matrix_builder = MatrixBuilder(self.settings)
+            self.matrix_builder_stamper = matrix_stamper
+        else:
+            self.matrix_builder.clear()
+
+        return self.matrix_builder
+
 def dump_matrix_map(map):
     Path("./dumps").mkdir(parents=True, exist_ok=True)
 
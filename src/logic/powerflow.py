@@ -8,6 +8,7 @@ from logic.network.networkmodel import NetworkModel
 from logic.nrsolver import NRSolver
 from logic.powerflowsettings import PowerFlowSettings
 from logic.powerflowresults import PowerFlowResults
+from logic.sweepsolver import SweepSolver
 from logic.v_limiting import PositiveSeqVoltageLimiting
 
 class PowerFlow:
@@ -15,29 +16,51 @@ class PowerFlow:
         self.network = network
         self.settings = settings
 
+        #Kept from the validation, so the solver doesn't have to analyze the network again.
+        self.graph_analyzer = None
+
     def execute(self) -> PowerFlowResults:
         start_time = time.perf_counter_ns()
 
         ga = GraphAnalyzer(self.network)
+        if self.settings.solve_islands and ga.get_island_count() > 1:
+            #Imported here, as IslandPowerFlow builds on PowerFlow.
+            from logic.islandpowerflow import IslandPowerFlow
+            return IslandPowerFlow(self.network, self.settings, ga).execute()
+
+        self.validate_network(ga)
+
+        device_controller = self.build_device_controller()
+
+        print("Running powerflow...")
+        is_success, v_final, iteration_num, tx_percent, residuals = device_controller.run_powerflow()
+
+        return self.build_results(start_time, is_success, v_final, iteration_num, tx_percent, residuals)
+
+    def validate_network(self, ga: GraphAnalyzer = None):
+        if ga == None:
+            ga = GraphAnalyzer(self.network)
+        self.graph_analyzer = ga
         island_count = ga.get_island_count() 
         if island_count != 1:
             raise Exception(f"Detected multiple network islands. (Count: {island_count})")
 
         ga.validate_voltage_islands()
 
+    def build_device_controller(self) -> DeviceController:
         v_limiting = None
         if not self.network.is_three_phase and self.settings.voltage_limiting:
             v_limiting = PositiveSeqVoltageLimiting(self.network)
 
-        nrsolver = NRSolver(self.settings, self.network, v_limiting)
-
-        homotopy_controller = HomotopyController(self.settings, self.network, nrsolver)
+        solver = NRSolver(self.settings, self.network, v_limiting)
+        if self.settings.sweep_radial_networks:
+            solver = SweepSolver(self.settings, self.network, solver, self.graph_analyzer)
 
-        device_controller = DeviceController(self.settings, homotopy_controller)
+        homotopy_controller = HomotopyController(self.settings, self.network, solver)
 
-        print("Running powerflow...")
-        is_success, v_final, iteration_num, tx_percent, residuals = device_controller.run_powerflow()
+        return DeviceController(self.settings, homotopy_controller)
 
+    def build_results(self, start_time, is_success, v_final, iteration_num, tx_percent, residuals) -> PowerFlowResults:
         end_time = time.perf_counter_ns()
 
         duration_seconds = (end_time * 1.0 - start_time * 1.0) / math.pow(10, 9)
@@ -52,6 +75,3 @@ class PowerFlow:
             self.settings,
             residuals
             )
-
-    
-    
@@ -4,7 +4,6 @@ from pathlib import Path
 from typing import List
 
 import numpy as np
-import pandas as pd
 
 from logic.network.networkmodel import NetworkModel
 from logic.powerflowsettings import PowerFlowSettings
@@ -33,10 +32,6 @@ class GeneratorResult:
         name = self.type_str
         return f'{name} @ bus {self.generator.bus.Bus} P (MW): {"{:.2f}".format(self.P)}, Q (MVar): {"{:.2f}".format(self.Q)}'
 
-    def csv_string(self) -> str:
-        name = self.type_str
-        return f'{self.generator.bus.Bus},{name},{"{:.2f}".format(self.P)},{"{:.2f}".format(self.Q)}\n'
-
 class BusResult:
     def __init__(self, bus: Bus, V_r, V_i, lambda_r, lambda_i):
         self.bus = bus
@@ -70,11 +65,6 @@ class BusResult:
         v_ang_str = "{:.3f}".format(self.V_deg)
         return f'Bus {self.bus.Bus} ({self.bus.NodeName}:{self.bus.NodePhase}) V mag: {v_mag_str}, V ang (deg): {v_ang_str}'
 
-    def csv_string(self) -> str:
-        v_mag_str = "{:.3f}".format(self.V_mag)
-        v_ang_str = "{:.3f}".format(self.V_deg)
-        return f'{self.bus.Bus},{self.bus.NodeName}:{self.bus.NodePhase},{v_mag_str},{v_ang_str}\n'
-
 class LoadResult:
     def __init__(self, load, P, Q, type_str):
         self.load = load
@@ -86,10 +76,9 @@ class LoadResult:
         name = self.type_str
         return f'{name} from bus {self.load.from_bus} P: {"{:.2f}".format(self.P)}, Q: {"{:.2f}".format(self.Q)}'
 
-    def csv_string(self) -> str:
-        name = self.type_str
-        return f'{self.load.from_bus.NodeName},{name},{"{:.2f}".format(self.P)},{"{:.2f}".format(self.Q)}\n'
-
+#Results are stored as numpy columns computed in one pass over v_final. The per-object
+#BusResult/GeneratorResult/LoadResult views are only built when first accessed, which keeps
+#memory down when many snapshots are held (e.g. in QuasiTimeSeriesResults).
 class PowerFlowResults:
     def __init__(
         self, 
@@ -111,55 +100,87 @@ class PowerFlowResults:
         self.settings = settings
         self.residuals = residuals
 
-        self.bus_results: List[BusResult]
-        self.bus_results = []
+        self.buses = [bus for bus in network.buses if not bus.IsVirtual]
 
-        self.generator_results: List[GeneratorResult]
-        self.generator_results = []
+        Vr_idxs = np.array([bus.node_Vr for bus in self.buses], dtype=np.int64)
+        Vi_idxs = np.array([bus.node_Vi for bus in self.buses], dtype=np.int64)
 
-        self.load_results: List[LoadResult]
-        self.load_results = []
+        self.bus_Vr = v_final[Vr_idxs]
+        self.bus_Vi = v_final[Vi_idxs]
+        self.bus_V_mag = np.hypot(self.bus_Vr, self.bus_Vi)
+        #Voltage angle in degrees, zero for buses without any voltage.
+        self.bus_V_deg = np.where(self.bus_V_mag < 1e-8, 0, np.degrees(np.arctan2(self.bus_Vi, self.bus_Vr)))
 
-        for bus in network.buses:
-            if bus.IsVirtual:
-                continue
-            V_r = v_final[bus.node_Vr]
-            V_i = v_final[bus.node_Vi]
+        if network.optimization != None:
+            self.bus_lambda_r = v_final[np.array([bus.node_lambda_Vr for bus in self.buses], dtype=np.int64)]
+            self.bus_lambda_i = v_final[np.array([bus.node_lambda_Vi for bus in self.buses], dtype=np.int64)]
+        else:
+            self.bus_lambda_r = None
+            self.bus_lambda_i = None
 
-            if network.optimization != None:
-                lambda_r = v_final[bus.node_lambda_Vr]
-                lambda_i = v_final[bus.node_lambda_Vi]
-            else:
-                lambda_r = None
-                lambda_i = None
-            
-            self.bus_results.append(BusResult(bus, V_r, V_i, lambda_r, lambda_i))
+        #Generators, slack buses and infeasibility currents (in that order).
+        self.generator_sources = []
+        self.generator_types = []
+        generator_P = []
+        generator_Q = []
 
         for generator in self.network.generators:
-            Q = v_final[generator.get_Q_index()]
-            P = generator.P
-
-            self.generator_results.append(GeneratorResult(generator, P, Q, GENTYPE.PV))
-
-        for load in self.network.loads:
-            P = load.P
-            Q = load.Q
-            
-            self.load_results.append(LoadResult(load, P, Q, GENTYPE.PQ))
+            self.generator_sources.append(generator)
+            self.generator_types.append(GENTYPE.PV)
+            generator_P.append(generator.P)
+            generator_Q.append(v_final[generator.get_Q_index()])
 
         for slack in self.network.slack:
             Vr = v_final[slack.bus.node_Vr]
             Vi = v_final[slack.bus.node_Vi]
             slack_Ir = v_final[slack.get_slack_Ir_index()]
             slack_Ii = v_final[slack.get_slack_Ii_index()]
-            P = Vr * slack_Ir
-            Q = Vi * slack_Ii
-            self.generator_results.append(GeneratorResult(slack, P, Q, GENTYPE.Slack)) 
+            self.generator_sources.append(slack)
+            self.generator_types.append(GENTYPE.Slack)
+            generator_P.append(Vr * slack_Ir)
+            generator_Q.append(Vi * slack_Ii)
+
+        self.generator_P = np.array(generator_P, dtype=np.float64)
+        self.generator_Q = np.array(generator_Q, dtype=np.float64)
+
+        #Load values are captured now, the load objects may be changed by later snapshots.
+        self.loads = list(self.network.loads)
+        self.load_P = np.array([load.P for load in self.loads], dtype=np.float64)
+        self.load_Q = np.array([load.Q for load in self.loads], dtype=np.float64)
 
         self.max_residual = self.residuals.max_residual
 
+        self._bus_results = None
+        self._generator_results = None
+        self._load_results = None
+
         self.try_load_infeasibility_data()
 
+    @property
+    def bus_results(self) -> List[BusResult]:
+        if self._bus_results == None:
+            self._bus_results = []
+            for idx, bus in enumerate(self.buses):
+                lambda_r = self.bus_lambda_r[idx] if self.bus_lambda_r is not None else None
+                lambda_i = self.bus_lambda_i[idx] if self.bus_lambda_i is not None else None
+                self._bus_results.append(BusResult(bus, self.bus_Vr[idx], self.bus_Vi[idx], lambda_r, lambda_i))
+        return self._bus_results
+
+    @property
+    def generator_results(self) -> List[GeneratorResult]:
+        if self._generator_results == None:
+            self._generator_results = [
+                GeneratorResult(source, P, Q, type_str) 
+                for source, P, Q, type_str in zip(self.generator_sources, self.generator_P, self.generator_Q, self.generator_types)
+                ]
+        return self._generator_results
+
+    @property
+    def load_results(self) -> List[LoadResult]:
+        if self._load_results == None:
+            self._load_results = [LoadResult(load, P, Q, GENTYPE.PQ) for load, P, Q in zip(self.loads, self.load_P, self.load_Q)]
+        return self._load_results
+
     def try_load_infeasibility_data(self):
         self.infeasibility_totals = None
 
@@ -168,6 +189,8 @@ class PowerFlowResults:
 
         total_P = 0
         total_Q = 0
+        inf_P = []
+        inf_Q = []
         for infeasibility_current in self.network.optimization.infeasibility_currents:
             Vr = self.v_final[infeasibility_current.bus.node_Vr]
             Vi = self.v_final[infeasibility_current.bus.node_Vi]
@@ -186,7 +209,13 @@ class PowerFlowResults:
 
             total_P += P
             total_Q += Q
-            self.generator_results.append(GeneratorResult(infeasibility_current, P, Q, GENTYPE.Inf))
+            self.generator_sources.append(infeasibility_current)
+            self.generator_types.append(GENTYPE.Inf)
+            inf_P.append(P)
+            inf_Q.append(Q)
+
+        self.generator_P = np.concatenate([self.generator_P, np.array(inf_P, dtype=np.float64)])
+        self.generator_Q = np.concatenate([self.generator_Q, np.array(inf_Q, dtype=np.float64)])
 
         self.infeasibility_totals = (total_P, total_Q)   
 
@@ -248,6 +277,7 @@ class PowerFlowResults:
 
         return results
 
+    #Rows are formatted straight from the result columns, so writing a snapshot doesn't build any result objects.
     def output(self, outputfilepath):
         if not outputfilepath:
             return
@@ -262,8 +292,10 @@ class PowerFlowResults:
                 f.write("FAILURE")
             else:
                 f.write("bus,name,v_magnitude,v_ang_degrees\n")
-                for bus in self.bus_results:
-                    f.write(bus.csv_string())
+                f.write("".join(
+                    f'{bus.Bus},{bus.NodeName}:{bus.NodePhase},{V_mag:.3f},{V_deg:.3f}\n' 
+                    for bus, V_mag, V_deg in zip(self.buses, self.bus_V_mag.tolist(), self.bus_V_deg.tolist())
+                    ))
                 if (hasattr(self,"violates_equipment_ratings") and self.violates_equipment_ratings):
                     f.write("VIOLATED EQUIPMENT RATINGS")
 
@@ -274,23 +306,50 @@ class PowerFlowResults:
                 f.write("FAILURE")
             else:
                 f.write("bus,name,P(MW),Q(MVar)\n")
-                for gen in self.generator_results:
-                    f.write(gen.csv_string())
-                for load in self.load_results:
-                    f.write(load.csv_string())
+                f.write("".join(
+                    f'{source.bus.Bus},{type_str},{P:.2f},{Q:.2f}\n' 
+                    for source, type_str, P, Q in zip(self.generator_sources, self.generator_types, self.generator_P.tolist(), self.generator_Q.tolist())
+                    ))
+                f.write("".join(
+                    f'{load.from_bus.NodeName},{GENTYPE.PQ},{P:.2f},{Q:.2f}\n' 
+                    for load, P, Q in zip(self.loads, self.load_P.tolist(), self.load_Q.tolist())
+                    ))
 
                 if (hasattr(self,"violates_equipment_ratings") and self.violates_equipment_ratings):
                     f.write("VIOLATED EQUIPMENT RATINGS")
 
 class QuasiTimeSeriesResults:
-    def __init__(self):
+    #With a writer (see: TimeSeriesWriter), snapshots are streamed out as they are added and only
+    #a summary of each one is kept in memory.
+    def __init__(self, writer = None):
         self.powerflow_snapshot_results: dict[int, PowerFlowResults]
         self.powerflow_snapshot_results = dict()
+
+        #(is_success, iterations, max_residual) for every snapshot.
+        self.snapshot_summaries: dict[int, tuple]
+        self.snapshot_summaries = dict()
+
+        self.writer = writer
     
     def add_powerflow_snapshot_results(self, hour:int, pf_results : PowerFlowResults):
-        self.powerflow_snapshot_results[hour] = pf_results
+        self.snapshot_summaries[hour] = (pf_results.is_success, pf_results.iterations, pf_results.max_residual)
+
+        if self.writer is not None:
+            self.writer.write_snapshot(hour, pf_results)
+        else:
+            self.powerflow_snapshot_results[hour] = pf_results
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
 
     def display(self, verbose=False):
+        if self.writer is not None:
+            for hour, (is_success, iterations, max_residual) in self.snapshot_summaries.items():
+                print(f"HOUR {hour}: Successful: {is_success}, Iterations: {iterations}, Max Residual: {max_residual:.3g}")
+            print(f"Snapshots written to {self.writer.filepath}")
+            return
+
         for hour, pf_result in self.powerflow_snapshot_results.items():
             print("---------------------")
             print(f"HOUR {hour}")
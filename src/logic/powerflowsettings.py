@@ -10,7 +10,13 @@ class PowerFlowSettings:
         dump_matrix = False,
         device_control = True,
         load_factor = None,
-        enable_line_capacitance = True
+        enable_line_capacitance = True,
+        cache_network = False,
+        verify_line_admittances = True,
+        matrix_ordering = "COLAMD",
+        sweep_radial_networks = False,
+        solve_islands = False,
+        island_workers = None
         ) -> None:
         self.tolerance = tolerance
         self.max_iters = max_iters
@@ -21,4 +27,16 @@ class PowerFlowSettings:
         self.dump_matrix = dump_matrix
         self.device_control = device_control
         self.load_factor = load_factor
-        self.enable_line_capacitance = enable_line_capacitance
\ No newline at end of file
+        self.enable_line_capacitance = enable_line_capacitance
+        #Reuse previously parsed snapshots of unchanged network files (see: NetworkCache).
+        self.cache_network = cache_network
+        #Check every distinct line admittance matrix against its impedance matrix (see: AdmittanceCache).
+        self.verify_line_admittances = verify_line_admittances
+        #Fill-reducing ordering for the LU factorization: one of SuperLU's column orderings, or "RCM" (see: SparseLUSolver).
+        self.matrix_ordering = matrix_ordering
+        #Solve radial three-phase networks with a forward/backward sweep, falling back to Newton-Raphson (see: SweepSolver).
+        self.sweep_radial_networks = sweep_radial_networks
+        #Solve every island of a disconnected network on its own, instead of rejecting the network (see: IslandPowerFlow).
+        self.solve_islands = solve_islands
+        #Number of processes to solve islands with, None solves them sequentially.
+        self.island_workers = int(island_workers) if island_workers is not None else None
@@ -0,0 +1,49 @@
+import time
+from logic.devicecontroller import DeviceController
+from logic.network.networkmodel import NetworkModel
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from logic.powerflowresults import PowerFlowResults
+from models.components.load import Load
+
+#Solves a sequence of snapshots of the same network (e.g. quasi-static time series), where only element
+#values such as load P/Q change between snapshots. Island detection, node assignment and stamp building
+#happen once: later snapshots only restamp the updated elements and warm start from the previous solution.
+class SnapshotPowerFlow(PowerFlow):
+    def __init__(self, network: NetworkModel, settings: PowerFlowSettings = PowerFlowSettings()) -> None:
+        super().__init__(network, settings)
+
+        self.device_controller = None
+        self.device_controller: DeviceController
+
+        self.v_previous = None
+        self.snapshot_count = 0
+
+    def execute(self, updated_elements = None) -> PowerFlowResults:
+        start_time = time.perf_counter_ns()
+
+        if updated_elements is None:
+            updated_elements = []
+
+        if self.device_controller == None:
+            self.validate_network()
+            self.device_controller = self.build_device_controller()
+        elif any(isinstance(element, Load) and element.has_stale_stampers() for element in updated_elements):
+            #A load component that was zero so far has no stamps, so we have to start over.
+            self.device_controller = self.build_device_controller()
+            self.v_previous = None
+        else:
+            self.device_controller.homotopy.update_devices(updated_elements)
+
+        print(f"Running powerflow snapshot {self.snapshot_count}...")
+        is_success, v_final, iteration_num, tx_percent, residuals = self.device_controller.run_powerflow(self.v_previous)
+
+        if is_success:
+            self.v_previous = v_final
+        else:
+            #A failed solution isn't a good starting point, the next snapshot goes back to the regular initial conditions.
+            self.v_previous = self.network.generate_v_init(self.settings)
+
+        self.snapshot_count += 1
+
+        return self.build_results(start_time, is_success, v_final, iteration_num, tx_percent, residuals)
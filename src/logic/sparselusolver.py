@@ -0,0 +1,119 @@
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+from scipy.sparse.linalg import splu
+
+#Orderings computed here rather than by SuperLU. Rows and columns are permuted alike, which is the
+#same as renumbering the variables (without touching the matrix map or any stamps), and the permuted
+#matrix is factorized as is. Reverse Cuthill-McKee keeps the matrix of radial feeders close to the diagonal.
+RCM = "RCM"
+
+#Solves the linear system for each Newton-Raphson iteration.
+#The sparsity pattern of Y does not change within a solve (nor across homotopy steps or
+#time series snapshots), so we only compute the fill-reducing ordering once per pattern.
+#Later factorizations are done on the pre-permuted matrix with the ordering step disabled.
+class SparseLUSolver:
+    def __init__(self, permc_spec = "COLAMD") -> None:
+        #Either one of SuperLU's column orderings or RCM.
+        self.permc_spec = permc_spec
+
+        self.matrix_version = None
+        self._indptr = None
+        self._indices = None
+
+        #Row i of the permuted matrix is row row_order[i] of Y (None if rows are left in place),
+        #column j is column col_order[j].
+        self.row_order = None
+        self.col_order = None
+        self._perm_data = None
+        self._perm_indices = None
+        self._perm_indptr = None
+
+        #Useful for diagnostics, the number of times a full (ordering + factorization) analysis was required.
+        self.analysis_count = 0
+        self.factorization_count = 0
+
+    def solve(self, Y: csc_matrix, J, matrix_version = None):
+        if not self.__is_pattern_cached(Y, matrix_version):
+            return self.__analyze_and_solve(Y, J, matrix_version)
+
+        return self.__solve_permuted(Y, J)
+
+    def reset(self):
+        self.matrix_version = None
+        self._indptr = None
+        self._indices = None
+        self.col_order = None
+
+    def __is_pattern_cached(self, Y: csc_matrix, matrix_version):
+        if self.col_order is None or matrix_version != self.matrix_version:
+            return False
+
+        if Y.indptr.shape != self._indptr.shape or Y.indices.shape != self._indices.shape:
+            return False
+
+        return np.array_equal(Y.indptr, self._indptr) and np.array_equal(Y.indices, self._indices)
+
+    def __analyze_and_solve(self, Y: csc_matrix, J, matrix_version):
+        #The pattern comparison and the data gather below both rely on canonical (sorted, no duplicates) format.
+        Y.sum_duplicates()
+
+        self.analysis_count += 1
+        self.matrix_version = matrix_version
+        self._indptr = Y.indptr.copy()
+        self._indices = Y.indices.copy()
+
+        if self.permc_spec == RCM:
+            order = get_rcm_order(Y)
+            self.row_order = order
+            self.col_order = order
+            self.__permute_pattern(Y)
+            return self.__solve_permuted(Y, J)
+
+        lu = self.__factorize(Y, self.permc_spec)
+
+        #SuperLU factorizes Pr * Y * Pc, where Y * Pc is Y with its columns in the inverse order of perm_c.
+        self.row_order = None
+        self.col_order = np.argsort(lu.perm_c)
+        self.__permute_pattern(Y)
+
+        return lu.solve(J)
+
+    #Precomputes the gather that permutes the data of any matrix sharing this pattern.
+    def __permute_pattern(self, Y: csc_matrix):
+        #Positions are offset by one, so none of them is dropped as an explicit zero.
+        positions = csc_matrix((np.arange(1, Y.nnz + 1, dtype=np.int64), Y.indices, Y.indptr), shape=Y.shape)
+        if self.row_order is not None:
+            positions = positions[self.row_order]
+        positions = positions[:, self.col_order].tocsc()
+        positions.sort_indices()
+
+        self._perm_data = positions.data - 1
+        self._perm_indices = positions.indices
+        self._perm_indptr = positions.indptr
+
+    def __solve_permuted(self, Y: csc_matrix, J):
+        Y_perm = csc_matrix((Y.data[self._perm_data], self._perm_indices, self._perm_indptr), shape=Y.shape)
+
+        lu = self.__factorize(Y_perm, "NATURAL")
+
+        if self.row_order is not None:
+            J = J[self.row_order]
+        v_perm = lu.solve(J)
+
+        v = np.empty_like(v_perm)
+        v[self.col_order] = v_perm
+        return v
+
+    def __factorize(self, Y: csc_matrix, permc_spec):
+        self.factorization_count += 1
+
+        try:
+            return splu(Y, permc_spec=permc_spec)
+        except RuntimeError:
+            raise Exception("Error solving linear system")
+
+#Reverse Cuthill-McKee ordering of the (symmetrized) pattern of Y.
+def get_rcm_order(Y: csc_matrix):
+    pattern = csc_matrix((np.ones(Y.nnz), Y.indices, Y.indptr), shape=Y.shape)
+    return reverse_cuthill_mckee((pattern + pattern.T).tocsr(), symmetric_mode=True).astype(np.int64)
@@ -0,0 +1,114 @@
+from typing import List
+import numpy as np
+
+#A single generated numpy function that evaluates a group of expressions sharing the same parameters.
+#Common subexpressions (e.g. Vr**2 + Vi**2 for loads, or the cos/sin terms of a transformer)
+#are eliminated across the whole group, so they are only computed once per evaluation.
+class LagrangeKernel:
+    def __init__(self, func, output_count: int, source = None) -> None:
+        self.func = func
+        self.output_count = output_count
+        #Only kept for kernels built directly from expressions (see: build_kernel).
+        self.source = source
+
+    def evaluate(self, args):
+        return self.func(*args)
+
+#Everything the matrix stamper needs from a lagrange segment, loaded from a generated kernel module.
+#Variables are stored by name, so nothing here depends on sympy.
+#Stamps are (first order variable, yth variable or None, is linear, is constant expression, kernel index)
+#and residuals are (first order variable, kernel index). Linear stamps index into the linear kernel,
+#nonlinear stamps and residuals index into the nonlinear kernel.
+class SegmentKernels:
+    def __init__(self, module_vars: dict) -> None:
+        self.cache_key = module_vars["CACHE_KEY"]
+        self.constants = module_vars["CONSTANTS"]
+        self.primals = module_vars["PRIMALS"]
+        self.duals = module_vars["DUALS"]
+        self.tx_factor_index = module_vars["TX_FACTOR_INDEX"]
+        self.stamps = module_vars["STAMPS"]
+        self.residuals = module_vars["RESIDUALS"]
+
+        self.linear_kernel = None
+        if module_vars["LINEAR_OUTPUTS"] > 0:
+            self.linear_kernel = LagrangeKernel(module_vars["linear_kernel"], module_vars["LINEAR_OUTPUTS"])
+
+        self.nonlinear_kernel = None
+        if module_vars["NONLINEAR_OUTPUTS"] > 0:
+            self.nonlinear_kernel = LagrangeKernel(module_vars["nonlinear_kernel"], module_vars["NONLINEAR_OUTPUTS"])
+
+def build_kernel(parameters, expressions: List) -> LagrangeKernel:
+    source = generate_kernel_source(parameters, expressions)
+    return LagrangeKernel(compile_source(source)["kernel"], len(expressions), source)
+
+def generate_kernel_source(parameters, expressions, name = "kernel"):
+    from sympy import cse, numbered_symbols, sympify, Symbol
+    from sympy.printing.numpy import NumPyPrinter
+
+    #Parameters are renamed so the generated source doesn't depend on how model symbols are named.
+    arg_symbols = [Symbol(f"a{idx}") for idx in range(len(parameters))]
+    renames = dict(zip(parameters, arg_symbols))
+    renamed = [sympify(expr).xreplace(renames) for expr in expressions]
+
+    replacements, reduced = cse(renamed, symbols=numbered_symbols("x"))
+
+    printer = NumPyPrinter()
+
+    lines = [f"def {name}({', '.join(str(arg) for arg in arg_symbols)}):"]
+    for symbol, expr in replacements:
+        lines.append(f"    {symbol} = {printer.doprint(expr)}")
+
+    outputs = "".join(f"{printer.doprint(expr)}, " for expr in reduced)
+    lines.append(f"    return ({outputs})")
+
+    return "\n".join(lines) + "\n"
+
+#Generates the source of an importable module containing the fused kernels and the
+#index metadata for the supplied derivatives (see: SegmentKernels).
+def generate_segment_source(cache_key: str, parameters, constant_names, primal_names, dual_names, tx_factor_index, derivatives):
+    stamps = []
+    residuals = []
+    linear_exprs = []
+    nonlinear_exprs = []
+
+    for derivative in derivatives:
+        for entry in derivative.get_evals():
+            yth_variable_str = None if entry.is_constant_expr else str(entry.yth_variable)
+            group = linear_exprs if entry.is_linear else nonlinear_exprs
+            stamps.append((derivative.variable_str, yth_variable_str, entry.is_linear, entry.is_constant_expr, len(group)))
+            group.append(entry.expr)
+
+    for derivative in derivatives:
+        residuals.append((derivative.variable_str, len(nonlinear_exprs)))
+        nonlinear_exprs.append(derivative.expr)
+
+    lines = [
+        "#Generated by combined-txds from a lagrange segment, do not edit.",
+        "import numpy",
+        "",
+        f"CACHE_KEY = {cache_key!r}",
+        f"CONSTANTS = {tuple(constant_names)!r}",
+        f"PRIMALS = {tuple(primal_names)!r}",
+        f"DUALS = {tuple(dual_names)!r}",
+        f"TX_FACTOR_INDEX = {tx_factor_index!r}",
+        f"STAMPS = {stamps!r}",
+        f"RESIDUALS = {residuals!r}",
+        f"LINEAR_OUTPUTS = {len(linear_exprs)}",
+        f"NONLINEAR_OUTPUTS = {len(nonlinear_exprs)}",
+        ""
+    ]
+
+    source = "\n".join(lines) + "\n"
+
+    if len(linear_exprs) > 0:
+        source += generate_kernel_source(parameters, linear_exprs, "linear_kernel") + "\n"
+
+    if len(nonlinear_exprs) > 0:
+        source += generate_kernel_source(parameters, nonlinear_exprs, "nonlinear_kernel")
+
+    return source
+
+def compile_source(source):
+    namespace = {"numpy": np}
+    exec(compile(source, "<lagrange-kernel>", "exec"), namespace)
+    return namespace
@@ -0,0 +1,47 @@
+import tempfile
+import os
+import hashlib
+import importlib.util
+
+#Persists the generated kernel module of each lagrange segment as plain python source,
+#so later runs only have to import numpy code (no sympy derivation or unpickling).
+class LagrangeKernelCache:
+    def __init__(self) -> None:
+        self.cache_dir = os.path.join(tempfile.gettempdir(), "combined-txds-lagrange-kernels")
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _get_module_name(self, cache_key):
+        sha1 = hashlib.sha1()
+        sha1.update(cache_key.encode('utf8'))
+        return f"segment_{sha1.hexdigest()}"
+
+    def _get_module_file(self, cache_key):
+        return os.path.join(self.cache_dir, f"{self._get_module_name(cache_key)}.py")
+
+    def has_module(self, cache_key):
+        return os.path.isfile(self._get_module_file(cache_key))
+
+    def try_load(self, cache_key):
+        if not self.has_module(cache_key):
+            raise Exception("No kernel module exists.")
+
+        module_file = self._get_module_file(cache_key)
+
+        spec = importlib.util.spec_from_file_location(self._get_module_name(cache_key), module_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        if module.CACHE_KEY != cache_key:
+            raise Exception("Kernel module does not match the lagrange segment.")
+
+        return vars(module)
+
+    def try_store(self, cache_key, source):
+        module_file = self._get_module_file(cache_key)
+
+        #Written to a temporary file first so concurrent solver processes never import a partial module.
+        temp_file = f"{module_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            f.write(source)
+        os.replace(temp_file, module_file)
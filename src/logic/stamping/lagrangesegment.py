@@ -1,12 +1,62 @@
+import hashlib
+import os
 from itertools import count
 from typing import Dict, List
-from sympy import Add, diff, lambdify, expand, Pow, Symbol
-from logic.stamping.lagrangepickler import LagrangePickler
+from logic.stamping.lagrangekernel import SegmentKernels, compile_source, generate_segment_source
+from logic.stamping.lagrangekernelcache import LagrangeKernelCache
 from models.wellknownvariables import Lr_from, Li_from, Lr_to, Li_to
 from models.wellknownvariables import tx_factor
 
+#Sympy is only imported when equations actually need to be derived (i.e. on a kernel cache miss),
+#so the functions below import it locally.
+
 SKIP = None
 
+SRC_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+#The derivation (this module) and the kernel generation go into every kernel module,
+#so they are part of the cache key of every model definition.
+DERIVATION_FILES = [
+    os.path.realpath(__file__),
+    os.path.join(SRC_DIR, "logic", "stamping", "lagrangekernel.py"),
+    os.path.join(SRC_DIR, "models", "wellknownvariables.py")
+]
+
+_file_hashes = {}
+
+def get_source_hash(source_files):
+    sha1 = hashlib.sha1()
+    for source_file in sorted(set(source_files)):
+        if source_file not in _file_hashes:
+            with open(source_file, "rb") as f:
+                _file_hashes[source_file] = hashlib.sha1(f.read()).hexdigest()
+        sha1.update(_file_hashes[source_file].encode('utf8'))
+    return sha1.hexdigest()
+
+#The files of the modules (from this repository) imported by a source file. Resolved from
+#the import statements alone, so nothing is imported here (in particular, not sympy).
+def find_imported_files(source_file):
+    import ast
+
+    with open(source_file, "rb") as f:
+        tree = ast.parse(f.read(), source_file)
+
+    module_names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            module_names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module != None:
+            module_names.add(node.module)
+
+    imported_files = []
+    for module_name in module_names:
+        module_path = os.path.join(SRC_DIR, *module_name.split("."))
+        for candidate in [f"{module_path}.py", os.path.join(module_path, "__init__.py")]:
+            if os.path.isfile(candidate):
+                imported_files.append(os.path.realpath(candidate))
+                break
+
+    return imported_files
+
 def is_constant(expr, vars):
     for symbol in expr.free_symbols:
         if symbol in vars:
@@ -14,6 +64,8 @@ def is_constant(expr, vars):
     return True
 
 def is_linear(expr, vars):
+    from sympy import Pow
+
     if is_constant(expr, vars):
         return False
 
@@ -37,7 +89,13 @@ def get_linear_term(expr, vars):
             result = symbol
     return result
 
+def to_symbols(*names):
+    from sympy import Symbol
+    return tuple(Symbol(name) for name in names)
+
 def linearize_expr(expr, variables):
+    from sympy import diff
+
     kth_sum = -expr
     Y_components = {}
 
@@ -49,6 +107,8 @@ def linearize_expr(expr, variables):
     return (kth_sum, Y_components)
 
 def split_expr(eqn, vars):
+    from sympy import Add, diff, expand
+
     eqn = expand(eqn)
 
     constant_expr = 0
@@ -79,15 +139,14 @@ def split_expr(eqn, vars):
     return (constant_expr, variable_expr_dict)
 
 class EvaluationEntry:
-    def __init__(self, yth_variable, func, expr, is_constant_expr, is_linear):
+    def __init__(self, yth_variable, expr, is_constant_expr, is_linear):
         self.yth_variable = yth_variable
-        self.func = func
         self.expr = expr
         self.is_constant_expr = is_constant_expr
         self.is_linear = is_linear
 
 class DerivativeEntry:
-    def __init__(self, first_order, expr, constant_expr, variable_exprs, lambda_inputs, variables) -> None:
+    def __init__(self, first_order, expr, constant_expr, variable_exprs, variables) -> None:
         self.variable = first_order
         self.variable_str = str(first_order)
         self.expr = expr
@@ -97,29 +156,20 @@ class DerivativeEntry:
         #Any variable expressions will end up in the Y matrix, based on the variable the expression is for.
         self.variable_exprs = variable_exprs
 
-        #All variables that need to be supplied to the evaluation functions. We assume all expressions take the same inputs.
-        self.lambda_inputs = lambda_inputs
-
-        self.expr_eval = lambdify(self.lambda_inputs, self.expr, "numpy")
-        self.constant_eval = lambdify(self.lambda_inputs, self.constant_expr, "numpy")
-        self.variable_evals = {}
-        for var, variable_eqn in self.variable_exprs.items():
-            if variable_eqn != 0:
-                self.variable_evals[var] = lambdify(self.lambda_inputs, variable_eqn, "numpy")
-
         self.evals = []
         self.evals: List[EvaluationEntry]
 
         if self.constant_expr != 0:
             free_syms = self.constant_expr.free_symbols
             is_linear = not any([(x in free_syms) for x in variables])
-            self.evals.append(EvaluationEntry(None, self.constant_eval, self.constant_expr, True, is_linear))
+            self.evals.append(EvaluationEntry(None, self.constant_expr, True, is_linear))
 
-        for (variable, func) in self.variable_evals.items():
-            expr = self.variable_exprs[variable]
+        for (variable, expr) in self.variable_exprs.items():
+            if expr == 0:
+                continue
             free_syms = expr.free_symbols
             is_linear = not any([(x in free_syms) for x in variables])
-            self.evals.append(EvaluationEntry(variable, func, expr, False, is_linear))
+            self.evals.append(EvaluationEntry(variable, expr, False, is_linear))
 
     def get_evals(self):
         return self.evals
@@ -131,8 +181,8 @@ class DerivativeEntry:
 #You can think of all the segments as summing together to make the full Lagrange equation,
 #but in reality we map individual segments straight onto the matrix (see: LagrangeStamper)
 class LagrangeSegment:
-    VERSION = 6 #Increment if changes have been made to bust the derivative cache.
-    _pickler = LagrangePickler()
+    VERSION = 8 #Increment if changes have been made to bust the kernel cache.
+    _kernel_cache = LagrangeKernelCache()
 
     def __init__(self, lagrange, constant_symbols, primal_symbols, dual_symbols):
         self.lagrange = lagrange
@@ -145,41 +195,44 @@ class LagrangeSegment:
 
         self.parameters = self.constants + self.variables
 
-        self.parameters_key = str(self.parameters)
+        self.parameter_names = tuple(str(x) for x in self.parameters)
+        self.parameters_key = str(self.parameter_names)
 
-        if tx_factor in self.constants:
-            self.tx_factor_index = self.constants.index(tx_factor) 
+        constant_names = [str(x) for x in self.constants]
+        if tx_factor in constant_names:
+            self.tx_factor_index = constant_names.index(tx_factor) 
         else:
             self.tx_factor_index = SKIP
 
         self._derivatives = None
-        self._derivatives: Dict[Symbol, DerivativeEntry]
+        self._derivatives: Dict[object, DerivativeEntry]
+
+        self._kernels = {}
+        self._kernels: Dict[bool, SegmentKernels]
 
         self.__dual_primal_map_str = {}
         for dual in self.duals:
             primal = self.primals[self.duals.index(dual)]
             self.__dual_primal_map_str[str(dual)] = str(primal)
 
+    #Kernels come from generated modules and can't be pickled (e.g. to send a network to a worker process),
+    #they are loaded again on demand.
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_kernels"] = {}
+        return state
+
     def get_duals_corresponding_primal(self, dual_var_str):
         #For the optimization disabled case, we can't use the dual variable's index
         #for the matrix row. Instead, we commandeer the index of it's corresponding primal variable.
         return self.__dual_primal_map_str[dual_var_str]
 
     def get_derivatives(self):
+        from sympy import diff
+
         if self._derivatives != None:
             return self._derivatives
 
-        if LagrangeSegment._pickler.has_pickle(self.lagrange_key):
-            try:
-                self._derivatives = LagrangeSegment._pickler.try_unpickle(self.lagrange_key)
-            except:
-                self._generate_derivatives()
-        else:
-            self._generate_derivatives()
-
-        return self._derivatives
-    
-    def _generate_derivatives(self):
         self._derivatives = {}
 
         for first_order in self.variables:
@@ -187,9 +240,163 @@ class LagrangeSegment:
 
             constant_expr, variable_exprs = split_expr(derivative, self.variables)
 
-            self._derivatives[first_order] = DerivativeEntry(first_order, derivative, constant_expr, variable_exprs, self.parameters, self.variables)
+            self._derivatives[first_order] = DerivativeEntry(first_order, derivative, constant_expr, variable_exprs, self.variables)
+
+        return self._derivatives
+
+    #The fused numpy kernels for this segment. These only depend on the lagrange equation,
+    #so they are loaded from the kernel cache when available and only derived on a miss.
+    def get_kernels(self, optimization_enabled):
+        if optimization_enabled in self._kernels:
+            return self._kernels[optimization_enabled]
+
+        cache_key = f"{self.lagrange_key},{optimization_enabled}"
+
+        kernels = None
+        if LagrangeSegment._kernel_cache.has_module(cache_key):
+            try:
+                kernels = SegmentKernels(LagrangeSegment._kernel_cache.try_load(cache_key))
+            except:
+                kernels = None
+
+        if kernels == None:
+            kernels = self._generate_kernels(cache_key, optimization_enabled)
+
+        self._kernels[optimization_enabled] = kernels
+        return kernels
+    
+    def _generate_kernels(self, cache_key, optimization_enabled):
+        if optimization_enabled:
+            first_order_variables = self.variables
+        else:
+            first_order_variables = self.duals
+
+        derivatives = [self.get_derivatives()[first_order] for first_order in first_order_variables]
+
+        source = generate_segment_source(
+            cache_key, 
+            self.parameters, 
+            [str(x) for x in self.constants], 
+            [str(x) for x in self.primals], 
+            [str(x) for x in self.duals], 
+            self.tx_factor_index,
+            derivatives
+            )
+
+        try:
+            LagrangeSegment._kernel_cache.try_store(cache_key, source)
+        except OSError:
+            pass
+
+        return SegmentKernels(compile_source(source))
+
+#A model definition that is declared by name, with the sympy derivation deferred to a builder function.
+#The variable names and fused kernels are resolved from the kernel cache, so on a warm cache the
+#equations are never assembled (and sympy is never imported). The cache key includes a hash of the
+#source file declaring the model, the modules it imports and the derivation itself, so editing any
+#of them invalidates it.
+class LazyModelDefinition:
+    def __init__(self, name, source_file, build_definition) -> None:
+        self.name = name
+        self.build_definition = build_definition
+
+        source_file = os.path.realpath(source_file)
+        source_hash = get_source_hash([source_file] + find_imported_files(source_file) + DERIVATION_FILES)
+
+        self.lagrange_key = f"{LagrangeSegment.VERSION},{name},{source_hash}"
+
+        self._segment = None
+        self._segment: LagrangeSegment
+
+        self._kernels = {}
+        self._kernels: Dict[bool, SegmentKernels]
+
+    #Variable names (constants, primals, duals...) are only resolved on first access.
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        self.__resolve()
+        return self.__dict__[name]
+
+    #See: LagrangeSegment.__getstate__
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_kernels"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def get_segment(self) -> LagrangeSegment:
+        if self._segment == None:
+            self._segment = self.build_definition()
+        return self._segment
+
+    def get_derivatives(self):
+        return self.get_segment().get_derivatives()
+
+    def get_duals_corresponding_primal(self, dual_var_str):
+        return self.dual_primal_map[dual_var_str]
+
+    def get_kernels(self, optimization_enabled):
+        if optimization_enabled in self._kernels:
+            return self._kernels[optimization_enabled]
+
+        cache_key = self.__get_cache_key(optimization_enabled)
+
+        kernels = None
+        if LagrangeSegment._kernel_cache.has_module(cache_key):
+            try:
+                kernels = SegmentKernels(LagrangeSegment._kernel_cache.try_load(cache_key))
+            except:
+                kernels = None
 
-        LagrangeSegment._pickler.try_pickle(self.lagrange_key, self._derivatives)
+        if kernels == None:
+            segment = self.get_segment()
+            kernels = segment._generate_kernels(cache_key, optimization_enabled)
+
+        if "primals" in self.__dict__ and (kernels.constants, kernels.primals, kernels.duals) != (self.constants, self.primals, self.duals):
+            raise Exception(f"Kernel variables for {self.name} do not match the model definition")
+
+        self._kernels[optimization_enabled] = kernels
+        return kernels
+
+    def __get_cache_key(self, optimization_enabled):
+        return f"{self.lagrange_key},{optimization_enabled}"
+
+    def __resolve(self):
+        kernels = None
+        for optimization_enabled in [False, True]:
+            if LagrangeSegment._kernel_cache.has_module(self.__get_cache_key(optimization_enabled)):
+                try:
+                    kernels = self.get_kernels(optimization_enabled)
+                    break
+                except:
+                    kernels = None
+
+        if kernels != None:
+            self.__set_variables(kernels.constants, kernels.primals, kernels.duals, kernels.tx_factor_index)
+        else:
+            segment = self.get_segment()
+            self.__set_variables(
+                tuple(str(x) for x in segment.constants), 
+                tuple(str(x) for x in segment.primals), 
+                tuple(str(x) for x in segment.duals),
+                segment.tx_factor_index
+                )
+
+    def __set_variables(self, constants, primals, duals, tx_factor_index):
+        self.constants = tuple(constants)
+        self.duals = tuple(duals)
+        self.variables = tuple(primals) + self.duals
+        self.parameters = self.constants + self.variables
+        self.parameter_names = self.parameters
+        self.parameters_key = str(self.parameters)
+        self.tx_factor_index = tx_factor_index
+        self.dual_primal_map = dict(zip(self.duals, primals))
+        #Set last, get_kernels uses it to know the variables have been resolved.
+        self.primals = tuple(primals)
 
 #Basic equality constraint for an optimization
 class Eq():
@@ -211,8 +418,6 @@ class Objective():
     def __init__(self, obj_eqn) -> None:
         self.eqn = obj_eqn
 
-_lambda_ids = count(0)
-
 class TwoTerminalModelDefinition(LagrangeSegment):
     def __init__(
         self, 
@@ -241,32 +446,38 @@ class TwoTerminalModelDefinition(LagrangeSegment):
         self.equalities = equalities
         self.obj = objective
 
+        from sympy import Symbol
+
         lambdas = []
         lagrange = 0
 
+        #Numbered per definition, so the dual names of a model don't depend on import order.
+        lambda_ids = count(0)
+
         declared_symbols = constants + variables
+        Lr_from_sym, Li_from_sym, Lr_to_sym, Li_to_sym = to_symbols(Lr_from, Li_from, Lr_to, Li_to)
         
         if objective != None:
             check_missing_symbols(declared_symbols, objective.eqn)
             lagrange += objective.eqn
 
         check_missing_symbols(declared_symbols, self.kcl_r_from.constraint_eqn)
-        lambdas.append(Lr_from)
-        lagrange += Lr_from * self.kcl_r_from.constraint_eqn
+        lambdas.append(Lr_from_sym)
+        lagrange += Lr_from_sym * self.kcl_r_from.constraint_eqn
         check_missing_symbols(declared_symbols, self.kcl_r_from.constraint_eqn)
-        lambdas.append(Li_from)
-        lagrange += Li_from * self.kcl_i_from.constraint_eqn
+        lambdas.append(Li_from_sym)
+        lagrange += Li_from_sym * self.kcl_i_from.constraint_eqn
 
         check_missing_symbols(declared_symbols, self.kcl_r_to.constraint_eqn)
-        lambdas.append(Lr_to)
-        lagrange += Lr_to * -self.kcl_r_to.constraint_eqn
+        lambdas.append(Lr_to_sym)
+        lagrange += Lr_to_sym * -self.kcl_r_to.constraint_eqn
         check_missing_symbols(declared_symbols, self.kcl_i_to.constraint_eqn)
-        lambdas.append(Li_to)
-        lagrange += Li_to * -self.kcl_i_to.constraint_eqn
+        lambdas.append(Li_to_sym)
+        lagrange += Li_to_sym * -self.kcl_i_to.constraint_eqn
         
         for equality in equalities:
             check_missing_symbols(declared_symbols, equality.constraint_eqn)
-            lambda_sym = Symbol(f"lambda_{next(_lambda_ids)}")
+            lambda_sym = Symbol(f"lambda_{next(lambda_ids)}")
             lambdas.append(lambda_sym)
             lagrange += lambda_sym * equality.constraint_eqn
         
@@ -276,10 +487,13 @@ class ModelDefinition(LagrangeSegment):
     _ids = count(0)
 
     def __init__(self, variables, constants, equalities = [], objective = None):
+        from sympy import Symbol
+
         declared_symbols = constants + variables
 
         lambdas = []
         lagrange = 0
+        lambda_ids = count(0)
 
         if objective != None:
             self.check_missing_symbols(declared_symbols, objective.eqn)
@@ -287,7 +501,7 @@ class ModelDefinition(LagrangeSegment):
 
         for equality in equalities:
             self.check_missing_symbols(declared_symbols, equality.constraint_eqn)
-            lambda_sym = Symbol(f"lambda_{next(_lambda_ids)}")
+            lambda_sym = Symbol(f"lambda_{next(lambda_ids)}")
             lambdas.append(lambda_sym)
             lagrange += lambda_sym * equality.constraint_eqn
         
@@ -1,4 +1,4 @@
-from logic.stamping.lagrangesegment import LagrangeSegment, SKIP, TwoTerminalModelDefinition
+from logic.stamping.lagrangesegment import LagrangeSegment, SKIP
 from models.components.bus import Bus
 from models.wellknownvariables import Vr_from, Vi_from, Vr_to, Vi_to, Lr_from, Li_from, Lr_to, Li_to
 
@@ -29,17 +29,17 @@ class LagrangeStampDetails():
         return self._var_str_map[variable_str]
 
     def get_var_col_index(self, variable):
-        return self._var_map[variable]
+        return self._var_str_map[str(variable)]
 
     def get_var_value(self, v, variable):
-        return v[self._var_map[variable]]
+        return v[self._var_str_map[str(variable)]]
 
     def get_lambda_index(self, lambda_index):
         #A bit weird, we have to refer to the lambda as the index of the
         #associated constraint...
-        return self._var_map[self.lsegment.duals[lambda_index]]
+        return self._var_str_map[str(self.lsegment.duals[lambda_index])]
 
-def build_two_terminal_stamp_details(model: TwoTerminalModelDefinition, from_bus: Bus, to_bus: Bus, node_index, optimization_enabled: bool, index_map = None):
+def build_two_terminal_stamp_details(model, from_bus: Bus, to_bus: Bus, node_index, optimization_enabled: bool, index_map = None):
     if index_map == None:
         index_map = {}
     index_map[Vr_from] = from_bus.node_Vr
@@ -51,11 +51,11 @@ def build_two_terminal_stamp_details(model: TwoTerminalModelDefinition, from_bus
     index_map[Lr_to] = to_bus.node_lambda_Vr
     index_map[Li_to] = to_bus.node_lambda_Vi
 
-    for variable in model.primals:
+    for variable in map(str, model.primals):
         if variable not in index_map:
             index_map[variable] = next(node_index)
     
-    for dual in model.duals:
+    for dual in map(str, model.duals):
         if dual not in index_map:
             if optimization_enabled:
                 index_map[dual] = next(node_index)
@@ -1,51 +1,114 @@
 import math
+from typing import List
 from scipy.sparse import csc_matrix
 import numpy as np
-from sympy import Matrix
 from logic.powerflowsettings import PowerFlowSettings
 
+INITIAL_CAPACITY = 1024
+
+#With a batch size, every stamp carries one value per scenario. All scenarios share the
+#same pattern, so they are assembled together and only split up at the end (see: to_matrices).
 class MatrixBuilder:
-    def __init__(self, settings: PowerFlowSettings) -> None:
+    def __init__(self, settings: PowerFlowSettings, batch_size = None) -> None:
         self.settings = settings
-        self._row = []
-        self._col = []
-        self._val = []
+        self.batch_size = batch_size
+        self._row = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        self._col = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        if batch_size == None:
+            self._val = np.zeros(INITIAL_CAPACITY, dtype=np.float64)
+        else:
+            self._val = np.zeros((INITIAL_CAPACITY, batch_size), dtype=np.float64)
         self._index = 0
         self._max_index = 0
 
-    def stamp(self, row, column, value):
-        if value == 0:
-            return
+        #Once the first matrix has been built, we lock the pattern: every stamp slot is mapped
+        #to its position in the csc data array. The Y pattern is static between calls to
+        #assign_matrix (we stamp zeros rather than skipping them), so later iterations
+        #only need to scatter the values.
+        self._locked_row = None
+        self._locked_col = None
+        self._slot_positions = None
+        self._data = None
+        self._indices = None
+        self._indptr = None
+        self._shape = None
 
+    def stamp(self, row, column, value):
         if self.settings.debug:
             if type(row) != int or row < 0:
                 raise Exception("Invalid row index")
             elif type(column) != int or column < 0:
                 raise Exception("Invalid column index")
-            elif math.isnan(value) or value == None or not np.issubdtype(type(value), np.number):
+            elif value is None or not np.issubdtype(type(value), np.number) or math.isnan(value):
                 raise Exception("Invalid value")
 
-        if self._index == self._max_index:
-            self._row.append(row)
-            self._col.append(column)
-            self._val.append(value)
-            self._index += 1
-            self._max_index += 1
-            return
+        if self._index == len(self._val):
+            self.__grow(self._index + 1)
 
         self._row[self._index] = row
         self._col[self._index] = column
         self._val[self._index] = value
         self._index += 1
-        
+
+        if self._index > self._max_index:
+            self._max_index = self._index
+
+    #Stamps a batch of entries at once. rows, columns and values are equal length arrays
+    #(when batched, values has a leading scenario axis).
+    def stamp_many(self, rows, columns, values):
+        count = len(rows)
+        if count == 0:
+            return
+
+        if self.settings.debug:
+            if np.any(rows < 0):
+                raise Exception("Invalid row index")
+            elif np.any(columns < 0):
+                raise Exception("Invalid column index")
+            elif np.any(np.isnan(values)):
+                raise Exception("Invalid value")
+
+        end = self._index + count
+        if end > len(self._val):
+            self.__grow(end)
+
+        self._row[self._index:end] = rows
+        self._col[self._index:end] = columns
+        self._val[self._index:end] = np.transpose(values)
+        self._index = end
+
+        if self._index > self._max_index:
+            self._max_index = self._index
+
     def clear(self, retain_idx = 0):
         self._index = retain_idx
 
     def to_matrix(self) -> csc_matrix:
+        if self.batch_size != None:
+            raise Exception("Batched matrix builders produce one matrix per scenario (see: to_matrices)")
+
+        self.__assemble()
+
+        #The returned matrix shares its arrays with the builder, it is only valid until the next call.
+        return csc_matrix((self._data, self._indices, self._indptr), shape=self._shape, copy=False)
+
+    def to_matrices(self) -> List[csc_matrix]:
+        if self.batch_size == None:
+            return [self.to_matrix()]
+
+        self.__assemble()
+
+        return [csc_matrix((self._data[:, idx], self._indices, self._indptr), shape=self._shape) for idx in range(self.batch_size)]
+
+    def __assemble(self):
         if self.settings.debug and self._max_index != self._index:
             raise Exception("Solver was not fully utilized. Garbage data remains")
 
-        return csc_matrix((self._val, (self._row, self._col)), dtype=np.float64)
+        if not self.__is_pattern_locked():
+            self.__lock_pattern()
+
+        self._data.fill(0)
+        np.add.at(self._data, self._slot_positions, self._val[:self._index])
 
     def get_row(self, row_idx):
         for idx in range(self._index):
@@ -60,10 +123,12 @@ class MatrixBuilder:
                 yield (self._row[idx], self._val[idx])
 
     def to_symbolic_matrix(self):
+        from sympy import Matrix
+
         rows = []
-        for _ in range(max(self._row) + 1):
-            rows.append([0] * (max(self._col) + 1))
-        for (row, col, value) in zip(self._row, self._col, self._val):
+        for _ in range(self._row[:self._index].max() + 1):
+            rows.append([0] * (self._col[:self._index].max() + 1))
+        for (row, col, value) in zip(self._row[:self._index], self._col[:self._index], self._val[:self._index]):
             rows[row][col] += value
         return Matrix(rows)
 
@@ -71,13 +136,23 @@ class MatrixBuilder:
         if not self.settings.debug:
             return
 
-        if max(self._row) != max(self._col):
+        rows = self._row[:self._index]
+        cols = self._col[:self._index]
+
+        if rows.max() != cols.max():
             raise Exception("Matrix is not square")
-        
+
         if not check_zeros:
             return
 
-        matrix = csc_matrix((self._val, (self._row, self._col)))
+        values = self._val[:self._index]
+        if self.batch_size != None:
+            #Only entries that are zero for every scenario count.
+            values = np.abs(values).max(axis=1)
+
+        matrix = csc_matrix((values, (rows, cols)))
+        #Zero values are stamped to keep the pattern stable, they don't count here.
+        matrix.eliminate_zeros()
 
         if not np.all(matrix.getnnz(1)>0):
             zero_rows = np.where(matrix.getnnz(1)==0)
@@ -88,4 +163,41 @@ class MatrixBuilder:
             raise Exception(f'Column {zero_cols} is invalid')
 
     def get_usage(self):
-        return self._index
\ No newline at end of file
+        return self._index
+
+    def __grow(self, required):
+        capacity = max(required, 2 * len(self._val))
+        self._row = grow_array(self._row, capacity)
+        self._col = grow_array(self._col, capacity)
+        self._val = grow_array(self._val, capacity)
+
+    def __is_pattern_locked(self):
+        if self._slot_positions is None or len(self._slot_positions) != self._index:
+            return False
+
+        return np.array_equal(self._row[:self._index], self._locked_row) and np.array_equal(self._col[:self._index], self._locked_col)
+
+    def __lock_pattern(self):
+        rows = self._row[:self._index].copy()
+        cols = self._col[:self._index].copy()
+
+        n_rows = rows.max() + 1
+        n_cols = cols.max() + 1
+
+        #Sorting on (col, row) gives the csc ordering, duplicates end up next to each other.
+        keys = cols * n_rows + rows
+        unique_keys, slot_positions = np.unique(keys, return_inverse=True)
+
+        self._indices = (unique_keys % n_rows).astype(np.int32)
+        self._indptr = np.searchsorted(unique_keys // n_rows, np.arange(n_cols + 1)).astype(np.int32)
+        self._data = np.zeros((len(unique_keys),) + self._val.shape[1:], dtype=np.float64)
+        self._shape = (n_rows, n_cols)
+
+        self._slot_positions = slot_positions
+        self._locked_row = rows
+        self._locked_col = cols
+
+def grow_array(array, capacity):
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
@@ -1,16 +1,20 @@
+from array import array
 from typing import List, Dict
 import numpy as np
 from logic.residualdetails import ResidualDetails
 from logic.stamping.lagrangestampdetails import SKIP, LagrangeStampDetails
 from logic.stamping.lagrangesegment import LagrangeSegment
+from logic.stamping.lagrangekernel import LagrangeKernel
 from logic.stamping.matrixbuilder import MatrixBuilder
-from models.wellknownvariables import tx_factor
 
 #All of the constants and variables that will be used to calculate a stamp. The set of parameters
 #will be different for each instance of a model, but the shape will be the same based on the expression.
 #If multiple expressions are all derived from the same underlying equation, then
 #the expressions can utilize the same set of inputs (because they will share constants and variables).
+#Stamp records are created for every instance of every model, so they are slotted and keyed by tuples.
 class StampInput():
+    __slots__ = ("constant_vals", "primal_indexes", "dual_indexes", "key")
+
     def __init__(
         self,
         constant_vals: List,
@@ -23,55 +27,51 @@ class StampInput():
         self.primal_indexes = primal_indexes
         self.dual_indexes = dual_indexes
         
-        self.key = str(constant_vals) + str(primal_indexes) + str(dual_indexes)
+        self.key = (tuple(constant_vals), tuple(primal_indexes), tuple(dual_indexes))
 
 class ResidualExpression():
-    def __init__(self, first_order, first_order_str, expr, expr_eval):
-        self.first_order = first_order
+    def __init__(self, first_order_str, kernel: LagrangeKernel, kernel_index: int):
         self.first_order_str = first_order_str
-        self.expr = expr
-        self.expr_eval = expr_eval
+        self.kernel = kernel
+        self.kernel_index = kernel_index
 
 #A stamp expression is shared across all instances of a model, and constains details about the equation actually being computed.
 class StampExpression():
     def __init__(
         self,
         lsegment: LagrangeSegment,
-        first_order,
         first_order_str,
-        expression,
-        evalf,
-        yth_variable,
+        yth_variable_str,
         is_linear: bool,
         tx_factor_index: int,
-        is_constant_expr: bool
+        is_constant_expr: bool,
+        kernel: LagrangeKernel,
+        kernel_index: int
         ):
 
         self.lsegment = lsegment
-        self.first_order = first_order
         self.first_order_str = first_order_str
-        self.expression = expression
-        self.evalf = evalf
         self.parameters = lsegment.parameters
         self.param_count = len(self.parameters)
         self.is_linear = is_linear
-        self.yth_variable = yth_variable
+        self.yth_variable_str = yth_variable_str
         self.tx_factor_index = tx_factor_index
         self.is_constant_expr = is_constant_expr
 
-        if is_constant_expr:
-            self.yth_variable_str = None
-        else:
-            self.yth_variable_str = str(yth_variable)
+        #The expression is evaluated as output kernel_index of the segment's fused kernel.
+        self.kernel = kernel
+        self.kernel_index = kernel_index
 
         self.parameters_key = lsegment.parameters_key
 
-        self.key = lsegment.lagrange_key + str(first_order) + str(yth_variable) + str(is_linear) + str(tx_factor_index)
+        self.key = lsegment.lagrange_key + str(first_order_str) + str(yth_variable_str) + str(is_linear) + str(tx_factor_index)
 
 # Multiple stamp instances exist for every single model instance, based on the number of expressions to compute,
 # e.g. each load instance will share the expressions/equations being computed with all other loads, 
 # but each will have their own variable values and target location in the Y or J where the result will be placed.
 class StampInstance():
+    __slots__ = ("expression", "input", "row_index", "col_index")
+
     def __init__(
         self,
         expression: StampExpression,
@@ -87,48 +87,102 @@ class StampInstance():
         self.col_index = col_index
 
 class ResidualInstance():
+    __slots__ = ("expression", "lsegment", "row_index", "input")
+
     def __init__(
         self,
+        expression: ResidualExpression,
         lsegment: LagrangeSegment,
-        first_order,
-        first_order_str: str,
         row_index: int,
-        input: StampInput,
-        expr,
-        expr_eval
+        input: StampInput
         ):
         
+        #Shared by every instance of the segment (see: get_or_build_stamp_expressions).
+        self.expression = expression
         self.lsegment = lsegment
-        self.first_order = first_order
-        self.first_order_str = first_order_str
         self.row_index = row_index
         self.input = input
-        self.expr = expr
-        self.expr_eval = expr_eval
 
 class StampCollection():
+    __slots__ = ("model", "lsegment", "stamps", "residuals", "input")
+
     def __init__(self, 
         model,
         lsegment,
         stamps: List[StampInstance], 
-        residuals: List[ResidualInstance]
+        residuals: List[ResidualInstance],
+        input: StampInput = None
         ):
 
         self.model = model
         self.lsegment = lsegment
         self.stamps = stamps
         self.residuals = residuals
+        self.input = input
 
+    #Two collections have the same structure if they would stamp into the same Y/J locations,
+    #meaning only their constants can differ.
+    def has_same_structure(self, other: 'StampCollection'):
+        return self.lsegment.lagrange_key == other.lsegment.lagrange_key \
+            and len(self.stamps) == len(other.stamps) \
+            and len(self.residuals) == len(other.residuals) \
+            and self.input.primal_indexes == other.input.primal_indexes \
+            and self.input.dual_indexes == other.input.dual_indexes \
+            and len(self.input.constant_vals) == len(other.input.constant_vals)
+
+#Array-backed stamps for many instances of the same segment, in place of one StampCollection per instance.
+#Row k of the constants and of every index array belongs to instance k. Index arrays are keyed by
+#variable name, SKIP locations (e.g. ground) are given as -1.
+class StampBatch():
+    def __init__(
+        self,
+        lsegment,
+        constant_vals: np.ndarray,
+        var_indexes: Dict[str, np.ndarray],
+        eqn_indexes: Dict[str, np.ndarray] = None
+        ):
+
+        self.lsegment = lsegment
+        self.constant_vals = constant_vals
+        self.var_indexes = var_indexes
+        #As with LagrangeStampDetails, the equation (row) map defaults to the variable (column) map.
+        self.eqn_indexes = var_indexes if eqn_indexes == None else eqn_indexes
+
+    def __len__(self):
+        return len(self.constant_vals)
+
+    def get_var_col_indexes(self, variable_str):
+        return self.var_indexes[variable_str]
+
+    def get_eqn_row_indexes(self, variable_str, optimization_enabled):
+        if optimization_enabled:
+            return self.eqn_indexes[variable_str]
+        else:
+            return self.eqn_indexes[self.lsegment.get_duals_corresponding_primal(variable_str)]
+
+def build_matrix_stamper(network, batch_size = None):
+    optimization_enabled = network.optimization != None
 
-def build_matrix_stamper(network):
     stamps = []
+    element_stamps = {}
+    #Element types that stamp all of their instances at once (see: StampBatch).
+    batched_elements = {}
     for element in network.get_all_elements():
-        stamps += element.get_stamps()
+        if hasattr(element, "get_stamp_batches"):
+            batched_elements.setdefault(type(element), []).append(element)
+            continue
+
+        element_stamps[element] = element.get_stamps()
+        stamps += element_stamps[element]
     
     if network.optimization != None:
         stamps += network.optimization.get_stamps()
 
-    return MatrixStamper(stamps, network.optimization != None)
+    stamp_batches = []
+    for element_type, elements in batched_elements.items():
+        stamp_batches += element_type.get_stamp_batches(elements)
+
+    return MatrixStamper(stamps, optimization_enabled, element_stamps, batch_size, stamp_batches)
 
 def build_stamps_from_stampers(model, *args):
     stamps = []
@@ -145,7 +199,7 @@ def build_stamps_from_stamper(model, stamper: LagrangeStampDetails, constant_val
 lagrange_cache = {}
 
 def get_or_build_stamp_expressions(lsegment: LagrangeSegment, optimization_enabled):
-    key = lsegment.lagrange_key + str(optimization_enabled)
+    key = (lsegment.lagrange_key, optimization_enabled)
 
     if key in lagrange_cache:
         return lagrange_cache[key]
@@ -154,30 +208,25 @@ def get_or_build_stamp_expressions(lsegment: LagrangeSegment, optimization_enabl
     residual_exprs: List[ResidualExpression]
     stamp_exprs = []
     stamp_exprs: List[StampExpression]
-    if optimization_enabled:
-        first_order_variables = lsegment.variables
-    else:
-        first_order_variables = lsegment.duals
-
-    for first_order in first_order_variables:
-        derivative = lsegment.get_derivatives()[first_order]
-
-        residual_exprs.append(ResidualExpression(derivative.variable, derivative.variable_str, derivative.expr, derivative.expr_eval))
-
-        for entry in derivative.get_evals():
-            expression = StampExpression(
-                lsegment,
-                derivative.variable,
-                derivative.variable_str,
-                entry.expr,
-                entry.func,
-                entry.yth_variable,
-                entry.is_linear,
-                lsegment.tx_factor_index,
-                entry.is_constant_expr
-                )
-            
-            stamp_exprs.append(expression)
+
+    kernels = lsegment.get_kernels(optimization_enabled)
+
+    for first_order_str, yth_variable_str, is_linear, is_constant_expr, kernel_index in kernels.stamps:
+        expression = StampExpression(
+            lsegment,
+            first_order_str,
+            yth_variable_str,
+            is_linear,
+            lsegment.tx_factor_index,
+            is_constant_expr,
+            kernels.linear_kernel if is_linear else kernels.nonlinear_kernel,
+            kernel_index
+            )
+        
+        stamp_exprs.append(expression)
+
+    for first_order_str, kernel_index in kernels.residuals:
+        residual_exprs.append(ResidualExpression(first_order_str, kernels.nonlinear_kernel, kernel_index))
     
     lagrange_cache[key] = (stamp_exprs, residual_exprs)
     
@@ -195,7 +244,7 @@ def __build_stampcollection_from_stamper(model, stamper: LagrangeStampDetails, c
 
     residuals = __build_residuals(stamper, residuals_exprs, input)
 
-    return StampCollection(model, stamper.lsegment, stamps, residuals)
+    return StampCollection(model, stamper.lsegment, stamps, residuals, input)
 
 def __build_stamps(stamper: LagrangeStampDetails, expressions: List[StampExpression], input: StampInput):
     stamps = []
@@ -230,30 +279,31 @@ def __build_residuals(stamper: LagrangeStampDetails, residual_exprs: List[Residu
         if row_index == SKIP:
             continue
         residual = ResidualInstance(
+            residual_expr,
             stamper.lsegment, 
-            residual_expr.first_order, 
-            residual_expr.first_order_str, 
             row_index, 
-            input, 
-            residual_expr.expr, 
-            residual_expr.expr_eval
+            input
             )
         residuals.append(residual)
 
     return residuals
 
 #Constructs the input matrix for a particular expression based on the set of stamp inputs.
+#With a batch size, every argument gets a leading scenario axis, so that each kernel
+#evaluates all scenarios and all instances in one go.
 class InputBuilder():
     def __init__(
         self, 
         variables,
         tx_factor_index: int,
-        optimization_enabled: bool
+        optimization_enabled: bool,
+        batch_size = None
         ):
         
         self.variables = variables
         self.tx_factor_index = tx_factor_index
         self.optimization_enabled = optimization_enabled
+        self.batch_size = batch_size
 
         self.arg_count = len(variables)
 
@@ -262,128 +312,304 @@ class InputBuilder():
 
         self.input_indexes = []
 
+        #(first instance index, constants, primal indexes, dual indexes) of every stamp batch.
+        self.batches = []
+
+        #Keys that were added by more than one input object, these can't be updated in place.
+        self.shared_keys = set()
+
         # We utilize this to know if we actually need to update our previous iteration information.
         self.iteration_num = -1
+        self.tx_factor = None
+
+        #Incremented whenever the arguments change, so kernel outputs can be reused until then.
+        self.version = 0
     
     def add_input(self, input: StampInput):
         if input.key not in self.inputs:
             self.input_indexes.append(input.key)
             self.inputs[input.key] = (input, len(self.input_indexes) - 1)
+        elif self.inputs[input.key][0] is not input:
+            self.shared_keys.add(input.key)
         
         return self.inputs[input.key][1]
 
+    #Adds every instance of a stamp batch, returning their instance indexes. Batched inputs are never shared.
+    def add_batch(self, stamp_batch: StampBatch, primal_indexes: np.ndarray, dual_indexes: np.ndarray):
+        start = len(self.input_indexes)
+        #Batched instances have no StampInput (or key), only a place in the argument matrix.
+        self.input_indexes.extend([None] * len(stamp_batch))
+        self.batches.append((start, stamp_batch.constant_vals, primal_indexes, dual_indexes))
+        
+        return np.arange(start, start + len(stamp_batch), dtype=np.int64)
+
+    #True if the input's instance isn't shared with any other input, so it can be modified on its own.
+    def owns_input(self, input: StampInput):
+        if input.key not in self.inputs or input.key in self.shared_keys:
+            return False
+        
+        return self.inputs[input.key][0] is input
+
+    def can_replace_input(self, old_input: StampInput, new_input: StampInput):
+        if not self.owns_input(old_input):
+            return False
+
+        return new_input.key == old_input.key or new_input.key not in self.inputs
+
+    #Swaps the constants of a frozen input in place, the primal and dual indexes must be unchanged.
+    def replace_input(self, old_input: StampInput, new_input: StampInput):
+        _, instance_idx = self.inputs.pop(old_input.key)
+        self.inputs[new_input.key] = (new_input, instance_idx)
+        self.input_indexes[instance_idx] = new_input.key
+
+        self.set_constants(instance_idx, new_input.constant_vals)
+
+    #Overwrites the constants of a single instance, either for all scenarios or just one of them.
+    def set_constants(self, instance_idx, constant_vals, batch_index = None):
+        constant_vals = np.array(constant_vals, dtype=np.float64)
+        constant_count = len(constant_vals)
+
+        if self.batch_size == None:
+            self.arg_matrix[:constant_count, instance_idx] = constant_vals
+        elif batch_index == None:
+            self.arg_matrix[:constant_count, :, instance_idx] = constant_vals[:, np.newaxis]
+        else:
+            self.arg_matrix[:constant_count, batch_index, instance_idx] = constant_vals
+
+        #The tx factor is supplied as one of the constants, so it has to be reapplied.
+        if self.tx_factor_index != SKIP and self.tx_factor != None:
+            self.args[self.tx_factor_index][..., instance_idx] = self.tx_factor
+
+        self.version += 1
+
+    def get_instance_index(self, input: StampInput):
+        return self.inputs[input.key][1]
+
     def freeze_inputs(self):
         #Somewhat counter-intuitively, the row is the argument index
         #and the column is the stamp instance's index.
-        self.args = [np.zeros(len(self.inputs)) for x in range(self.arg_count)]
-        self.input_fills = []
+        #All arguments live in a single 2-D matrix, so each argument handed to the evaluation functions is a contiguous row view.
+        instance_count = len(self.input_indexes)
+        self.arg_matrix = np.zeros((self.arg_count, instance_count))
+        self.args = [self.arg_matrix[arg_index] for arg_index in range(self.arg_count)]
+        input_fills = [([], []) for _ in range(self.arg_count)]
+
+        for instance_idx, input_key in enumerate(self.input_indexes):
+            if input_key == None:
+                continue
 
-        instance_idx = 0
-        for input_key in self.input_indexes:
             input, _ = self.inputs[input_key]
             arg_index = 0
 
             for constant_val in input.constant_vals:
-                self.args[arg_index][instance_idx] = constant_val
+                self.arg_matrix[arg_index, instance_idx] = constant_val
                 arg_index += 1
             
             #The row and column to use for the input array, not to be confused with the row and column of the Y matrix
             for v_idx in input.primal_indexes:
                 if v_idx != None:
-                    self.input_fills.append((arg_index, instance_idx, v_idx))
+                    input_fills[arg_index][0].append(instance_idx)
+                    input_fills[arg_index][1].append(v_idx)
                 arg_index += 1
 
             for v_idx in input.dual_indexes:
                 if v_idx != None:
                     if self.optimization_enabled:
-                        self.input_fills.append((arg_index, instance_idx, v_idx))
+                        input_fills[arg_index][0].append(instance_idx)
+                        input_fills[arg_index][1].append(v_idx)
                     else:
-                        self.args[arg_index][instance_idx] = None
+                        self.arg_matrix[arg_index, instance_idx] = None
                 arg_index += 1
             
             if arg_index != self.arg_count:
                 raise Exception("Length mismatch in parameter inputs for stamp")
-                
-            instance_idx += 1
+
+        batch_fills = [([], []) for _ in range(self.arg_count)]
+        for start, constant_vals, primal_indexes, dual_indexes in self.batches:
+            constant_count = constant_vals.shape[1]
+            if constant_count + primal_indexes.shape[1] + dual_indexes.shape[1] != self.arg_count:
+                raise Exception("Length mismatch in parameter inputs for stamp batch")
+
+            end = start + len(constant_vals)
+            self.arg_matrix[:constant_count, start:end] = constant_vals.T
+
+            for offset, v_idxs in enumerate(primal_indexes.T):
+                is_used = v_idxs >= 0
+                batch_fills[constant_count + offset][0].append(np.flatnonzero(is_used) + start)
+                batch_fills[constant_count + offset][1].append(v_idxs[is_used])
+
+            for offset, v_idxs in enumerate(dual_indexes.T):
+                arg_index = constant_count + primal_indexes.shape[1] + offset
+                is_used = v_idxs >= 0
+                if self.optimization_enabled:
+                    batch_fills[arg_index][0].append(np.flatnonzero(is_used) + start)
+                    batch_fills[arg_index][1].append(v_idxs[is_used])
+                else:
+                    self.arg_matrix[arg_index, np.flatnonzero(is_used) + start] = None
+
+        #Compiled into (arg_index, instance indexes, v indexes) so updating from v_prev is a single gather per argument.
+        self.input_fills = []
+        for arg_index, (instance_idxs, v_idxs) in enumerate(input_fills):
+            instance_idxs = np.concatenate([np.array(instance_idxs, dtype=np.int64)] + batch_fills[arg_index][0])
+            v_idxs = np.concatenate([np.array(v_idxs, dtype=np.int64)] + batch_fills[arg_index][1])
+            if len(instance_idxs) == 0:
+                continue
+            order = np.argsort(instance_idxs, kind="stable")
+            instance_idxs = instance_idxs[order]
+            v_idxs = v_idxs[order]
+            if np.array_equal(instance_idxs, np.arange(instance_count)):
+                #Every instance is filled, which lets us skip the scatter on the argument side.
+                instance_idxs = slice(None)
+            self.input_fills.append((arg_index, instance_idxs, v_idxs))
+
+        if self.batch_size != None:
+            #Every scenario starts out with the same constants.
+            self.arg_matrix = np.repeat(self.arg_matrix[:, np.newaxis, :], self.batch_size, axis=1)
+            self.args = [self.arg_matrix[arg_index] for arg_index in range(self.arg_count)]
 
     def update_vprev(self, v_prev, iteration_num):
         if iteration_num == self.iteration_num:
             return
         
-        for arg_index, instance_idx, v_idx in self.input_fills:
-            self.args[arg_index][instance_idx] = v_prev[v_idx]
+        #When batched, v_prev holds one row per scenario.
+        for arg_index, instance_idxs, v_idxs in self.input_fills:
+            self.args[arg_index][..., instance_idxs] = v_prev[..., v_idxs]
             
         self.iteration_num = iteration_num
+        self.version += 1
         
     def update_txfactor(self, tx_factor):
-        if self.tx_factor_index != SKIP:
+        if self.tx_factor_index != SKIP and tx_factor != self.tx_factor:
             self.args[self.tx_factor_index][:] = tx_factor
+            self.tx_factor = tx_factor
+            self.version += 1
 
     def get_args(self):
         return self.args
 
+    def get_arg_matrix(self):
+        return self.arg_matrix
+
+#Evaluates a fused kernel over the inputs of an input builder. All stamp and residual sets
+#pointing at the same kernel share one evaluation for as long as the inputs are unchanged.
+class KernelEvaluator():
+    def __init__(self, kernel: LagrangeKernel, input_builder: InputBuilder) -> None:
+        self.kernel = kernel
+        self.input_builder = input_builder
+
+        self.version = None
+        self.outputs = None
+
+    def evaluate(self):
+        if self.version == self.input_builder.version:
+            return self.outputs
+
+        args = self.input_builder.get_args()
+        output_shape = args[0].shape
+
+        outputs = self.kernel.evaluate(args)
+        #Expressions that reduce to a constant come back as scalars.
+        self.outputs = [x if type(x) == np.ndarray else np.full(output_shape, x, dtype=np.float64) for x in outputs]
+        self.version = self.input_builder.version
+
+        return self.outputs
+
 #Responsible for stamping a set of stamp instances that share an expression
 class StampSet():
     def __init__(
         self, 
         expression: StampExpression, 
-        input_builder: InputBuilder
+        input_builder: InputBuilder,
+        evaluator: KernelEvaluator
         ):
 
         self.expression = expression
         self.input_builder = input_builder
+        self.evaluator = evaluator
+
+        #Y/J locations and kernel outputs of the individual stamps, kept as compact integer arrays.
+        self.stamp_rows = array("q")
+        self.stamp_cols = array("q")
+        self.stamp_outputs = array("q")
 
-        self.stamps = []
-        self.stamps: List[(StampInstance, int, int, int)]
+        #(row indexes, column indexes, output indexes) of the stamp batches.
+        self.batches = []
 
     def add_stamp(self, stamp: StampInstance):
         output_index = self.input_builder.add_input(stamp.input)
-        self.stamps.append((stamp, stamp.row_index, stamp.col_index, output_index))
+        self.stamp_rows.append(stamp.row_index)
+        #Column index is ignored for J stamps.
+        self.stamp_cols.append(-1 if stamp.col_index == None else stamp.col_index)
+        self.stamp_outputs.append(output_index)
+
+    def add_batch(self, row_indexes, col_indexes, output_indexes):
+        self.batches.append((row_indexes, col_indexes, output_indexes))
+
+    def freeze(self):
+        #Index arrays so that all stamps in the set can be scattered into Y or J in one go.
+        self.row_indexes = np.concatenate([np.frombuffer(self.stamp_rows, dtype=np.int64)] + [x[0] for x in self.batches])
+        if self.expression.is_constant_expr:
+            self.col_indexes = None
+        else:
+            self.col_indexes = np.concatenate([np.frombuffer(self.stamp_cols, dtype=np.int64)] + [x[1] for x in self.batches])
+        self.output_indexes = np.concatenate([np.frombuffer(self.stamp_outputs, dtype=np.int64)] + [x[2] for x in self.batches])
 
     def stamp(self, Y: MatrixBuilder, J):
-        args = self.input_builder.get_args()
+        output_v = self.evaluator.evaluate()[self.expression.kernel_index]
 
-        output_v = self.expression.evalf(*args)
-        if type(output_v) != np.ndarray:
-            output_v = np.full(args[0].shape[0], output_v)
+        #The leading scenario axis (if any) is carried through to Y and J.
+        values = output_v[..., self.output_indexes]
 
-        if self.expression.yth_variable == None:
-            for _, row_idx, _, output_idx in self.stamps:
-                J[row_idx] += output_v[output_idx]
+        if self.expression.is_constant_expr:
+            np.add.at(J, (Ellipsis, self.row_indexes), values)
         else:
-            for _, row_idx, col_idx, output_idx in self.stamps:
-                Y.stamp(row_idx, col_idx, output_v[output_idx])
+            Y.stamp_many(self.row_indexes, self.col_indexes, values)
 
 class ResidualSet():
-    def __init__(self, residual_expr, residual_eval, input_builder: InputBuilder) -> None:
-        self.residual_expr = residual_expr
-        self.residual_eval = residual_eval
+    def __init__(self, first_order_str, kernel_index: int, input_builder: InputBuilder, evaluator: KernelEvaluator) -> None:
+        self.first_order_str = first_order_str
+        self.kernel_index = kernel_index
         self.input_builder = input_builder
+        self.evaluator = evaluator
+
+        self.residual_rows = array("q")
+        self.residual_outputs = array("q")
 
-        self.residuals = []
+        #(row indexes, output indexes) of the stamp batches.
+        self.batches = []
     
-    def add_residual(self, model, residual: ResidualInstance):
+    def add_residual(self, residual: ResidualInstance):
         output_index = self.input_builder.add_input(residual.input)
-        self.residuals.append((model, residual, output_index))
+        self.residual_rows.append(residual.row_index)
+        self.residual_outputs.append(output_index)
 
-    def calc_residuals(self):
-        args = self.input_builder.get_args()
+    def add_batch(self, row_indexes, output_indexes):
+        self.batches.append((row_indexes, output_indexes))
 
-        output_v = self.residual_eval(*args)
-        if type(output_v) != np.ndarray:
-            output_v = np.full(args[0].shape[0], output_v)
+    def freeze(self):
+        self.row_indexes = np.concatenate([np.frombuffer(self.residual_rows, dtype=np.int64)] + [x[0] for x in self.batches])
+        self.output_indexes = np.concatenate([np.frombuffer(self.residual_outputs, dtype=np.int64)] + [x[1] for x in self.batches])
 
-        for model, residual, output_index in self.residuals:
-            yield (model, residual.row_index, output_v[output_index])
+    def calc_residuals(self, residuals):
+        output_v = self.evaluator.evaluate()[self.kernel_index]
+
+        np.add.at(residuals, (Ellipsis, self.row_indexes), output_v[..., self.output_indexes])
 
 class MatrixStamper():
     def __init__(
         self,
         stampcollections: List[StampCollection],
-        optimization_enabled: bool
+        optimization_enabled: bool,
+        element_stamps: Dict = None,
+        batch_size = None,
+        stamp_batches: List[StampBatch] = None
         ):
 
         self.optimization_enabled = optimization_enabled
+        self.batch_size = batch_size
+
+        #The stamp collections of each network element, so that elements can be restamped individually.
+        self.element_stamps = element_stamps if element_stamps != None else {}
 
         input_builders = {}
         input_builders: Dict[str, InputBuilder]
@@ -392,33 +618,80 @@ class MatrixStamper():
         stamp_sets: Dict[str, StampSet]
 
         residual_sets = {}
-        residual_sets: Dict[str, ResidualSet]
+        residual_sets: Dict[ResidualExpression, ResidualSet]
+
+        evaluators = {}
+        evaluators: Dict[tuple, KernelEvaluator]
+
+        def get_input_builder(lsegment: LagrangeSegment):
+            if lsegment.parameters_key not in input_builders:
+                input_builders[lsegment.parameters_key] = InputBuilder(lsegment.parameters, lsegment.tx_factor_index, self.optimization_enabled, self.batch_size)
+            return input_builders[lsegment.parameters_key]
+
+        def get_evaluator(kernel: LagrangeKernel, input_builder: InputBuilder):
+            evaluator_key = (id(kernel), id(input_builder))
+            if evaluator_key not in evaluators:
+                evaluators[evaluator_key] = KernelEvaluator(kernel, input_builder)
+            return evaluators[evaluator_key]
+
+        def get_stamp_set(expression: StampExpression):
+            if expression.key not in stamp_sets:
+                input_builder = get_input_builder(expression.lsegment)
+                stamp_sets[expression.key] = StampSet(expression, input_builder, get_evaluator(expression.kernel, input_builder))
+            return stamp_sets[expression.key]
+
+        #Residual expressions are shared by all instances of a segment, so the expression itself is the key.
+        def get_residual_set(lsegment: LagrangeSegment, residual_expr: ResidualExpression):
+            if not residual_expr in residual_sets:
+                input_builder = get_input_builder(lsegment)
+                residual_sets[residual_expr] = ResidualSet(
+                    residual_expr.first_order_str,
+                    residual_expr.kernel_index,
+                    input_builder,
+                    get_evaluator(residual_expr.kernel, input_builder)
+                    )
+            return residual_sets[residual_expr]
 
         for stampcollection in stampcollections:
             for stamp in stampcollection.stamps:
-                if stamp.expression.parameters_key not in input_builders:
-                    input_builders[stamp.expression.parameters_key] = InputBuilder(stamp.expression.parameters, stamp.expression.tx_factor_index, self.optimization_enabled)
-
-                if stamp.expression.key not in stamp_sets:
-                    stamp_sets[stamp.expression.key] = StampSet(stamp.expression, input_builders[stamp.expression.parameters_key])
-                
-                stamp_sets[stamp.expression.key].add_stamp(stamp)
+                get_stamp_set(stamp.expression).add_stamp(stamp)
 
             for residual in stampcollection.residuals:
-                residual_key = residual.lsegment.lagrange_key + residual.first_order_str
-                if not residual_key in residual_sets:
-                    derivative = residual.lsegment.get_derivatives()[residual.first_order]
-                    residual_sets[residual_key] = ResidualSet(
-                        derivative.expr,
-                        derivative.expr_eval,
-                        input_builders[stamp.expression.parameters_key]
-                        )
-                
-                residual_sets[residual_key].add_residual(stampcollection.model, residual)
+                get_residual_set(residual.lsegment, residual.expression).add_residual(residual)
+
+        for stamp_batch in (stamp_batches if stamp_batches != None else []):
+            if len(stamp_batch) == 0:
+                continue
+
+            lsegment = stamp_batch.lsegment
+            primal_indexes = np.column_stack([stamp_batch.get_var_col_indexes(str(primal)) for primal in lsegment.primals])
+            dual_indexes = np.column_stack([stamp_batch.get_var_col_indexes(str(dual)) for dual in lsegment.duals])
+            output_indexes = get_input_builder(lsegment).add_batch(stamp_batch, primal_indexes, dual_indexes)
+
+            stamp_exprs, residual_exprs = get_or_build_stamp_expressions(lsegment, self.optimization_enabled)
+
+            for expression in stamp_exprs:
+                row_indexes = stamp_batch.get_eqn_row_indexes(expression.first_order_str, self.optimization_enabled)
+                is_used = row_indexes >= 0
+                if expression.is_constant_expr:
+                    col_indexes = None
+                else:
+                    col_indexes = stamp_batch.get_var_col_indexes(expression.yth_variable_str)
+                    is_used &= col_indexes >= 0
+                    col_indexes = col_indexes[is_used]
+
+                get_stamp_set(expression).add_batch(row_indexes[is_used], col_indexes, output_indexes[is_used])
+
+            for residual_expr in residual_exprs:
+                row_indexes = stamp_batch.get_eqn_row_indexes(residual_expr.first_order_str, self.optimization_enabled)
+                is_used = row_indexes >= 0
+
+                get_residual_set(lsegment, residual_expr).add_batch(row_indexes[is_used], output_indexes[is_used])
 
         for input_builder in input_builders.values():
             input_builder.freeze_inputs()
 
+        self.input_builders_by_key = input_builders
         self.input_builders = input_builders.values()
         self.linear_sets = []
         self.linear_sets: List[StampSet]
@@ -434,6 +707,78 @@ class MatrixStamper():
         self.residual_sets = list(residual_sets.values())
         self.residual_sets: List[ResidualSet]
 
+        for stamp_set in stamp_sets.values():
+            stamp_set.freeze()
+
+        for residual_set in self.residual_sets:
+            residual_set.freeze()
+
+    #Refreshes the stamps of a single element (e.g. after a device adjustment) without rebuilding everything.
+    #This is only possible when the element still stamps into the same locations, i.e. when only constants
+    #changed. Returns False if the stamper has to be rebuilt instead.
+    def try_update_element(self, element):
+        matched = self.__match_element_inputs(element)
+        if matched == None:
+            return False
+
+        new_collections, replacements = matched
+
+        for input_builder, old_input, new_input in replacements:
+            if not input_builder.can_replace_input(old_input, new_input):
+                return False
+
+        for input_builder, old_input, new_input in replacements:
+            input_builder.replace_input(old_input, new_input)
+
+        self.element_stamps[element] = new_collections
+
+        return True
+
+    #For batched stampers: applies the element's current constants to a single scenario only.
+    def set_element_scenario(self, element, batch_index):
+        matched = self.__match_element_inputs(element)
+        if matched == None:
+            raise Exception(f"Stamps of {element} changed structure, can't be set per scenario")
+
+        _, replacements = matched
+
+        for input_builder, old_input, new_input in replacements:
+            if not input_builder.owns_input(old_input):
+                raise Exception(f"Stamps of {element} are shared with another element, can't be set per scenario")
+
+        for input_builder, old_input, new_input in replacements:
+            input_builder.set_constants(input_builder.get_instance_index(old_input), new_input.constant_vals, batch_index)
+
+    #Pairs the element's stamped inputs with its current ones, None if they no longer stamp into the same locations.
+    def __match_element_inputs(self, element):
+        if element not in self.element_stamps:
+            return None
+
+        old_collections = self.element_stamps[element]
+        new_collections = element.get_stamps()
+
+        if len(old_collections) != len(new_collections):
+            return None
+
+        replacements = []
+        for old_collection, new_collection in zip(old_collections, new_collections):
+            if not old_collection.has_same_structure(new_collection):
+                return None
+
+            if len(old_collection.stamps) == 0 and len(old_collection.residuals) == 0:
+                #Nothing from this collection made it into the stamper.
+                continue
+
+            input_builder = self.input_builders_by_key[old_collection.lsegment.parameters_key]
+            replacements.append((input_builder, old_collection.input, new_collection.input))
+
+        return new_collections, replacements
+
+    #Called at the start of every solve, so the first iteration always picks up the new initial conditions.
+    def reset_iterations(self):
+        for input_builder in self.input_builders:
+            input_builder.iteration_num = -1
+
     def stamp_linear(self, Y: MatrixBuilder, J, tx_factor):
         for input_builder in self.input_builders:
             input_builder.update_txfactor(tx_factor)
@@ -448,20 +793,18 @@ class MatrixStamper():
         for stamp_set in self.nonlinear_sets:
             stamp_set.stamp(Y, J)
 
-    def __calc_residuals_iter(self, tx_factor, v_result, iteration_num):
+    def calc_residuals(self, tx_factor, v_result, iteration_num):
         for input_builder in self.input_builders:
             input_builder.update_vprev(v_result, iteration_num)
         
         for input_builder in self.input_builders:
             input_builder.update_txfactor(tx_factor)
-        
+
+        residuals = np.zeros(np.shape(v_result))
         for residual_set in self.residual_sets:
-            for contribution in residual_set.calc_residuals():
-                yield contribution
+            residual_set.calc_residuals(residuals)
 
-    def calc_residuals(self, tx_factor, v_result, iteration_num):
-        residual_contributions = []
-        for contribution in self.__calc_residuals_iter(tx_factor, v_result, iteration_num):
-            residual_contributions.append(contribution)
+        if self.batch_size != None:
+            return [ResidualDetails(scenario_residuals) for scenario_residuals in residuals]
         
-        return ResidualDetails(residual_contributions, len(v_result))
\ No newline at end of file
+        return ResidualDetails(residuals)
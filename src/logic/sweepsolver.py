@@ -0,0 +1,146 @@
+import numpy as np
+import networkx as nx
+from scipy.sparse import csc_matrix
+from scipy.sparse.csgraph import breadth_first_order
+from scipy.sparse.linalg import splu
+from logic.graphanalyzer import GraphAnalyzer
+from logic.network.networkmodel import NetworkModel
+from logic.nrsolver import NRSolver
+from logic.powerflowsettings import PowerFlowSettings
+from logic.stamping.matrixbuilder import MatrixBuilder
+from logic.stamping.matrixstamper import MatrixStamper
+from termcolor import colored
+
+#The sweep is abandoned (in favour of Newton-Raphson) once the residual grows this much past the initial residual.
+DIVERGENCE_FACTOR = 1e3
+
+#Current injection forward/backward sweep for radial three-phase networks.
+#The linear part of the network (line admittances, transformers, the slack, ...) is factorized once per solve,
+#with its variables ordered breadth first from the slack and then reversed, so every elimination step removes a
+#leaf of the feeder tree and the factorization has (next to) no fill. The nonlinear devices (mostly loads) are
+#then treated as current injections: each iteration evaluates the mismatch currents at the present voltages and
+#corrects the voltages with one backward (towards the slack) and one forward (away from the slack) substitution.
+#Every iteration is linear in the size of the feeder, but convergence is linear rather than quadratic, so
+#meshed networks and sweeps that stall are handed over to the Newton-Raphson solver.
+class SweepSolver:
+    def __init__(self, settings: PowerFlowSettings, network: NetworkModel, nrsolver: NRSolver, graph_analyzer: GraphAnalyzer = None):
+        self.settings = settings
+        self.network = network
+        self.nrsolver = nrsolver
+
+        self.is_radial = network.is_three_phase and network.optimization == None and is_radial_network(network, graph_analyzer)
+
+        self.matrix_builder = None
+        self.matrix_builder_stamper = None
+
+        #Elimination order of the variables, reused for as long as the matrix map is the same.
+        self.order = None
+        self.order_version = None
+
+        #Useful for diagnostics, the number of solves handed over to Newton-Raphson.
+        self.fallback_count = 0
+
+    def run_powerflow(self, matrix_stamper: MatrixStamper, v_init, tx_factor, max_iters = None):
+        if not self.is_radial:
+            return self.nrsolver.run_powerflow(matrix_stamper, v_init, tx_factor, max_iters)
+
+        if max_iters == None:
+            max_iters = self.settings.max_iters
+
+        is_success, v_final, iteration_num = self.__run_sweep(matrix_stamper, v_init, tx_factor, max_iters)
+        if is_success:
+            return (is_success, v_final, iteration_num)
+
+        print(colored("Sweep did not converge, falling back to Newton-Raphson", 'yellow'))
+        self.fallback_count += 1
+        return self.nrsolver.run_powerflow(matrix_stamper, v_init, tx_factor, max_iters)
+
+    def __run_sweep(self, matrix_stamper: MatrixStamper, v_init, tx_factor, max_iters):
+        Y = self.__get_matrix_builder(matrix_stamper)
+        J_linear = np.zeros(len(v_init))
+
+        matrix_stamper.reset_iterations()
+        matrix_stamper.stamp_linear(Y, J_linear, tx_factor)
+
+        if Y.get_usage() == 0:
+            return (False, v_init, 0)
+
+        Y_matrix = Y.to_matrix()
+        Y_matrix.sum_duplicates()
+
+        order = self.__get_order(Y_matrix)
+
+        try:
+            lu = splu(csc_matrix(Y_matrix[order][:, order]), permc_spec="NATURAL")
+        except RuntimeError:
+            #Part of the network is only held together by nonlinear stamps.
+            return (False, v_init, 0)
+
+        v_next = np.copy(v_init)
+        initial_residual = None
+
+        for iteration_num in range(max_iters):
+            residuals = matrix_stamper.calc_residuals(tx_factor, v_next, iteration_num)
+            residual_max = residuals.max_residual
+
+            print(colored(f"The maximum residual for sweep {iteration_num} is {residual_max}", 'green'))
+
+            if residual_max < self.settings.tolerance:
+                return (True, v_next, iteration_num)
+
+            if initial_residual == None:
+                initial_residual = residual_max
+
+            if not np.isfinite(residual_max) or residual_max > DIVERGENCE_FACTOR * initial_residual:
+                return (False, v_next, iteration_num)
+
+            delta = np.empty_like(v_next)
+            delta[order] = lu.solve(residuals.residuals[order])
+            v_next = v_next - delta
+
+        return (False, v_next, iteration_num)
+
+    def __get_order(self, Y_matrix: csc_matrix):
+        if self.order is None or self.order_version != self.network.matrix_version or len(self.order) != Y_matrix.shape[0]:
+            roots = [slack.get_slack_Ir_index() for slack in self.network.slack]
+            self.order = get_sweep_order(Y_matrix, roots)
+            self.order_version = self.network.matrix_version
+
+        return self.order
+
+    def __get_matrix_builder(self, matrix_stamper: MatrixStamper):
+        if self.matrix_builder == None or self.matrix_builder_stamper is not matrix_stamper:
+            self.matrix_builder = MatrixBuilder(self.settings)
+            self.matrix_builder_stamper = matrix_stamper
+        else:
+            self.matrix_builder.clear()
+
+        return self.matrix_builder
+
+#Radial networks have no loops between their buses (transformers and regulators included).
+def is_radial_network(network: NetworkModel, graph_analyzer: GraphAnalyzer = None):
+    if graph_analyzer == None:
+        graph_analyzer = GraphAnalyzer(network)
+
+    graph = graph_analyzer.G
+    return graph.number_of_nodes() > 0 and nx.is_forest(graph)
+
+#Breadth first from the slack buses over the (symmetrized) pattern of Y, reversed so the leaves come first.
+#Variables that aren't reached from a slack (e.g. the internal variables of unconnected devices) are kept at the end.
+def get_sweep_order(Y: csc_matrix, roots):
+    size = Y.shape[0]
+    pattern = csc_matrix((np.ones(Y.nnz), Y.indices, Y.indptr), shape=Y.shape)
+    pattern = (pattern + pattern.T).tocsr()
+
+    visited = np.zeros(size, dtype=bool)
+    orders = []
+    for root in roots:
+        if visited[root]:
+            continue
+        root_order = breadth_first_order(pattern, root, directed=False, return_predecessors=False)
+        root_order = root_order[~visited[root_order]]
+        visited[root_order] = True
+        orders.append(root_order)
+
+    order = np.concatenate(orders)[::-1] if orders else np.empty(0, dtype=np.int64)
+    return np.concatenate([order, np.flatnonzero(~visited)]).astype(np.int64)
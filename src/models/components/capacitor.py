@@ -34,8 +34,9 @@ class Capacitor:
         self.line_stamper = build_line_stamper_bus(self.from_bus, self.to_bus, optimization_enabled, is_shunt=True)
 
     def get_stamps(self):
+        #An open capacitor still stamps (with zero admittance), so switching it only changes constants.
         if self.switch == CapSwitchState.OPEN:
-            return []
+            return build_stamps_from_stamper(self, self.line_stamper, [0, 0, 0])
 
         return build_stamps_from_stamper(self, self.line_stamper, [self.G, self.B, 0])
 
@@ -1,41 +1,45 @@
 from typing import List
 import numpy as np
-from sympy import symbols
-from logic.stamping.lagrangesegment import LagrangeSegment
+from logic.stamping.lagrangesegment import LagrangeSegment, LazyModelDefinition, to_symbols
 from logic.stamping.lagrangestampdetails import SKIP, LagrangeStampDetails
 from models.components.line import build_line_stamper_bus
 from models.wellknownvariables import tx_factor
 from logic.stamping.matrixstamper import build_stamps_from_stampers
 
-tr_orig = symbols('tr')
-constants = tr_orig, tx_factor
-primals = Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2 = symbols('Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2')
-duals = Lr_pri, Li_pri, Lir_L1, Lii_L1, Lr_L1, Li_L1, Lir_L2, Lii_L2, Lr_L2, Li_L2 = symbols('Lr_pri, Li_pri, Lir_L1, Lii_L1, Lr_L1, Li_L1, Lir_L2, Lii_L2, Lr_L2, Li_L2')
-
-tr = tr_orig + (1 - tr_orig) * tx_factor 
-
-#Kersting:
-#E_0 = 1/tr * Vt_1
-#E_0 = -1/tr * Vt_2
-#I_0 = 1/tr * (I_1 - I_2)
-#I_0 => Leaving primary (positive), I_1, I_2 => Entering secondary (negative). 
-
-eqns = [
-    1 / tr * (-Ir_L1 + Ir_L2),
-    1 / tr * (-Ii_L1 + Ii_L2),
-    Vr_L1 - 1 / tr * Vr_pri,
-    Vi_L1 - 1 / tr * Vi_pri,
-    Ir_L1,
-    Ii_L1,
-    Vr_L2 + 1 / tr * Vr_pri,
-    Vi_L2 + 1 / tr * Vi_pri,
-    Ir_L2,
-    Ii_L2
-]
-
-lagrange = np.dot(duals, eqns)
-
-center_tap_xfmr_lh = LagrangeSegment(lagrange, constants, primals, duals)
+primals = Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2 = 'Vr_pri', 'Vi_pri', 'Ir_L1', 'Ii_L1', 'Vr_L1', 'Vi_L1', 'Ir_L2', 'Ii_L2', 'Vr_L2', 'Vi_L2'
+duals = Lr_pri, Li_pri, Lir_L1, Lii_L1, Lr_L1, Li_L1, Lir_L2, Lii_L2, Lr_L2, Li_L2 = 'Lr_pri', 'Li_pri', 'Lir_L1', 'Lii_L1', 'Lr_L1', 'Li_L1', 'Lir_L2', 'Lii_L2', 'Lr_L2', 'Li_L2'
+
+def build_center_tap_transformer_definition():
+    constants = tr_orig, tx = to_symbols('tr', tx_factor)
+    primal_symbols = Vr_pri, Vi_pri, Ir_L1, Ii_L1, Vr_L1, Vi_L1, Ir_L2, Ii_L2, Vr_L2, Vi_L2 = to_symbols(*primals)
+    dual_symbols = to_symbols(*duals)
+
+    tr = tr_orig + (1 - tr_orig) * tx 
+
+    #Kersting:
+    #E_0 = 1/tr * Vt_1
+    #E_0 = -1/tr * Vt_2
+    #I_0 = 1/tr * (I_1 - I_2)
+    #I_0 => Leaving primary (positive), I_1, I_2 => Entering secondary (negative). 
+
+    eqns = [
+        1 / tr * (-Ir_L1 + Ir_L2),
+        1 / tr * (-Ii_L1 + Ii_L2),
+        Vr_L1 - 1 / tr * Vr_pri,
+        Vi_L1 - 1 / tr * Vi_pri,
+        Ir_L1,
+        Ii_L1,
+        Vr_L2 + 1 / tr * Vr_pri,
+        Vi_L2 + 1 / tr * Vi_pri,
+        Ir_L2,
+        Ii_L2
+    ]
+
+    lagrange = np.dot(dual_symbols, eqns)
+
+    return LagrangeSegment(lagrange, constants, primal_symbols, dual_symbols)
+
+center_tap_xfmr_lh = LazyModelDefinition("center_tap_transformer", __file__, build_center_tap_transformer_definition)
 
 class CenterTapTransformerCoil():
     
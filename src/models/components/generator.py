@@ -1,23 +1,27 @@
 from itertools import count
-from sympy import symbols
-from logic.stamping.lagrangesegment import TwoTerminalModelDefinition, KCL_r, KCL_i, Eq
+from logic.stamping.lagrangesegment import LazyModelDefinition, TwoTerminalModelDefinition, KCL_r, KCL_i, Eq, to_symbols
 from logic.stamping.lagrangestampdetails import build_two_terminal_stamp_details
 from models.components.bus import GROUND, Bus
 from logic.stamping.matrixstamper import build_stamps_from_stamper
 from models.wellknownvariables import Vr_from, Vi_from, Vr_to, Vi_to
 
-constants = P, Vset = symbols('P V_set')
-Q = symbols('Q')
+Q = 'Q'
 variables = Vr_from, Vi_from, Vr_to, Vi_to, Q
 
-Vr = Vr_from - Vr_to
-Vi = Vi_from - Vi_to
+def build_generator_definition():
+    constants = P, Vset = to_symbols('P', 'V_set')
+    primals = Vr_from, Vi_from, Vr_to, Vi_to, Q = to_symbols(*variables)
 
-kcl_r = KCL_r((P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2))
-kcl_i = KCL_i((P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2))
-F_Q = Eq(Vset ** 2 - Vr ** 2 - Vi ** 2)
+    Vr = Vr_from - Vr_to
+    Vi = Vi_from - Vi_to
 
-lh = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i, equalities=[F_Q])
+    kcl_r = KCL_r((P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2))
+    kcl_i = KCL_i((P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2))
+    F_Q = Eq(Vset ** 2 - Vr ** 2 - Vi ** 2)
+
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i, equalities=[F_Q])
+
+lh = LazyModelDefinition("generator", __file__, build_generator_definition)
 
 class Generator:
     _ids = count(0)
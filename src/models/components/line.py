@@ -1,7 +1,6 @@
 import numpy as np
-from sympy import symbols
 from itertools import count
-from logic.stamping.lagrangesegment import LagrangeSegment, TwoTerminalModelDefinition, KCL_r, KCL_i
+from logic.stamping.lagrangesegment import LazyModelDefinition, TwoTerminalModelDefinition, KCL_r, KCL_i, to_symbols
 from logic.stamping.lagrangestampdetails import LagrangeStampDetails
 from logic.stamping.matrixstamper import build_stamps_from_stampers
 from models.components.bus import Bus, GROUND
@@ -10,30 +9,40 @@ from models.wellknownvariables import tx_factor, Vr_from, Vi_from, Vr_to, Vi_to,
 TX_LARGE_G = 20
 TX_LARGE_B = 20
 
-G_orig, B_orig = symbols('G B')
-constants = G_orig, B_orig, tx_factor
 variables = Vr_from, Vi_from, Vr_to, Vi_to
 
-G = G_orig + TX_LARGE_G * G_orig * tx_factor
-B = B_orig + TX_LARGE_B * B_orig * tx_factor
+def build_line_definition():
+    constants = G_orig, B_orig, tx = to_symbols('G', 'B', tx_factor)
+    primals = Vr_from, Vi_from, Vr_to, Vi_to = to_symbols(*variables)
 
-kcl_r = KCL_r(G * Vr_from - G * Vr_to - B * Vi_from + B * Vi_to)
-kcl_i = KCL_i(G * Vi_from - G * Vi_to + B * Vr_from - B * Vr_to)  
+    G = G_orig + TX_LARGE_G * G_orig * tx
+    B = B_orig + TX_LARGE_B * B_orig * tx
 
-line_lh = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i)
+    kcl_r = KCL_r(G * Vr_from - G * Vr_to - B * Vi_from + B * Vi_to)
+    kcl_i = KCL_i(G * Vi_from - G * Vi_to + B * Vr_from - B * Vr_to)  
+
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i)
+
+line_lh = LazyModelDefinition("line", __file__, build_line_definition)
 
 # The only distinction between shunt and line impedance behavior
 # is that when the homotopy factor is at 1,
 # we expect line impedance to go to [large number]
 # and the shunt impedance to go to 0
 
-G = G_orig * (1 - tx_factor)
-B = B_orig * (1 - tx_factor)
+def build_shunt_definition():
+    constants = G_orig, B_orig, tx = to_symbols('G', 'B', tx_factor)
+    primals = Vr_from, Vi_from, Vr_to, Vi_to = to_symbols(*variables)
+
+    G = G_orig * (1 - tx)
+    B = B_orig * (1 - tx)
+
+    kcl_r = KCL_r(G * Vr_from - G * Vr_to - B * Vi_from + B * Vi_to)
+    kcl_i = KCL_i(G * Vi_from - G * Vi_to + B * Vr_from - B * Vr_to)  
 
-kcl_r = KCL_r(G * Vr_from - G * Vr_to - B * Vi_from + B * Vi_to)
-kcl_i = KCL_i(G * Vi_from - G * Vi_to + B * Vr_from - B * Vr_to)  
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i)
 
-shunt_lh = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i)
+shunt_lh = LazyModelDefinition("shunt", __file__, build_shunt_definition)
 
 def build_line_stamper_bus(
     from_bus: Bus, 
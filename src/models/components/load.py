@@ -1,52 +1,66 @@
 from itertools import count
 import numpy as np
-from sympy import symbols
-from logic.stamping.lagrangesegment import TwoTerminalModelDefinition, KCL_r, KCL_i
+from logic.stamping.lagrangesegment import LazyModelDefinition, TwoTerminalModelDefinition, KCL_r, KCL_i, to_symbols
 from logic.stamping.lagrangestampdetails import build_two_terminal_stamp_details
 from models.components.bus import Bus
 from models.components.line import build_line_stamper_bus
 from logic.stamping.matrixstamper import build_stamps_from_stampers
-from models.wellknownvariables import Vr_from, Vi_from, Vr_to, Vi_to, Lr_from, Li_from, Lr_to, Li_to
+from models.wellknownvariables import Vr_from, Vi_from, Vr_to, Vi_to
 
 #Eqns reference:
 # Pandey, A. (2018). 
 # Robust Steady-State Analysis of Power Grid using Equivalent Circuit Formulation with Circuit Simulation Methods
 
+variables = Vr_from, Vi_from, Vr_to, Vi_to
+
 #Constant real & reactive power loads
 #Eqn 25 & 26, pg 45
-constants = P, Q = symbols('P, Q')
-variables = Vr_from, Vi_from, Vr_to, Vi_to
+def build_pq_definition():
+    constants = P, Q = to_symbols('P', 'Q')
+    primals = Vr_from, Vi_from, Vr_to, Vi_to = to_symbols(*variables)
+
+    Vr = Vr_from - Vr_to
+    Vi = Vi_from - Vi_to
 
-Vr = Vr_from - Vr_to
-Vi = Vi_from - Vi_to
+    kcl_r = KCL_r((P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2))
+    kcl_i = KCL_i((P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2))
 
-kcl_r = KCL_r((P * Vr + Q * Vi) / (Vr ** 2 + Vi ** 2))
-kcl_i = KCL_i((P * Vi - Q * Vr) / (Vr ** 2 + Vi ** 2))
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i)
 
-lh_pq = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i)
+lh_pq = LazyModelDefinition("load_pq", __file__, build_pq_definition)
 
 #Constant Current loads
-constants = IP, IQ = symbols('IP, IQ')
+def build_Ic_definition():
+    constants = IP, IQ = to_symbols('IP', 'IQ')
+    primals = to_symbols(*variables)
 
-kcl_r = KCL_r(IP)
-kcl_i = KCL_i(IQ)
+    kcl_r = KCL_r(IP)
+    kcl_i = KCL_i(IQ)
 
-lh_Ic = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i)
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i)
+
+lh_Ic = LazyModelDefinition("load_Ic", __file__, build_Ic_definition)
 
 #Zip loads (partially implemented)
 #Eqn 31 & 32, pg 47
+def build_zip_definition():
+    constants = Ic_mag, cos_Ipf, sin_Ipf = to_symbols('Ic_mag', 'cos_Ipf', 'sin_Ipf')
+    primals = Vr_from, Vi_from, Vr_to, Vi_to = to_symbols(*variables)
+
+    Vr = Vr_from - Vr_to
+    Vi = Vi_from - Vi_to
 
-constants = Ic_mag, cos_Ipf, sin_Ipf = symbols('Ic_mag, cos_Ipf, sin_Ipf')
+    V_ratio = Vi/Vr
+    cos_arctan_V = 1 / (V_ratio**2 + 1)**0.5
+    sin_arctan_V = V_ratio / (V_ratio**2 + 1)**0.5
 
-V_ratio = Vi/Vr
-cos_arctan_V = 1 / (V_ratio**2 + 1)**0.5
-sin_arctan_V = V_ratio / (V_ratio**2 + 1)**0.5
+    #Only have the constant current component for now.
+    kcl_r = KCL_r(Ic_mag * (cos_arctan_V * cos_Ipf - sin_arctan_V * sin_Ipf))
+    kcl_i = KCL_i(Ic_mag * (sin_arctan_V * cos_Ipf + cos_arctan_V * sin_Ipf))
 
-#Only have the constant current component for now.
-kcl_r = KCL_r(Ic_mag * (cos_arctan_V * cos_Ipf - sin_arctan_V * sin_Ipf))
-kcl_i = KCL_i(Ic_mag * (sin_arctan_V * cos_Ipf + cos_arctan_V * sin_Ipf))
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i)
 
-lh_zip = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i)
+lh_zip = LazyModelDefinition("load_zip", __file__, build_zip_definition)
 
 #Represents a two-terminal load. Can be used for positive sequence or three phase.
 class Load:
@@ -122,6 +136,12 @@ class Load:
         else:
             self.stamper_z = build_line_stamper_bus(self.from_bus, self.to_bus, optimization_enabled, is_shunt=True)
 
+    #Stampers are only built for the components that are non-zero when nodes are assigned,
+    #so a component that has since become non-zero needs the nodes to be assigned again.
+    def has_stale_stampers(self):
+        return (self.stamper_pq == None and (self.P != 0 or self.Q != 0)) \
+            or (self.stamper_Ic == None and (self.IP != 0 or self.IQ != 0))
+
     def get_stamps(self):
         return build_stamps_from_stampers(self, 
             (self.stamper_pq, [self.P, self.Q]),
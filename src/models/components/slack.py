@@ -1,25 +1,28 @@
-from sympy import symbols
 import math
-from logic.stamping.lagrangesegment import TwoTerminalModelDefinition, KCL_r, KCL_i, Eq
+from logic.stamping.lagrangesegment import LazyModelDefinition, TwoTerminalModelDefinition, KCL_r, KCL_i, Eq, to_symbols
 from logic.stamping.lagrangestampdetails import build_two_terminal_stamp_details
 from models.components.bus import GROUND, Bus
 from logic.stamping.matrixstamper import build_stamps_from_stamper
 from models.wellknownvariables import Vr_from, Vi_from, Vr_to, Vi_to
 
-constants = Vrset, Viset = symbols("Vrset Viset")
-
-I_sr, I_si = symbols("I_Sr I_Si")
+I_sr, I_si = 'I_Sr', 'I_Si'
 variables = Vr_from, Vi_from, Vr_to, Vi_to, I_sr, I_si
 
-Vr = Vr_from - Vr_to
-Vi = Vi_from - Vi_to
+def build_slack_definition():
+    constants = Vrset, Viset = to_symbols('Vrset', 'Viset')
+    primals = Vr_from, Vi_from, Vr_to, Vi_to, I_sr, I_si = to_symbols(*variables)
+
+    Vr = Vr_from - Vr_to
+    Vi = Vi_from - Vi_to
+
+    kcl_r = KCL_r(I_sr)
+    kcl_i = KCL_i(I_si)
+    Vrset_eqn = Eq(Vr - Vrset)
+    Viset_eqn = Eq(Vi - Viset)
 
-kcl_r = KCL_r(I_sr)
-kcl_i = KCL_i(I_si)
-Vrset_eqn = Eq(Vr - Vrset)
-Viset_eqn = Eq(Vi - Viset)
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i, equalities=[Vrset_eqn, Viset_eqn])
 
-lh = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i, equalities=[Vrset_eqn, Viset_eqn])
+lh = LazyModelDefinition("slack", __file__, build_slack_definition)
 
 class Slack:
 
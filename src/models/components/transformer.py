@@ -1,55 +1,61 @@
 from itertools import count
 import numpy as np
-from sympy import symbols, cos, sin
 import math
-from logic.stamping.lagrangesegment import LagrangeSegment
+from logic.stamping.lagrangesegment import LagrangeSegment, LazyModelDefinition, to_symbols
 from logic.stamping.lagrangestampdetails import SKIP, LagrangeStampDetails
 from models.components.line import build_line_stamper, build_line_stamper_bus
 from models.components.bus import GROUND, Bus
 from models.wellknownvariables import tx_factor
 from logic.stamping.matrixstamper import build_stamps_from_stampers
 
-tr, ang = symbols('tr ang')
-constants = tr, ang, tx_factor
-primals = Vr_pri_pos, Vi_pri_pos, Vr_pri_neg, Vi_pri_neg, Ir_prim, Ii_prim, Vr_sec_pos, Vi_sec_pos, Vr_sec_neg, Vi_sec_neg = symbols('Vr_pri_pos Vi_pri_pos Vr_pri_neg Vi_pri_neg Ir_prim Ii_prim Vr_sec_pos Vi_sec_pos Vr_sec_neg Vi_sec_neg')
-duals = Lr_pri_pos, Li_pri_pos, Lr_pri_neg, Li_pri_neg, Lir_prim, Lii_prim, Lr_sec_pos, Li_sec_pos, Lr_sec_neg, Li_sec_neg = symbols('Lr_pri_pos Li_pri_pos Lr_pri_neg Li_pri_neg Lir_prim Lii_prim Lr_sec_pos Li_sec_pos Lr_sec_neg Li_sec_neg')
-
-scaled_tr = tr + (1 - tr) * tx_factor 
-scaled_angle = ang - ang * tx_factor
-
-scaled_trcos = scaled_tr * cos(scaled_angle)
-scaled_trsin = scaled_tr * sin(scaled_angle)
-
-secondary_current_r = -scaled_trcos * Ir_prim - scaled_trsin * Ii_prim
-secondary_current_i = -scaled_trcos * Ii_prim + scaled_trsin * Ir_prim
-
-Vr_pri = Vr_pri_pos - Vr_pri_neg
-Vi_pri = Vi_pri_pos - Vi_pri_neg
-
-Vr_sec = Vr_sec_pos - Vr_sec_neg
-Vi_sec = Vi_sec_pos - Vi_sec_neg
-
-eqns = [
-    #primary side, positive terminal kcl
-    Ir_prim,
-    Ii_prim,
-    #primary side, negative terminal kcl
-    -Ir_prim,
-    -Ii_prim,
-    #primary/secondary voltage relationship
-    Vr_pri - scaled_trcos * Vr_sec + scaled_trsin * Vi_sec,
-    Vi_pri - scaled_trcos * Vi_sec - scaled_trsin * Vr_sec,
-    #secondary side, positive terminal kcl
-    secondary_current_r,
-    secondary_current_i,
-    #secondary side, negative terminal kcl
-    -secondary_current_r,
-    -secondary_current_i
-]
-
-lagrange = np.dot(duals, eqns)
-
-xfrmr_lh = LagrangeSegment(lagrange, constants, primals, duals)
+primals = Vr_pri_pos, Vi_pri_pos, Vr_pri_neg, Vi_pri_neg, Ir_prim, Ii_prim, Vr_sec_pos, Vi_sec_pos, Vr_sec_neg, Vi_sec_neg = 'Vr_pri_pos', 'Vi_pri_pos', 'Vr_pri_neg', 'Vi_pri_neg', 'Ir_prim', 'Ii_prim', 'Vr_sec_pos', 'Vi_sec_pos', 'Vr_sec_neg', 'Vi_sec_neg'
+duals = Lr_pri_pos, Li_pri_pos, Lr_pri_neg, Li_pri_neg, Lir_prim, Lii_prim, Lr_sec_pos, Li_sec_pos, Lr_sec_neg, Li_sec_neg = 'Lr_pri_pos', 'Li_pri_pos', 'Lr_pri_neg', 'Li_pri_neg', 'Lir_prim', 'Lii_prim', 'Lr_sec_pos', 'Li_sec_pos', 'Lr_sec_neg', 'Li_sec_neg'
+
+def build_transformer_definition():
+    from sympy import cos, sin
+
+    constants = tr, ang, tx = to_symbols('tr', 'ang', tx_factor)
+    primal_symbols = Vr_pri_pos, Vi_pri_pos, Vr_pri_neg, Vi_pri_neg, Ir_prim, Ii_prim, Vr_sec_pos, Vi_sec_pos, Vr_sec_neg, Vi_sec_neg = to_symbols(*primals)
+    dual_symbols = to_symbols(*duals)
+
+    scaled_tr = tr + (1 - tr) * tx 
+    scaled_angle = ang - ang * tx
+
+    scaled_trcos = scaled_tr * cos(scaled_angle)
+    scaled_trsin = scaled_tr * sin(scaled_angle)
+
+    secondary_current_r = -scaled_trcos * Ir_prim - scaled_trsin * Ii_prim
+    secondary_current_i = -scaled_trcos * Ii_prim + scaled_trsin * Ir_prim
+
+    Vr_pri = Vr_pri_pos - Vr_pri_neg
+    Vi_pri = Vi_pri_pos - Vi_pri_neg
+
+    Vr_sec = Vr_sec_pos - Vr_sec_neg
+    Vi_sec = Vi_sec_pos - Vi_sec_neg
+
+    eqns = [
+        #primary side, positive terminal kcl
+        Ir_prim,
+        Ii_prim,
+        #primary side, negative terminal kcl
+        -Ir_prim,
+        -Ii_prim,
+        #primary/secondary voltage relationship
+        Vr_pri - scaled_trcos * Vr_sec + scaled_trsin * Vi_sec,
+        Vi_pri - scaled_trcos * Vi_sec - scaled_trsin * Vr_sec,
+        #secondary side, positive terminal kcl
+        secondary_current_r,
+        secondary_current_i,
+        #secondary side, negative terminal kcl
+        -secondary_current_r,
+        -secondary_current_i
+    ]
+
+    lagrange = np.dot(dual_symbols, eqns)
+
+    return LagrangeSegment(lagrange, constants, primal_symbols, dual_symbols)
+
+xfrmr_lh = LazyModelDefinition("transformer", __file__, build_transformer_definition)
 
 class Transformer:
     _ids = count(0)
@@ -1,12 +1,9 @@
 import typing
 
 import numpy as np
-from logic.stamping.lagrangestampdetails import LagrangeStampDetails
-from models.components.bus import GROUND
 from models.components.line import line_lh, shunt_lh
 from logic.network.networkmodel import DxNetworkModel
-from logic.stamping.lagrangestampdetails import LagrangeStampDetails
-from logic.stamping.matrixstamper import build_stamps_from_stampers
+from logic.stamping.matrixstamper import StampBatch
 from models.wellknownvariables import Vr_from, Vr_to, Vi_from, Vi_to, Lr_from, Lr_to, Li_from, Li_to
 
 def calcInverse(Zmatrix):
@@ -34,6 +31,97 @@ def calcInverse(Zmatrix):
         Ymatrix = Ymatrix_red
     return Ymatrix
 
+def invert_impedances(impedances, phases, verify=True):
+    try:
+        admittances = calcInverse(impedances)
+    except Exception:
+        try:
+            admittances = np.linalg.inv(impedances)
+        except Exception:    
+            raise Exception("Transmission line was provided with a noninvertible matrix")
+    if verify and not np.allclose(np.dot(impedances, admittances), np.identity(len(phases))):
+        raise Exception("np.linalg.inv was unable to find a good inverse to the impedance matrix")
+    return admittances
+
+#Lines built from the same configuration share their per-meter impedances, so their admittances
+#only differ by a 1/length factor. Every distinct per-meter matrix is inverted (and verified) once,
+#the ones known up front can be inverted together (see: prepare).
+class AdmittanceCache():
+
+    def __init__(self, verify=True):
+        self.verify = verify
+        self.admittances = {}
+
+    def get_admittances(self, impedances, phases):
+        key = self.__get_key(impedances, phases)
+        admittances = self.admittances.get(key)
+        if admittances is None:
+            admittances = invert_impedances(impedances.copy(), phases, self.verify)
+            self.admittances[key] = admittances
+        return admittances
+
+    # Inverts the per-meter impedances that aren't cached yet with one np.linalg.inv call per matrix size.
+    # Anything that doesn't invert (or verify) cleanly is left to get_admittances, so it fails on its own line.
+    def prepare(self, impedance_matrices, phase_lists):
+        pending = {}
+        for impedances, phases in zip(impedance_matrices, phase_lists):
+            impedances = np.array(impedances, dtype=complex)
+            key = self.__get_key(impedances, phases)
+            if key in self.admittances or key in pending or not self.__is_regular(impedances, phases):
+                continue
+            pending[key] = impedances
+
+        by_size = {}
+        for key, impedances in pending.items():
+            by_size.setdefault(len(impedances), []).append((key, impedances))
+
+        for size, entries in by_size.items():
+            stacked = np.array([impedances for _, impedances in entries])
+            try:
+                inverses = np.linalg.inv(stacked)
+            except np.linalg.LinAlgError:
+                continue
+
+            if self.verify:
+                is_valid = np.isclose(np.matmul(stacked, inverses), np.identity(size)).all(axis=(1, 2))
+            else:
+                is_valid = np.full(len(entries), True)
+
+            for (key, _), admittances, valid in zip(entries, inverses, is_valid):
+                if valid:
+                    self.admittances[key] = admittances
+
+    def __get_key(self, impedances, phases):
+        return (impedances.shape, impedances.dtype.str, impedances.tobytes(), tuple(phases))
+
+    # Matrices calcInverse would invert as is (no zero rows or columns, more than one entry).
+    def __is_regular(self, impedances, phases):
+        if impedances.ndim != 2 or impedances.shape[0] != impedances.shape[1] or len(impedances) != len(phases):
+            return False
+
+        is_zero = impedances == 0
+        return np.count_nonzero(impedances) != 1 and not is_zero.all(axis=0).any() and not is_zero.all(axis=1).any()
+
+# Matrix indexes (Vr, Vi, Lr, Li) of each bus, SKIP indexes given as -1.
+def get_node_indexes(buses):
+    indexes = [(bus.node_Vr, bus.node_Vi, bus.node_lambda_Vr, bus.node_lambda_Vi) for bus in buses]
+    return np.array([[-1 if idx is None else idx for idx in bus_indexes] for bus_indexes in indexes], dtype=np.int64).reshape(-1, 4)
+
+def get_two_terminal_indexes(from_nodes, to_nodes):
+    return {
+        Vr_from: from_nodes[:, 0],
+        Vi_from: from_nodes[:, 1],
+        Lr_from: from_nodes[:, 2],
+        Li_from: from_nodes[:, 3],
+        Vr_to: to_nodes[:, 0],
+        Vi_to: to_nodes[:, 1],
+        Lr_to: to_nodes[:, 2],
+        Li_to: to_nodes[:, 3]
+    }
+
+def select_indexes(indexes, mask):
+    return {variable: node_indexes[mask] for variable, node_indexes in indexes.items()}
+
 class UnbalancedLinePhase():
 
     def __init__(self
@@ -53,7 +141,7 @@ class UnbalancedLinePhase():
 #Line where we have a collection of unbalanced phases (or a neutral wire) with admittance effects across wires.
 class UnbalancedLine():
     
-    def __init__(self, network_model, impedances, shunt_admittances, from_element, to_element, length, phases="ABC", ampacities=[]):
+    def __init__(self, network_model, impedances, shunt_admittances, from_element, to_element, length, phases="ABC", ampacities=[], admittance_cache=None):
         self.lines: typing.List[UnbalancedLinePhase]
         self.lines = []
 
@@ -62,16 +150,13 @@ class UnbalancedLine():
             raise Exception("incorrect impedances matrix size, expected a square matrix at most size 3 by 3")
             
         # Convert the per-meter impedance values to absolute, based on line length (in meters)
-        self.impedances *= length
-        try:
-            self.admittances = calcInverse(self.impedances)
-        except Exception:
-            try:
-                self.admittances = np.linalg.inv(self.impedances)
-            except Exception:    
-                raise Exception("Transmission line was provided with a noninvertible matrix")
-        if not np.allclose(np.dot(self.impedances, self.admittances), np.identity(len(phases))):
-            raise Exception("np.linalg.inv was unable to find a good inverse to the impedance matrix")
+        if admittance_cache is None or length == 0:
+            self.impedances *= length
+            self.admittances = invert_impedances(self.impedances, phases)
+        else:
+            # Same as inverting the absolute impedances, without inverting every line (see: AdmittanceCache).
+            self.admittances = admittance_cache.get_admittances(self.impedances, phases) / length
+            self.impedances *= length
         
         # Convert the per-meter shunt admittance values to absolute, based on line length (in meters)
 
@@ -91,136 +176,70 @@ class UnbalancedLine():
             self.lines.append(UnbalancedLinePhase(self.from_element, self.to_element, phase))
 
     def assign_nodes(self, node_index, optimization_enabled):
-        self.stampers = {}
-
-        # Go through all phases and build lagrange stamper for each line combination.
-        for i in range(len(self.lines)):
-            # Get the line
-            line1 = self.lines[i]
-            line1_from, line1_to = line1.get_nodes(self.network_model)
-
-            eqn_map = {}
-            eqn_map[Vr_from] = line1_from.node_Vr
-            eqn_map[Vi_from] = line1_from.node_Vi
-            eqn_map[Vr_to] = line1_to.node_Vr
-            eqn_map[Vi_to] = line1_to.node_Vi
-            eqn_map[Lr_from] = line1_from.node_lambda_Vr
-            eqn_map[Li_from] = line1_from.node_lambda_Vi
-            eqn_map[Lr_to] = line1_to.node_lambda_Vr
-            eqn_map[Li_to] = line1_to.node_lambda_Vi
-
-            eqn_map_shunt_from = {}
-            eqn_map_shunt_from[Vr_from] = line1_from.node_Vr
-            eqn_map_shunt_from[Vi_from] = line1_from.node_Vi
-            eqn_map_shunt_from[Vr_to] = GROUND.node_Vr
-            eqn_map_shunt_from[Vi_to] = GROUND.node_Vi
-            eqn_map_shunt_from[Lr_from] = line1_from.node_lambda_Vr
-            eqn_map_shunt_from[Li_from] = line1_from.node_lambda_Vi
-            eqn_map_shunt_from[Lr_to] = GROUND.node_lambda_Vr
-            eqn_map_shunt_from[Li_to] = GROUND.node_lambda_Vi
-
-            eqn_map_shunt_to = {}
-            eqn_map_shunt_to[Vr_from] = line1_to.node_Vr
-            eqn_map_shunt_to[Vi_from] = line1_to.node_Vi
-            eqn_map_shunt_to[Vr_to] = GROUND.node_Vr
-            eqn_map_shunt_to[Vi_to] = GROUND.node_Vi
-            eqn_map_shunt_to[Lr_from] = line1_to.node_lambda_Vr
-            eqn_map_shunt_to[Li_from] = line1_to.node_lambda_Vi
-            eqn_map_shunt_to[Lr_to] = GROUND.node_lambda_Vr
-            eqn_map_shunt_to[Li_to] = GROUND.node_lambda_Vi
-
-            # Go through all lines
-            for j in range(len(self.lines)):
-                line2 = self.lines[j]
-                line2_from, line2_to = line2.get_nodes(self.network_model)
-
-                var_map = {}
-                var_map[Vr_from] = line2_from.node_Vr
-                var_map[Vi_from] = line2_from.node_Vi
-                var_map[Vr_to] = line2_to.node_Vr
-                var_map[Vi_to] = line2_to.node_Vi
-                var_map[Lr_from] = line2_from.node_lambda_Vr
-                var_map[Li_from] = line2_from.node_lambda_Vi
-                var_map[Lr_to] = line2_to.node_lambda_Vr
-                var_map[Li_to] = line2_to.node_lambda_Vi
-
-                if i == j:
-                    segment = line_lh
-                else:
-                    segment = shunt_lh
-
-                line_stamper = LagrangeStampDetails(segment, var_map, optimization_enabled, eqn_map)
-
-                var_map_shunt_from = {}
-                var_map_shunt_from[Vr_from] = line2_from.node_Vr
-                var_map_shunt_from[Vi_from] = line2_from.node_Vi
-                var_map_shunt_from[Vr_to] = GROUND.node_Vr
-                var_map_shunt_from[Vi_to] = GROUND.node_Vi
-                var_map_shunt_from[Lr_from] = line2_from.node_lambda_Vr
-                var_map_shunt_from[Li_from] = line2_from.node_lambda_Vi
-                var_map_shunt_from[Lr_to] = GROUND.node_lambda_Vr
-                var_map_shunt_from[Li_to] = GROUND.node_lambda_Vi
-
-                var_map_shunt_to = {}
-                var_map_shunt_to[Vr_from] = line2_to.node_Vr
-                var_map_shunt_to[Vi_from] = line2_to.node_Vi
-                var_map_shunt_to[Vr_to] = GROUND.node_Vr
-                var_map_shunt_to[Vi_to] = GROUND.node_Vi
-                var_map_shunt_to[Lr_from] = line2_to.node_lambda_Vr
-                var_map_shunt_to[Li_from] = line2_to.node_lambda_Vi
-                var_map_shunt_to[Lr_to] = GROUND.node_lambda_Vr
-                var_map_shunt_to[Li_to] = GROUND.node_lambda_Vi
-
-                shunt_stamper_from = LagrangeStampDetails(shunt_lh, var_map_shunt_from, optimization_enabled, eqn_map_shunt_from)
-                shunt_stamper_to = LagrangeStampDetails(shunt_lh, var_map_shunt_to, optimization_enabled, eqn_map_shunt_to)
-
-                self.stampers[(line1_from, line2_to)] = (line_stamper, shunt_stamper_from, shunt_stamper_to)
+        # Lines don't add any variables. Their stamps are built for all lines at once (see: get_stamp_batches).
+        self.phase_buses = [line.get_nodes(self.network_model) for line in self.lines]
 
     def get_connections(self):
         for line in self.lines:
             from_bus, to_bus = line.get_nodes(self.network_model)
             yield (from_bus, to_bus)
 
-    def get_stamps(self):
-        stamps = []
-        for (is_own_phase, line_stamper, shunt_stamper_from, shunt_stamper_to, g, b, B) in self.__loop_line_stampers(self.network_model):
-            stamps += build_stamps_from_stampers(self, 
-                (line_stamper, [g, b, 0]),
-                (shunt_stamper_from, [0, B/2, 0]),
-                (shunt_stamper_to, [0, B/2, 0])
-                )
-        
-        return stamps
-
-    def __loop_line_stampers(self, state):
-        # Go through all phases
-        for i in range(len(self.lines)):
-            # Get the line
-            line = self.lines[i]
-
-            # Collect the line's nodes for mutual susceptance calculation
-            line1_from, _ = line.get_nodes(state)
-
-            # Go through all lines
-            for j in range(len(self.lines)):
-                g = np.real(self.admittances[i][j])
-                b = np.imag(self.admittances[i][j])
-
-                B = 0
-                if self.shunt_admittances is not None:
-                    try:
-                        B = np.imag(self.shunt_admittances[i][j])
-                    except IndexError:
-                        pass
-
-                line2 = self.lines[j]
-                _, line2_to = line2.get_nodes(state)
-
-                (line_stamper, shunt_stamper_from, shunt_stamper_to) = self.stampers[(line1_from, line2_to)]
-
-                is_own_phase = i == j
-
-                yield (is_own_phase, line_stamper, shunt_stamper_from, shunt_stamper_to, g, b, B)
+    # Every phase pair (i, j) of every line is one row: the line (or mutual coupling) between phase i's equations
+    # and phase j's voltages, plus the shunt susceptance on both ends. Rows are built as arrays over all lines,
+    # rather than as stamp details per phase pair.
+    @staticmethod
+    def get_stamp_batches(lines):
+        if len(lines) == 0:
+            return []
+
+        pair_nodes = ([], [], [], [])
+        pair_admittances = []
+        pair_susceptances = []
+        is_own_phase = []
+
+        for line in lines:
+            phase_count = len(line.lines)
+            from_nodes = get_node_indexes([from_bus for from_bus, _ in line.phase_buses])
+            to_nodes = get_node_indexes([to_bus for _, to_bus in line.phase_buses])
+
+            i, j = np.divmod(np.arange(phase_count * phase_count), phase_count)
+            pair_nodes[0].append(from_nodes[i])
+            pair_nodes[1].append(to_nodes[i])
+            pair_nodes[2].append(from_nodes[j])
+            pair_nodes[3].append(to_nodes[j])
+            pair_admittances.append(line.admittances[i, j])
+            pair_susceptances.append(line.get_shunt_susceptances()[i, j])
+            is_own_phase.append(i == j)
+
+        from_i, to_i, from_j, to_j = (np.concatenate(nodes) for nodes in pair_nodes)
+        admittances = np.concatenate(pair_admittances)
+        susceptances = np.concatenate(pair_susceptances)
+        is_own_phase = np.concatenate(is_own_phase)
+        ground = np.full(from_i.shape, -1, dtype=np.int64)
+
+        line_constants = np.column_stack((np.real(admittances), np.imag(admittances), np.zeros(len(admittances))))
+        shunt_constants = np.column_stack((np.zeros(len(susceptances)), susceptances / 2, np.zeros(len(susceptances))))
+
+        # Mutual couplings are stamped as shunts, so they vanish (rather than grow) with the homotopy factor.
+        line_var_indexes = get_two_terminal_indexes(from_j, to_j)
+        line_eqn_indexes = get_two_terminal_indexes(from_i, to_i)
+        is_mutual = ~is_own_phase
+
+        return [
+            StampBatch(line_lh, line_constants[is_own_phase], select_indexes(line_var_indexes, is_own_phase), select_indexes(line_eqn_indexes, is_own_phase)),
+            StampBatch(shunt_lh, line_constants[is_mutual], select_indexes(line_var_indexes, is_mutual), select_indexes(line_eqn_indexes, is_mutual)),
+            StampBatch(shunt_lh, shunt_constants, get_two_terminal_indexes(from_j, ground), get_two_terminal_indexes(from_i, ground)),
+            StampBatch(shunt_lh, shunt_constants, get_two_terminal_indexes(to_j, ground), get_two_terminal_indexes(to_i, ground))
+        ]
+
+    def get_shunt_susceptances(self):
+        phase_count = len(self.lines)
+        susceptances = np.zeros((phase_count, phase_count))
+        if self.shunt_admittances is not None and np.ndim(self.shunt_admittances) == 2:
+            # Shunt admittances may cover fewer phases than the line, the rest are left at 0.
+            rows, cols = min(phase_count, self.shunt_admittances.shape[0]), min(phase_count, self.shunt_admittances.shape[1])
+            susceptances[:rows, :cols] = np.imag(self.shunt_admittances[:rows, :cols])
+        return susceptances
     
     def loop_lines(self):
         # Go through all phases
@@ -1,23 +1,25 @@
-from sympy import symbols
-from logic.stamping.lagrangesegment import Eq, KCL_i, KCL_r, TwoTerminalModelDefinition
+from logic.stamping.lagrangesegment import Eq, KCL_i, KCL_r, LazyModelDefinition, TwoTerminalModelDefinition, to_symbols
 from logic.stamping.lagrangestampdetails import build_two_terminal_stamp_details
 from models.components.bus import Bus
 from logic.stamping.matrixstamper import build_stamps_from_stamper
 from models.wellknownvariables import Vr_from, Vi_from, Vr_to, Vi_to
 
-Ir, Ii = symbols('Ir Ii')
-Lir, Lii = symbols('Lir Lii')
-
-constants = Vr_set, Vi_set = symbols("Vr_set Vi_set")
+Ir, Ii = 'Ir', 'Ii'
 variables = Vr_from, Vi_from, Vr_to, Vi_to, Ir, Ii
 
-kcl_r = KCL_r(Ir)
-kcl_i = KCL_i(Ii)
+def build_voltage_source_definition():
+    constants = Vr_set, Vi_set = to_symbols("Vr_set", "Vi_set")
+    primals = Vr_from, Vi_from, Vr_to, Vi_to, Ir, Ii = to_symbols(*variables)
+
+    kcl_r = KCL_r(Ir)
+    kcl_i = KCL_i(Ii)
+
+    Vset_r_eqn = Eq(Vr_set - (Vr_from - Vr_to))
+    Vset_i_eqn = Eq(Vi_set - (Vi_from - Vi_to))
 
-Vset_r_eqn = Eq(Vr_set - (Vr_from - Vr_to))
-Vset_i_eqn = Eq(Vi_set - (Vi_from - Vi_to))
+    return TwoTerminalModelDefinition(primals, constants, kcl_r, kcl_i, equalities=[Vset_r_eqn, Vset_i_eqn])
 
-lh = TwoTerminalModelDefinition(variables, constants, kcl_r, kcl_i, equalities=[Vset_r_eqn, Vset_i_eqn])
+lh = LazyModelDefinition("voltage_source", __file__, build_voltage_source_definition)
 
 class VoltageSource:
     def __init__(self, from_bus: Bus, to_bus: Bus, Vr_set, Vi_set) -> None:
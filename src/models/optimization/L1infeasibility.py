@@ -1,6 +1,5 @@
 from typing import List
-from sympy import symbols
-from logic.stamping.lagrangesegment import LagrangeSegment
+from logic.stamping.lagrangesegment import LagrangeSegment, LazyModelDefinition, to_symbols
 from logic.stamping.lagrangestampdetails import LagrangeStampDetails
 from models.components.bus import Bus
 from logic.stamping.matrixstamper import build_stamps_from_stamper
@@ -31,16 +30,22 @@ class L1InfeasibilityOptimization:
             stamps += infeas_current.get_stamps()
         return stamps
 
-constants = ()
-primals = [Vr, Vi, Iir_plus, Iii_plus, Iir_minus, Iii_minus] = symbols("Vr Vi Iir_plus Iii_plus Iir_minus Iii_minus")
-duals = [Lr, Li, mu_Vr_plus, mu_Vi_plus, mu_Vr_minus, mu_Vi_minus] = symbols("lambda_Vr lambda_Vi mu_Vr_plus mu_Vi_plus mu_Vr_minus mu_Vi_minus")
+primals = [Vr, Vi, Iir_plus, Iii_plus, Iir_minus, Iii_minus] = ['Vr', 'Vi', 'Iir_plus', 'Iii_plus', 'Iir_minus', 'Iii_minus']
+duals = [Lr, Li, mu_Vr_plus, mu_Vi_plus, mu_Vr_minus, mu_Vi_minus] = ['lambda_Vr', 'lambda_Vi', 'mu_Vr_plus', 'mu_Vi_plus', 'mu_Vr_minus', 'mu_Vi_minus']
 
-lagrange = Iir_plus + Iii_plus + Iir_minus + Iii_minus \
-    - Lr * (Iir_plus - Iir_minus) - Li * (Iii_plus - Iii_minus) \
-    + mu_Vr_plus * Iir_plus + mu_Vr_minus * Iir_minus \
-    + mu_Vi_plus * Iii_plus + mu_Vi_minus * Iii_minus
+def build_l1_infeasibility_definition():
+    constants = ()
+    primal_symbols = [Vr, Vi, Iir_plus, Iii_plus, Iir_minus, Iii_minus] = to_symbols(*primals)
+    dual_symbols = [Lr, Li, mu_Vr_plus, mu_Vi_plus, mu_Vr_minus, mu_Vi_minus] = to_symbols(*duals)
 
-lh = LagrangeSegment(lagrange, constants, primals, duals)
+    lagrange = Iir_plus + Iii_plus + Iir_minus + Iii_minus \
+        - Lr * (Iir_plus - Iir_minus) - Li * (Iii_plus - Iii_minus) \
+        + mu_Vr_plus * Iir_plus + mu_Vr_minus * Iir_minus \
+        + mu_Vi_plus * Iii_plus + mu_Vi_minus * Iii_minus
+
+    return LagrangeSegment(lagrange, constants, primal_symbols, dual_symbols)
+
+lh = LazyModelDefinition("l1_infeasibility", __file__, build_l1_infeasibility_definition)
 
 class L1InfeasibilityCurrent:
     def __init__(self, bus: Bus) -> None:
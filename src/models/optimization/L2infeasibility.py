@@ -1,6 +1,5 @@
 from typing import List
-from sympy import symbols
-from logic.stamping.lagrangesegment import LagrangeSegment
+from logic.stamping.lagrangesegment import LagrangeSegment, LazyModelDefinition, to_symbols
 from logic.stamping.lagrangestampdetails import LagrangeStampDetails
 from models.components.bus import Bus
 from logic.stamping.matrixstamper import build_stamps_from_stamper
@@ -31,13 +30,19 @@ class L2InfeasibilityOptimization:
             stamps += infeas_current.get_stamps()
         return stamps
 
-constants = ()
-primals = [Iir, Iii] = symbols("Iir Iii")
-duals = [Lr, Li] = symbols("lambda_Vr lambda_Vi")
+primals = [Iir, Iii] = ['Iir', 'Iii']
+duals = [Lr, Li] = ['lambda_Vr', 'lambda_Vi']
 
-lagrange = Iir ** 2 + Iii ** 2 + Iir * Lr + Iii * Li
+def build_l2_infeasibility_definition():
+    constants = ()
+    primal_symbols = [Iir, Iii] = to_symbols(*primals)
+    dual_symbols = [Lr, Li] = to_symbols(*duals)
 
-lh = LagrangeSegment(lagrange, constants, primals, duals)
+    lagrange = Iir ** 2 + Iii ** 2 + Iir * Lr + Iii * Li
+
+    return LagrangeSegment(lagrange, constants, primal_symbols, dual_symbols)
+
+lh = LazyModelDefinition("l2_infeasibility", __file__, build_l2_infeasibility_definition)
 
 class L2InfeasibilityCurrent:
     def __init__(self, bus: Bus) -> None:
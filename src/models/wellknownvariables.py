@@ -1,6 +1,5 @@
-from sympy import symbols
+#Variables are referred to by name, the sympy symbols are only created when a model's equations are derived.
+tx_factor = 'tx_factor'
 
-tx_factor = symbols('tx_factor')
-
-Vr_from, Vi_from, Vr_to, Vi_to = symbols('V_from\,r V_from\,i V_to\,r V_to\,i')
-Lr_from, Li_from, Lr_to, Li_to = symbols('lambda_from\,r lambda_from\,i lambda_to\,r lambda_to\,i')
\ No newline at end of file
+Vr_from, Vi_from, Vr_to, Vi_to = 'V_from,r', 'V_from,i', 'V_to,r', 'V_to,i'
+Lr_from, Li_from, Lr_to, Li_to = 'lambda_from,r', 'lambda_from,i', 'lambda_to,r', 'lambda_to,i'
@@ -30,6 +30,11 @@ def main():
     parser.add_argument("--load_factor", required=False, default=-1)
     parser.add_argument("--tx_stepping", required=False, default=False, action='store_true')
     parser.add_argument("--select_island", required=False, default=False)
+    parser.add_argument("--workers", required=False, default=None)
+    parser.add_argument("--solve_islands", required=False, default=False, action='store_true')
+    parser.add_argument("--island_workers", required=False, default=None)
+    parser.add_argument("--outputformat", required=False, default="csv", choices=["csv", "npz"])
+    parser.add_argument("--cache_network", required=False, default=False, action='store_true')
     args = parser.parse_args()
 
     case = args.case
@@ -45,6 +50,11 @@ def main():
     tx_stepping = args.tx_stepping
     load_factor = float(args.load_factor)
     select_island = args.select_island
+    workers = args.workers
+    solve_islands = args.solve_islands
+    island_workers = args.island_workers
+    outputformat = args.outputformat
+    cache_network = args.cache_network
     print(colored("Starting power flow solver...",'green'))
     print(colored(f"Can run power deficient networks: {infeasibility}", 'green'))
 
@@ -55,7 +65,10 @@ def main():
         tx_stepping=tx_stepping, 
         voltage_limiting=False,
         dump_matrix=False,
-        load_factor=load_factor
+        load_factor=load_factor,
+        solve_islands=solve_islands,
+        island_workers=island_workers,
+        cache_network=cache_network
         )
 
     network = NetworkLoader(settings).from_file(case)
@@ -78,6 +91,8 @@ def main():
             negativeloads = negativeloads,
             select_island = select_island,
             outputfile = outputfile,
+            workers = workers,
+            outputformat = outputformat,
         )
         postprocessor = TimeSeriesProcessor(postprocessingsettings, powerflow)
         results = postprocessor.execute()
@@ -0,0 +1,57 @@
+#Tracks solver start up cost: the time to import run_solver in a fresh interpreter, and
+#whether a warm kernel cache solve manages to avoid importing sympy/pandas entirely.
+#Usage: python test/benchmarks/import_time.py [--runs N] [--case GLM_OR_RAW_FILE]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+SRC_DIR = os.path.realpath(os.path.join(CURR_DIR, "..", "..", "src"))
+DEFAULT_CASE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+
+SOLVE_SCRIPT = """
+import sys
+sys.argv = ["run_solver", sys.argv[1]]
+import run_solver
+run_solver.main()
+print("HEAVY_MODULES", [name for name in ["sympy", "pandas"] if name in sys.modules])
+"""
+
+def run_python(args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, env=env, capture_output=True, text=True, cwd=SRC_DIR)
+    duration = time.perf_counter() - start
+    if result.returncode != 0:
+        raise Exception(result.stderr)
+    return duration, result.stdout
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--case", default=DEFAULT_CASE)
+    args = parser.parse_args()
+
+    baseline = [run_python(["-c", "pass"])[0] for _ in range(args.runs)]
+    imports = [run_python(["-c", "import run_solver"])[0] for _ in range(args.runs)]
+
+    #The first solve may have to populate the kernel cache, only the later ones are measured.
+    run_python(["-c", SOLVE_SCRIPT, args.case])
+    solves = []
+    for _ in range(args.runs):
+        duration, output = run_python(["-c", SOLVE_SCRIPT, args.case])
+        solves.append(duration)
+
+    heavy_modules = [line for line in output.splitlines() if line.startswith("HEAVY_MODULES")][0]
+
+    print(f"Interpreter start:    {statistics.median(baseline):.3f}s")
+    print(f"Import run_solver:    {statistics.median(imports):.3f}s")
+    print(f"Warm solve ({os.path.basename(os.path.dirname(args.case))}): {statistics.median(solves):.3f}s")
+    print(heavy_modules)
+
+if __name__ == "__main__":
+    main()
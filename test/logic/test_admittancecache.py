@@ -0,0 +1,23 @@
+import numpy as np
+from models.components.unbalanced_line import AdmittanceCache, invert_impedances
+
+IMPEDANCES = np.array([
+    [3.4e-4 + 1.0e-3j, 1.5e-4 + 5.0e-4j, 1.5e-4 + 4.2e-4j],
+    [1.5e-4 + 5.0e-4j, 3.4e-4 + 1.0e-3j, 1.5e-4 + 3.8e-4j],
+    [1.5e-4 + 4.2e-4j, 1.5e-4 + 3.8e-4j, 3.4e-4 + 1.0e-3j]
+])
+
+def test_prepared_admittances_match_per_line_inverse():
+    single_phase = np.array([[3.4e-4 + 1.0e-3j]])
+
+    cache = AdmittanceCache()
+    cache.prepare([IMPEDANCES.tolist(), IMPEDANCES.tolist(), single_phase], ["ABC", "ABC", "A"])
+
+    #Single entry matrices are left to calcInverse.
+    assert len(cache.admittances) == 1
+
+    for impedances, phases in [(IMPEDANCES, "ABC"), (single_phase, "A")]:
+        expected = invert_impedances(impedances.copy() * 150, phases)
+        assert np.allclose(cache.get_admittances(impedances, phases) / 150, expected)
+
+    assert len(cache.admittances) == 2
@@ -0,0 +1,33 @@
+import os
+import numpy as np
+from logic.batchpowerflow import BatchPowerFlow
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+
+def test_batch_matches_individual_solves():
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(CASE_FILE)
+
+    factors = np.array([0.5, 1.0, 1.2])
+    base_P = np.array([load.P for load in network.loads])
+    base_Q = np.array([load.Q for load in network.loads])
+
+    batch_results = BatchPowerFlow(network, settings).execute(np.outer(factors, base_P), np.outer(factors, base_Q))
+
+    #The network itself is left as it was.
+    assert np.allclose([load.P for load in network.loads], base_P)
+
+    for factor, results in zip(factors, batch_results):
+        expected_network = NetworkLoader(settings).from_file(CASE_FILE)
+        for load in expected_network.loads:
+            load.P *= factor
+            load.Q *= factor
+        expected = PowerFlow(expected_network, settings).execute()
+
+        assert results.is_success
+        assert np.allclose(results.v_final, expected.v_final, atol=1e-6)
+        assert np.allclose([x.P for x in results.load_results], base_P * factor)
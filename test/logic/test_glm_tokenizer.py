@@ -0,0 +1,76 @@
+from ditto.readers.gridlabd.glm_tokenizer import find_includes, read_glm_blocks
+from ditto.readers.gridlabd.read import read_gld_objects_and_schedules
+
+MAIN_GLM = """
+clock {
+    timestamp '2000-01-01 0:00:00';
+}
+#set profiler=1
+module powerflow { solver_method NR; };
+
+object node { name n1; phases ABCN; nominal_voltage 2401.7771; } // one line object
+object meter {
+    name "m1";
+    phases ABCN; // trailing comment
+    nominal_voltage 2401.7771;
+    object load {
+        name l1;
+        phases ABCN;
+        constant_power_A 1000+200j;
+        nominal_voltage 2401.7771;
+    };
+};
+#include "include.glm"
+schedule LOADSHAPE {
+    {
+        * 0-13 * * * 0.5;
+        * 14-23 * * * 0.75;
+    }
+}
+"""
+
+INCLUDE_GLM = """
+object overhead_line {
+    phases ABCN;
+    from n1;
+    to m1;
+    length 2000;
+}
+"""
+
+def write_case(tmp_path):
+    main_file = tmp_path / "main.glm"
+    main_file.write_text(MAIN_GLM)
+    (tmp_path / "include.glm").write_text(INCLUDE_GLM)
+    return str(main_file)
+
+def test_blocks_are_streamed_in_order(tmp_path):
+    main_file = write_case(tmp_path)
+
+    blocks = [(block.keyword, block.header) for block in read_glm_blocks(main_file)]
+    assert blocks == [
+        ("clock", []),
+        ("module", ["powerflow"]),
+        ("object", ["node"]),
+        ("object", ["meter"]),
+        ("object", ["load"]),
+        ("object", ["overhead_line"]),
+        ("schedule", ["LOADSHAPE"])
+    ]
+
+    assert list(find_includes(main_file)) == [str(tmp_path / "include.glm")]
+
+def test_read_objects_and_schedules(tmp_path):
+    main_file = write_case(tmp_path)
+
+    objects, schedules = read_gld_objects_and_schedules(main_file)
+    assert list(objects) == ["n1", "m1", "l1", "n1-m1"]
+
+    #Nested objects are read on their own, without touching the enclosing object.
+    assert objects["m1"]["phases"] == "ABCN"
+    assert objects["l1"]["parent"] == "m1"
+    assert objects["l1"]["constant_power_A"] == "1000+200j"
+
+    assert objects["n1-m1"]["length"] == "2000"
+    #The default origin is 2PM.
+    assert schedules == { "LOADSHAPE": "0.75" }
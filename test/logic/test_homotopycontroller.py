@@ -0,0 +1,62 @@
+import os
+import numpy as np
+from logic.homotopycontroller import STEP_MAX_ITERATIONS, HomotopyController
+from logic.network.networkloader import NetworkLoader
+from logic.nrsolver import NRSolver
+from logic.powerflowsettings import PowerFlowSettings
+from logic.stamping.matrixstamper import build_matrix_stamper
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+
+def test_continuation_matches_direct_solve():
+    settings = PowerFlowSettings(tx_stepping=True)
+    network = NetworkLoader(settings).from_file(CASE_FILE)
+    network.assign_matrix()
+    v_init = network.generate_v_init(settings)
+
+    nrsolver = NRSolver(settings, network, None)
+    homotopy = HomotopyController(settings, network, nrsolver)
+    matrix_stamper = build_matrix_stamper(network)
+
+    is_success, v_direct, _ = nrsolver.run_powerflow(matrix_stamper, v_init, 0)
+    assert is_success
+
+    is_success, v_final, iterations, tx_factor, residuals = homotopy.run_continuation(matrix_stamper, v_init)
+
+    assert is_success
+    assert tx_factor == 0
+    assert residuals.max_residual < settings.tolerance
+    assert np.allclose(v_final, v_direct, atol=1e-6)
+    #The adaptive steps should get there in far fewer solves than fixed 0.01 increments.
+    assert iterations < 100
+
+#Converges straight away, except for the first attempt at the actual problem.
+class FailFirstFinalStepSolver:
+    def __init__(self):
+        self.calls = []
+
+    def run_powerflow(self, matrix_stamper, v_init, tx_factor, max_iters = None):
+        self.calls.append((tx_factor, max_iters))
+        is_success = tx_factor != 0 or any(tx == 0 for tx, _ in self.calls[:-1])
+        return (is_success, v_init, 0)
+
+class NoResidualsStamper:
+    def calc_residuals(self, tx_factor, v, iteration_num):
+        return None
+
+def test_failed_final_step_keeps_step_budget():
+    settings = PowerFlowSettings(tx_stepping=True)
+    solver = FailFirstFinalStepSolver()
+    homotopy = HomotopyController(settings, None, solver)
+
+    is_success, _, _, tx_factor, _ = homotopy.run_continuation(NoResidualsStamper(), np.zeros(2))
+
+    assert is_success and tx_factor == 0
+    final_steps = [max_iters for tx, max_iters in solver.calls[1:] if tx == 0]
+    intermediate_steps = [max_iters for tx, max_iters in solver.calls[1:] if tx != 0]
+
+    assert final_steps == [settings.max_iters, settings.max_iters]
+    #The steps retried after the failed final step are intermediate ones again.
+    assert len(intermediate_steps) > 0
+    assert all(max_iters == STEP_MAX_ITERATIONS for max_iters in intermediate_steps)
@@ -183,3 +183,20 @@ def compare_line_impedances(powerflow_lines, gridlabd_lines):
             if from_node == line.from_element and to_node == line.to_element:
                 assert np.allclose(np.abs(line.impedances), np.abs(b_matrix), atol=1e-3), f"Line impedance mismatch at {name} ({from_node}:{to_node})"
                 break
+
+def test_memoized_impedance_matrixes_are_copies():
+    wire_list = [
+        WireTest(phase="1", resistance=0.48, gmr=0.0158, overhead_diameter=0.522, insulation_thickness=0.08),
+        WireTest(phase="2", resistance=0.48, gmr=0.0158, overhead_diameter=0.522, insulation_thickness=0.08),
+        WireTest(phase="N", resistance=0.48, gmr=0.0158, overhead_diameter=0.522, insulation_thickness=0.08),
+    ]
+
+    first = compute_triplex_impedance(wire_list)
+    expected = first.copy()
+    first[0][0] = 0
+
+    assert np.array_equal(compute_triplex_impedance(wire_list), expected)
+
+    #A different conductor is a different configuration.
+    wire_list[0].resistance = 0.5
+    assert not np.array_equal(compute_triplex_impedance(wire_list), expected)
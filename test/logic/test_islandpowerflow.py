@@ -0,0 +1,53 @@
+import os
+import numpy as np
+import pytest
+from logic.islandpowerflow import split_islands
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+DATA_DIR = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase"))
+
+def load(case, settings):
+    return NetworkLoader(settings).from_file(os.path.join(DATA_DIR, case, "node.glm"))
+
+def get_bus_voltages(results):
+    return {f"{bus.NodeName}:{bus.NodePhase}": V for bus, V in zip(results.buses, results.bus_Vr + 1j * results.bus_Vi)}
+
+def test_islands_are_rejected_by_default():
+    settings = PowerFlowSettings()
+    with pytest.raises(Exception):
+        PowerFlow(load("two_islands", settings), settings).execute()
+
+def test_split_islands():
+    network = load("two_islands", PowerFlowSettings())
+    islands = split_islands(network)
+
+    assert len(islands) == 3
+    assert sorted(len(island.slack) for island in islands) == [0, 3, 3]
+    assert sum(len(island.buses) for island in islands) == len(network.buses)
+    assert sum(len(island.lines) for island in islands) == len(network.lines)
+    assert sum(len(island.loads) for island in islands) == len(network.loads)
+
+@pytest.mark.parametrize("island_workers", [None, 2])
+def test_islands_match_separate_solves(island_workers):
+    settings = PowerFlowSettings(solve_islands=True, island_workers=island_workers)
+    results = PowerFlow(load("two_islands", settings), settings).execute()
+    assert results.is_success
+    assert results.max_residual < settings.tolerance
+
+    feeder_settings = PowerFlowSettings()
+    feeder_results = PowerFlow(load("swing_2lines_load", feeder_settings), feeder_settings).execute()
+
+    voltages = get_bus_voltages(results)
+    renames = [{}, {"node1": "node5", "node2": "node6", "node3": "node7", "load4": "load8"}]
+    for rename in renames:
+        for bus_name, V in get_bus_voltages(feeder_results).items():
+            node_name, phase = bus_name.split(":")
+            assert np.isclose(voltages[f"{rename.get(node_name, node_name)}:{phase}"], V)
+
+    #The island without a swing bus is de-energized.
+    for node_name in ["node9", "node10", "node11", "load12"]:
+        for phase in "ABC":
+            assert voltages[f"{node_name}:{phase}"] == 0
@@ -0,0 +1,66 @@
+import os
+import numpy as np
+from sympy import symbols, cos
+from logic.stamping.lagrangekernel import build_kernel
+from logic.stamping.lagrangesegment import LagrangeSegment
+
+def test_kernel_matches_expressions():
+    a, x, y = symbols("a x y")
+
+    expressions = [
+        a * (x**2 + y**2),
+        cos(x**2 + y**2) / a,
+        -5
+    ]
+
+    kernel = build_kernel((a, x, y), expressions)
+
+    a_v = np.array([1., 2.])
+    x_v = np.array([0.5, 3.])
+    y_v = np.array([-1., 0.25])
+
+    outputs = kernel.evaluate([a_v, x_v, y_v])
+
+    assert kernel.output_count == 3
+    assert np.allclose(outputs[0], a_v * (x_v**2 + y_v**2))
+    assert np.allclose(outputs[1], np.cos(x_v**2 + y_v**2) / a_v)
+    assert outputs[2] == -5
+
+    #The shared subterm is only computed once.
+    assert kernel.source.count("a1**2") == 1
+
+def test_segment_kernels_from_cache():
+    constants = a, b = symbols("a b")
+    primals = x, y = symbols("x y")
+    duals = Lx, Ly = symbols("Lx Ly")
+
+    lagrange = np.dot(duals, [a * x ** 2 - b * y, -a * x + b * x * y + 5])
+
+    generated = LagrangeSegment(lagrange, constants, primals, duals).get_kernels(False)
+    #A fresh segment for the same equation has to come out of the kernel module cache.
+    cached_segment = LagrangeSegment(lagrange, constants, primals, duals)
+    cached = cached_segment.get_kernels(False)
+
+    #No sympy derivation was needed for the second segment.
+    assert cached_segment._derivatives == None
+
+    assert generated.stamps == cached.stamps
+    assert generated.residuals == cached.residuals
+
+    args = [np.array([2.]), np.array([3.]), np.array([0.5]), np.array([1.5]), np.array([1.]), np.array([1.])]
+
+    for first_order_str, kernel_index in cached.residuals:
+        if first_order_str == "Lx":
+            assert np.allclose(cached.nonlinear_kernel.evaluate(args)[kernel_index], 2 * 0.5**2 - 3 * 1.5)
+        elif first_order_str == "Ly":
+            assert np.allclose(cached.nonlinear_kernel.evaluate(args)[kernel_index], -2 * 0.5 + 3 * 0.5 * 1.5 + 5)
+
+def test_model_cache_key_covers_imported_modules():
+    import models.components.load as load
+    from logic.stamping import lagrangesegment
+
+    imported_files = lagrangesegment.find_imported_files(load.__file__)
+
+    assert os.path.realpath(lagrangesegment.__file__) in imported_files
+    assert os.path.join(lagrangesegment.SRC_DIR, "models", "components", "bus.py") in imported_files
+    assert not any("sympy" in file for file in imported_files)
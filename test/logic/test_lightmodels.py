@@ -0,0 +1,66 @@
+from ditto.models.base import DiTToHasTraits
+from ditto.models.line import Line
+from ditto.models.power_source import PowerSource
+from ditto.models.wire import Wire
+from ditto.store import Store
+
+def build_line(store):
+    line = Line(store)
+    line.name = "l1"
+    line.faultrate = 1
+    line.wires = [Wire(store), Wire(store)]
+    return line
+
+def build_models(store):
+    build_line(store)
+    PowerSource(store)
+    store.validate_models()
+    return store.models
+
+def assert_same_value(name, value, expected):
+    if isinstance(expected, DiTToHasTraits):
+        assert type(value) == type(expected), name
+    elif isinstance(expected, list):
+        assert type(value) == list and len(value) == len(expected), name
+        for item, expected_item in zip(value, expected):
+            assert_same_value(name, item, expected_item)
+    else:
+        assert type(value) == type(expected) and value == expected, name
+
+def test_light_models_match_traitlets():
+    models = build_models(Store())
+    light_models = build_models(Store(light_models=True))
+
+    assert len(light_models) == len(models) == 4
+
+    for light_model, model in zip(light_models, models):
+        assert type(light_model) == type(model)
+        assert light_model.trait_names() == model.trait_names()
+        assert "response" in model.trait_names()
+
+        #Every trait reads the same, defaults are coerced the same way traitlets would.
+        for name in model.trait_names():
+            assert_same_value(name, getattr(light_model, name), getattr(model, name))
+
+def test_light_models_keep_traits_api():
+    store = Store(light_models=True)
+    line = build_line(store)
+
+    changes = []
+    line.observe(lambda change: changes.append(change.new), "faultrate")
+
+    #No notifications while loading, they are regular traits once validated.
+    line.faultrate = 2
+    store.validate_models()
+    assert changes == []
+
+    line.faultrate = 3
+    line.set_trait("faultrate", 4)
+    assert changes == [3.0, 4.0]
+    assert line.faultrate == 4.0 and type(line.faultrate) == float
+
+    try:
+        line.faultrate = "fast"
+        assert False
+    except Exception as e:
+        assert type(e).__name__ == "TraitError"
@@ -0,0 +1,42 @@
+import numpy as np
+from scipy.sparse import csc_matrix
+from logic.powerflowsettings import PowerFlowSettings
+from logic.stamping.matrixbuilder import MatrixBuilder
+
+def stamp_iteration(Y: MatrixBuilder, scale):
+    Y.stamp(2, 2, 1.0 * scale)
+    Y.stamp(0, 1, 0.0)
+    Y.stamp_many(np.array([1, 0]), np.array([1, 0]), np.array([3.0, 4.0]) * scale)
+
+def test_pattern_reused_across_iterations():
+    Y = MatrixBuilder(PowerFlowSettings())
+    Y.stamp(0, 0, 2.0)
+    Y.stamp(1, 2, -1.0)
+    linear_index = Y.get_usage()
+
+    for scale in [1, 2, 5]:
+        stamp_iteration(Y, scale)
+        matrix = Y.to_matrix()
+
+        rows = [0, 1, 2, 0, 1, 0]
+        cols = [0, 2, 2, 1, 1, 0]
+        vals = [2.0, -1.0, 1.0 * scale, 0.0, 3.0 * scale, 4.0 * scale]
+        expected = csc_matrix((vals, (rows, cols)), shape=(3, 3))
+
+        assert np.array_equal(matrix.toarray(), expected.toarray())
+        #The explicit zero keeps its place in the pattern.
+        assert matrix.nnz == 5
+
+        Y.clear(retain_idx=linear_index)
+
+def test_pattern_change_relocks():
+    Y = MatrixBuilder(PowerFlowSettings())
+    Y.stamp(0, 0, 1.0)
+    Y.stamp(1, 1, 1.0)
+    Y.to_matrix()
+
+    Y.clear()
+    Y.stamp(0, 1, 2.0)
+    Y.stamp(1, 0, 3.0)
+
+    assert np.array_equal(Y.to_matrix().toarray(), [[0, 2], [3, 0]])
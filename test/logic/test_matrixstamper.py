@@ -0,0 +1,106 @@
+import os
+import numpy as np
+from logic.network.networkloader import NetworkLoader
+from logic.powerflowsettings import PowerFlowSettings
+from logic.stamping.matrixbuilder import MatrixBuilder
+from logic.stamping.matrixstamper import InputBuilder, MatrixStamper, StampBatch, StampInput, build_matrix_stamper, build_stamps_from_stamper
+from models.components.capacitor import CapSwitchState, Capacitor
+from models.components.line import build_line_stamper, line_lh, shunt_lh
+from models.components.regulator import Regulator
+from models.wellknownvariables import Vr_from, Vi_from, Vr_to, Vi_to, Lr_from, Li_from, Lr_to, Li_to
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+DATA_DIR = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase"))
+
+def load_network(case):
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(os.path.join(DATA_DIR, case, "node.glm"))
+    network.assign_matrix()
+    return settings, network, network.generate_v_init(settings)
+
+def assemble(settings, matrix_stamper, v):
+    return assemble_at(settings, matrix_stamper, v, 0)
+
+def assemble_at(settings, matrix_stamper, v, tx_factor):
+    Y = MatrixBuilder(settings)
+    J = np.zeros(len(v))
+    matrix_stamper.reset_iterations()
+    matrix_stamper.stamp_linear(Y, J, tx_factor)
+    matrix_stamper.stamp_nonlinear(Y, J, v, 0)
+    return Y.to_matrix().toarray(), J
+
+def assert_matches_rebuild(settings, network, matrix_stamper, v):
+    Y, J = assemble(settings, matrix_stamper, v)
+    Y_rebuilt, J_rebuilt = assemble(settings, build_matrix_stamper(network), v)
+    assert np.allclose(Y, Y_rebuilt)
+    assert np.allclose(J, J_rebuilt)
+
+def test_capacitor_switch_updates_in_place():
+    settings, network, v = load_network("ieee_four_bus_cap")
+    matrix_stamper = build_matrix_stamper(network)
+
+    capacitors = [x for x in network.get_all_elements() if isinstance(x, Capacitor)]
+    assert len(capacitors) > 0
+
+    Y_closed, _ = assemble(settings, matrix_stamper, v)
+
+    for capacitor in capacitors:
+        capacitor.switch = CapSwitchState.OPEN
+        assert matrix_stamper.try_update_element(capacitor)
+
+    assert_matches_rebuild(settings, network, matrix_stamper, v)
+    assert not np.allclose(assemble(settings, matrix_stamper, v)[0], Y_closed)
+
+    for capacitor in capacitors:
+        capacitor.switch = CapSwitchState.CLOSED
+        assert matrix_stamper.try_update_element(capacitor)
+
+    assert np.allclose(assemble(settings, matrix_stamper, v)[0], Y_closed)
+
+def test_regulator_tap_change_updates_in_place():
+    settings, network, v = load_network("regulator_ol")
+    matrix_stamper = build_matrix_stamper(network)
+
+    regulators = [x for x in network.get_all_elements() if isinstance(x, Regulator)]
+    assert len(regulators) > 0
+
+    for regulator in regulators:
+        assert regulator.try_increment_tap_position(-1)
+        assert matrix_stamper.try_update_element(regulator)
+
+    assert_matches_rebuild(settings, network, matrix_stamper, v)
+
+def test_stamp_batch_matches_stamp_collections():
+    settings = PowerFlowSettings()
+    v = np.array([1.0, 0.2, 0.9, 0.1])
+
+    line_stamper = build_line_stamper(0, 1, 2, 3, None, None, None, None, False)
+    shunt_stamper = build_line_stamper(2, 3, None, None, None, None, None, None, False, is_shunt=True)
+    collections = build_stamps_from_stamper(None, line_stamper, [5.0, -12.0, 0]) + build_stamps_from_stamper(None, shunt_stamper, [0, 0.5, 0])
+
+    def batch_indexes(*indexes):
+        return {variable: np.array([idx], dtype=np.int64) for variable, idx in zip((Vr_from, Vi_from, Vr_to, Vi_to, Lr_from, Li_from, Lr_to, Li_to), indexes)}
+
+    batches = [
+        StampBatch(line_lh, np.array([[5.0, -12.0, 0]]), batch_indexes(0, 1, 2, 3, -1, -1, -1, -1)),
+        StampBatch(shunt_lh, np.array([[0, 0.5, 0]]), batch_indexes(2, 3, -1, -1, -1, -1, -1, -1))
+    ]
+
+    for tx_factor in [0, 0.5]:
+        Y, J = assemble_at(settings, MatrixStamper(collections, False), v, tx_factor)
+        Y_batched, J_batched = assemble_at(settings, MatrixStamper([], False, stamp_batches=batches), v, tx_factor)
+        assert np.allclose(Y, Y_batched)
+        assert np.allclose(J, J_batched)
+
+def test_equal_inputs_share_an_instance():
+    input_builder = InputBuilder(["G", "B", "V"], None, False)
+
+    first = StampInput([1.0, 2.0], [3], [])
+    same = StampInput([1.0, 2.0], [3], [])
+    other = StampInput([1.0, 2.5], [3], [])
+
+    assert first.key == same.key
+    assert input_builder.add_input(first) == input_builder.add_input(same)
+    assert input_builder.add_input(other) == 1
+    assert not input_builder.owns_input(first)
+    assert input_builder.owns_input(other)
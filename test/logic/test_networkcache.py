@@ -0,0 +1,51 @@
+import os
+import shutil
+from logic.network.networkcache import NetworkCache
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+
+def test_cached_network_solves_like_parsed(tmp_path):
+    case_file = str(tmp_path / "node.glm")
+    shutil.copyfile(CASE_FILE, case_file)
+
+    settings = PowerFlowSettings(cache_network=True)
+    #Kept apart from the shared cache, so the first load is always an actual parse.
+    cache = NetworkCache(str(tmp_path / "cache"))
+    cache_key = cache.get_cache_key(case_file, settings)
+    assert not cache.has_network(cache_key)
+
+    parsed = NetworkLoader(settings, cache).from_file(case_file)
+    assert cache.has_network(cache_key)
+
+    cached = NetworkLoader(settings, cache).from_file(case_file)
+    assert cached is not parsed
+
+    assert PowerFlow(cached, settings).execute().v_final.tolist() == PowerFlow(parsed, settings).execute().v_final.tolist()
+
+    #Parse settings and file contents are part of the key.
+    assert cache.get_cache_key(case_file, PowerFlowSettings(enable_line_capacitance=False)) != cache_key
+    assert cache.get_cache_key(case_file, PowerFlowSettings(verify_line_admittances=False)) != cache_key
+    with open(case_file, "a") as f:
+        f.write("\n//edited\n")
+    assert cache.get_cache_key(case_file, settings) != cache_key
+
+def test_corrupt_snapshot_is_discarded(tmp_path):
+    case_file = str(tmp_path / "node.glm")
+    shutil.copyfile(CASE_FILE, case_file)
+
+    settings = PowerFlowSettings(cache_network=True)
+    cache = NetworkCache(str(tmp_path / "cache"))
+    cache_key = cache.get_cache_key(case_file, settings)
+
+    with open(cache._get_cache_file(cache_key), "wb") as f:
+        f.write(b"not a pickle")
+
+    network = NetworkLoader(settings, cache).from_file(case_file)
+    assert len(network.buses) > 0
+
+    #The bad snapshot was replaced by a fresh one.
+    assert cache.try_load(cache_key).__class__ == network.__class__
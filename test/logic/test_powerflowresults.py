@@ -0,0 +1,27 @@
+import os
+import numpy as np
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+
+def test_columns_match_result_objects():
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(CASE_FILE)
+    results = PowerFlow(network, settings).execute()
+
+    assert results._bus_results == None
+
+    for idx, bus_result in enumerate(results.bus_results):
+        assert bus_result.bus is results.buses[idx]
+        assert np.isclose(bus_result.V_mag, results.bus_V_mag[idx])
+        assert np.isclose(bus_result.V_deg, results.bus_V_deg[idx])
+
+    assert [x.P for x in results.load_results] == results.load_P.tolist()
+    assert [x.Q for x in results.generator_results] == results.generator_Q.tolist()
+
+    #Load values are captured when the results are created.
+    network.loads[0].P = 0
+    assert results.load_P[0] != 0
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from logic.snapshotpowerflow import SnapshotPowerFlow
+from logic.stamping.matrixbuilder import MatrixBuilder
+from logic.stamping.matrixstamper import build_matrix_stamper
+from models.components.capacitor import CapSwitchState, Capacitor, CapacitorMode
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+CAP_CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus_cap", "node.glm"))
+
+def scale_loads(network, factor):
+    for load in network.loads:
+        load.P *= factor
+        load.Q *= factor
+    return network.loads
+
+def test_snapshots_match_independent_solves():
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(CASE_FILE)
+    snapshot_powerflow = SnapshotPowerFlow(network, settings)
+
+    assert snapshot_powerflow.execute().is_success
+    matrix_stamper = snapshot_powerflow.device_controller.homotopy.matrix_stamper
+
+    for factor in [0.8, 1.1]:
+        results = snapshot_powerflow.execute(scale_loads(network, factor))
+
+        expected_network = NetworkLoader(settings).from_file(CASE_FILE)
+        for load, expected_load in zip(network.loads, expected_network.loads):
+            expected_load.P, expected_load.Q = load.P, load.Q
+        expected = PowerFlow(expected_network, settings).execute()
+
+        assert results.is_success
+        assert np.allclose(results.v_final, expected.v_final, atol=1e-6)
+
+    #The stamps were updated in place rather than rebuilt.
+    assert snapshot_powerflow.device_controller.homotopy.matrix_stamper is matrix_stamper
+
+def assemble(settings, matrix_stamper, v):
+    Y = MatrixBuilder(settings)
+    J = np.zeros(len(v))
+    matrix_stamper.reset_iterations()
+    matrix_stamper.stamp_linear(Y, J, 0)
+    matrix_stamper.stamp_nonlinear(Y, J, v, 0)
+    return Y.to_matrix().toarray(), J
+
+def test_preliminary_device_adjustment_is_restamped():
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(CAP_CASE_FILE)
+    snapshot_powerflow = SnapshotPowerFlow(network, settings)
+
+    assert snapshot_powerflow.execute().is_success
+
+    capacitors = [x for x in network.get_all_elements() if isinstance(x, Capacitor)]
+    assert len(capacitors) > 0
+
+    #Every voltage is below the switching band, so the capacitors open on the warm start itself.
+    for capacitor in capacitors:
+        assert capacitor.switch == CapSwitchState.CLOSED
+        capacitor.mode = CapacitorMode.VOLT
+        capacitor.low_voltage = 1e9
+        capacitor.high_voltage = 2e9
+
+    results = snapshot_powerflow.execute()
+
+    assert results.is_success
+    assert all(capacitor.switch == CapSwitchState.OPEN for capacitor in capacitors)
+
+    matrix_stamper = snapshot_powerflow.device_controller.homotopy.matrix_stamper
+    Y, J = assemble(settings, matrix_stamper, results.v_final)
+    Y_rebuilt, J_rebuilt = assemble(settings, build_matrix_stamper(network), results.v_final)
+    assert np.allclose(Y, Y_rebuilt)
+    assert np.allclose(J, J_rebuilt)
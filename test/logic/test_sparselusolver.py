@@ -0,0 +1,75 @@
+import numpy as np
+from scipy.sparse import csc_matrix, identity
+from scipy.sparse import random as sparse_random
+from scipy.sparse.linalg import splu
+from logic.sparselusolver import RCM, SparseLUSolver
+
+def build_matrix(diag_scale):
+    rows = [0, 0, 1, 1, 2, 2, 3, 3, 3]
+    cols = [0, 3, 1, 2, 1, 2, 0, 2, 3]
+    vals = np.array([4, 1, 3, -1, 2, 5, 1, 1, 6], dtype=float)
+    vals[[0, 2, 5, 8]] *= diag_scale
+    return csc_matrix((vals, (rows, cols)), shape=(4, 4))
+
+def test_solve_matches_dense():
+    solver = SparseLUSolver()
+    J = np.array([1., 2., 3., 4.])
+
+    for diag_scale in [1, 2, 3.5]:
+        Y = build_matrix(diag_scale)
+        v = solver.solve(Y, J, 0)
+        assert np.allclose(Y.toarray() @ v, J)
+
+    #The ordering was only computed for the first matrix.
+    assert solver.analysis_count == 1
+    assert solver.factorization_count == 3
+
+def test_new_pattern_reanalyzes():
+    solver = SparseLUSolver()
+    J = np.array([1., 2., 3., 4.])
+
+    solver.solve(build_matrix(1), J, 0)
+    Y = csc_matrix(np.diag([1., 2., 3., 4.]))
+    v = solver.solve(Y, J, 0)
+
+    assert np.allclose(v, [1, 1, 1, 1])
+    assert solver.analysis_count == 2
+
+    solver.solve(Y, J, 1)
+    assert solver.analysis_count == 3
+
+def test_singular_matrix():
+    solver = SparseLUSolver()
+    Y = csc_matrix(np.array([[1., 1.], [1., 1.]]))
+    try:
+        solver.solve(Y, np.array([1., 2.]))
+        assert False
+    except Exception as e:
+        assert str(e) == "Error solving linear system"
+
+def test_rcm_ordering_matches_dense():
+    solver = SparseLUSolver(RCM)
+    J = np.array([1., 2., 3., 4.])
+
+    for diag_scale in [1, 2, 3.5]:
+        Y = build_matrix(diag_scale)
+        v = solver.solve(Y, J, 0)
+        assert np.allclose(Y.toarray() @ v, J)
+
+    assert solver.analysis_count == 1
+    assert sorted(solver.row_order) == [0, 1, 2, 3]
+
+def test_refactorization_keeps_the_fill_of_the_ordering():
+    size = 200
+    Y = (sparse_random(size, size, density=0.02, random_state=0) + identity(size) * size).tocsc()
+
+    solver = SparseLUSolver()
+    J = np.ones(size)
+    solver.solve(Y, J, 0)
+    v = solver.solve(Y, J, 0)
+    assert np.allclose(Y.toarray() @ v, J)
+
+    #Refactorizing the pre-permuted matrix gives the same fill as letting SuperLU order it.
+    lu = splu(Y, permc_spec="COLAMD")
+    lu_perm = splu(Y[:, solver.col_order], permc_spec="NATURAL")
+    assert lu_perm.L.nnz + lu_perm.U.nnz == lu.L.nnz + lu.U.nnz
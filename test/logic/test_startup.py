@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+SRC_DIR = os.path.realpath(os.path.join(CURR_DIR, "..", "..", "src"))
+CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+
+SOLVE_SCRIPT = """
+import sys
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+
+settings = PowerFlowSettings()
+network = NetworkLoader(settings).from_file(sys.argv[1])
+results = PowerFlow(network, settings).execute()
+print(results.is_success, "sympy" in sys.modules)
+"""
+
+def test_warm_cache_solve_skips_sympy():
+    #Make sure the kernel cache is populated for the case.
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(CASE_FILE)
+    assert PowerFlow(network, settings).execute().is_success
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR
+    result = subprocess.run([sys.executable, "-c", SOLVE_SCRIPT, CASE_FILE], env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "True False"
@@ -0,0 +1,33 @@
+from ditto.models.line import Line
+from ditto.models.node import Node
+from ditto.models.power_source import PowerSource
+from ditto.store import Store
+
+def build_node(store, klass, name):
+    node = klass(store)
+    node.name = name
+    return node
+
+def test_typed_lookups_follow_insertion_order():
+    store = Store(light_models=True)
+
+    n1 = build_node(store, Node, "n1")
+    source = build_node(store, PowerSource, "source")
+    line = build_node(store, Line, "l1")
+    n2 = build_node(store, Node, "n2")
+
+    assert store.models == (n1, source, line, n2)
+    assert store.models is store.models
+    assert list(store.iter_models(Node)) == [n1, n2]
+    assert list(store.iter_models((Node, PowerSource))) == [n1, source, n2]
+
+    assert store.find_model("n2", Node) is n2
+    assert store.find_model("source", Node) is None
+
+    store.remove_element(n1)
+    assert store.models == (source, line, n2)
+    assert store.find_model("n1", Node) is None
+    assert list(store.iter_models((Node, PowerSource))) == [source, n2]
+
+    n2.name = "renamed"
+    assert store.find_model("renamed", Node) is n2
@@ -0,0 +1,42 @@
+import os
+import numpy as np
+from logic.network.networkloader import NetworkLoader
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from logic.sweepsolver import SweepSolver, is_radial_network
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+DATA_DIR = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase"))
+
+def solve(case, sweep_radial_networks):
+    settings = PowerFlowSettings(sweep_radial_networks=sweep_radial_networks)
+    network = NetworkLoader(settings).from_file(os.path.join(DATA_DIR, case, "node.glm"))
+    powerflow = PowerFlow(network, settings)
+    return powerflow, powerflow.execute()
+
+def test_sweep_matches_newton_raphson():
+    _, nr_results = solve("ieee_13", False)
+
+    settings = PowerFlowSettings(sweep_radial_networks=True)
+    network = NetworkLoader(settings).from_file(os.path.join(DATA_DIR, "ieee_13", "node.glm"))
+    powerflow = PowerFlow(network, settings)
+
+    #Solved through our own device controller, so we can inspect the solver that actually ran.
+    powerflow.validate_network()
+    device_controller = powerflow.build_device_controller()
+    sweep_results = powerflow.build_results(0, *device_controller.run_powerflow())
+
+    solver = device_controller.homotopy.nrsolver
+    assert isinstance(solver, SweepSolver)
+    assert solver.is_radial
+    assert solver.fallback_count == 0
+
+    assert sweep_results.is_success
+    assert sweep_results.max_residual < 1e-5
+    assert np.allclose(sweep_results.v_final, nr_results.v_final, atol=1e-4)
+
+def test_meshed_network_is_not_swept():
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(os.path.join(DATA_DIR, "network_model", "node.glm"))
+
+    assert not is_radial_network(network)
@@ -0,0 +1,99 @@
+import os
+import numpy as np
+from logic.network.networkloader import NetworkLoader
+from logic.network.timeseriesprocessor import TimeSeriesProcessor
+from logic.network.timeseriessettings import TimeSeriesSettings
+from logic.network.timeserieswriter import read_time_series_output
+from logic.powerflow import PowerFlow
+from logic.powerflowsettings import PowerFlowSettings
+from models.components.capacitor import CapacitorMode
+
+CURR_DIR = os.path.realpath(os.path.dirname(__file__))
+CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus", "node.glm"))
+CAP_CASE_FILE = os.path.realpath(os.path.join(CURR_DIR, "..", "data", "three_phase", "ieee_four_bus_cap", "node.glm"))
+
+HOURS = 4
+
+def write_load_file(path):
+    magnitudes = [2e6 * (0.7 + 0.1 * hour) for hour in range(HOURS)]
+    with open(path, "w") as f:
+        f.write("cl_load4A,cl_load4B,cl_load4C\n")
+        for magnitude in magnitudes:
+            f.write(f"{magnitude},{magnitude * 0.9},{magnitude * 1.1}\n")
+
+def run_time_series(load_file, workers, outputfile = None, outputformat = "csv", case_file = CASE_FILE, prepare_network = None, carry_device_state = True):
+    settings = PowerFlowSettings()
+    network = NetworkLoader(settings).from_file(case_file)
+    if prepare_network is not None:
+        prepare_network(network)
+    timeseries_settings = TimeSeriesSettings(loadfile_name=load_file, loadfile_start=0, loadfile_end=HOURS, workers=workers, outputfile=outputfile, outputformat=outputformat, carry_device_state=carry_device_state)
+    return TimeSeriesProcessor(timeseries_settings, PowerFlow(network, settings)).execute_quasi_time_series()
+
+def test_parallel_matches_sequential(tmp_path):
+    load_file = str(tmp_path / "loads.csv")
+    write_load_file(load_file)
+
+    sequential = run_time_series(load_file, None)
+    parallel = run_time_series(load_file, 2)
+
+    assert list(parallel.powerflow_snapshot_results.keys()) == list(range(HOURS))
+
+    for hour in range(HOURS):
+        expected = sequential.powerflow_snapshot_results[hour]
+        actual = parallel.powerflow_snapshot_results[hour]
+
+        assert actual.is_success
+        assert np.allclose(actual.v_final, expected.v_final, atol=1e-6)
+        assert np.allclose([(x.P, x.Q) for x in actual.load_results], [(x.P, x.Q) for x in expected.load_results])
+
+def test_streamed_output_matches_in_memory_results(tmp_path):
+    load_file = str(tmp_path / "loads.csv")
+    write_load_file(load_file)
+
+    in_memory = run_time_series(load_file, None)
+    streamed = run_time_series(load_file, None, str(tmp_path / "results"), "npz")
+
+    #Only summaries are kept for streamed runs.
+    assert len(streamed.powerflow_snapshot_results) == 0
+    assert len(streamed.snapshot_summaries) == HOURS
+
+    output = read_time_series_output(str(tmp_path / "results.npz"))
+
+    assert output["hours"].tolist() == list(range(HOURS))
+    assert output["bus_V_mag"].shape == (HOURS, len(output["bus_names"]))
+    for hour in range(HOURS):
+        expected = in_memory.powerflow_snapshot_results[hour]
+        assert output["is_success"][hour]
+        assert np.allclose(output["bus_V_mag"][hour], expected.bus_V_mag)
+        assert np.allclose(output["load_P"][hour], expected.load_P)
+
+def open_capacitors(network):
+    #Every voltage is below the switching band, so the capacitors open in every snapshot.
+    for capacitor in network.capacitors:
+        capacitor.mode = CapacitorMode.VOLT
+        capacitor.low_voltage = 1e9
+        capacitor.high_voltage = 2e9
+
+def test_parallel_output_matches_sequential_with_switching_devices(tmp_path):
+    load_file = str(tmp_path / "loads.csv")
+    write_load_file(load_file)
+
+    #Every snapshot starts from the initial device states, so the chunks don't depend on each other.
+    for workers, name in [(None, "sequential"), (2, "parallel")]:
+        run_time_series(load_file, workers, str(tmp_path / name), "npz", CAP_CASE_FILE, open_capacitors, False)
+
+    sequential = read_time_series_output(str(tmp_path / "sequential.npz"))
+    parallel = read_time_series_output(str(tmp_path / "parallel.npz"))
+
+    assert sequential["capacitor_closed"].size > 0
+    assert not sequential["capacitor_closed"].any()
+
+    assert sorted(parallel.keys()) == sorted(sequential.keys())
+    for column, values in sequential.items():
+        #The first snapshot of a chunk isn't warm started, so it can take a different number of iterations.
+        if column in ["iterations", "max_residual"]:
+            continue
+        if values.dtype.kind in "fc":
+            assert np.allclose(parallel[column], values, atol=1e-6), column
+        else:
+            assert np.array_equal(parallel[column], values), column